@@ -0,0 +1,49 @@
+# Import necessary modules
+import asyncio
+from concurrent.futures import ThreadPoolExecutor  # Bounded pool for password hashing
+
+from django.conf import settings
+from django.contrib.auth.hashers import check_password
+from django.contrib.auth.models import User
+from rest_framework import status
+
+from planner.async_views import AsyncAPIView, json_response
+from planner.throttling import AnonRateThrottle
+from .views import get_tokens_for_user
+
+# Password hashing (PBKDF2) is CPU bound and releases the GIL, so it runs in a small
+# dedicated pool instead of on the event loop or in the default executor
+password_executor = ThreadPoolExecutor(
+    max_workers=getattr(settings, 'PASSWORD_HASHING_THREADS', 4),
+    thread_name_prefix='password-hashing',
+)
+
+
+# Async login API with brute-force protection
+class AsyncLoginView(AsyncAPIView):
+    """
+    Async API endpoint for user authentication. Implements brute-force protection.
+    """
+    throttle_classes = [AnonRateThrottle]  # Limit login attempts for unauthenticated users
+    requires_authentication = False
+
+    async def post(self, request):
+        """
+        Handles user login by verifying credentials and returning JWT tokens.
+        """
+        username = request.data.get("username")
+        password = request.data.get("password")
+
+        try:
+            user = await User.objects.aget(username=username)
+        except User.DoesNotExist:
+            return json_response({"error": "Invalid username or password"}, status=status.HTTP_401_UNAUTHORIZED)
+
+        # Verify the password in the hashing pool; the event loop keeps serving other requests
+        loop = asyncio.get_running_loop()
+        valid = await loop.run_in_executor(password_executor, check_password, password, user.password)
+        if not valid:
+            return json_response({"error": "Invalid username or password"}, status=status.HTTP_401_UNAUTHORIZED)
+
+        tokens = get_tokens_for_user(user)
+        return json_response(tokens, status=status.HTTP_200_OK)
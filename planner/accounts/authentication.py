@@ -0,0 +1,118 @@
+# Import necessary modules
+import copy  # Cached users are handed out as copies, so per-request state is not shared
+import threading  # Protects the cache from concurrent requests
+import time  # Monotonic clock for entry expiry
+from collections import OrderedDict  # Keeps entries in least-recently-used order
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+
+class UserCache:
+    """
+    Bounded, in-process LRU cache of users with a time-to-live per entry.
+    Entries are dropped by the `post_save` / `post_delete` signals of the user model
+    (see `accounts.signals`); the TTL bounds staleness across processes.
+    """
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, user_id):
+        """
+        Return the cached user, or None if it is missing or expired.
+        """
+        key = str(user_id)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            expires, user = entry
+            if expires < time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return user
+
+    def set(self, user_id, user):
+        """
+        Cache a user, evicting the least recently used entries beyond `max_size`.
+        """
+        key = str(user_id)
+        with self.lock:
+            self.entries[key] = (time.monotonic() + self.ttl, user)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        """
+        Drop a user from the cache.
+        """
+        with self.lock:
+            self.entries.pop(str(user_id), None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+# Shared cache used by CachedJWTAuthentication
+_cache_settings = getattr(settings, 'JWT_USER_CACHE', {})
+user_cache = UserCache(max_size=_cache_settings.get('MAX_SIZE', 10000), ttl=_cache_settings.get('TTL', 60))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication that resolves the token's user from an in-process cache,
+    so authenticated requests do not pay for a user query each time.
+    """
+
+    def get_user(self, validated_token):
+        """
+        Return the user of the token, from the cache when possible.
+        """
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        user = user_cache.get(user_id)
+        if user is None:
+            # The parent class loads the user and runs the active / revocation checks
+            user = super().get_user(validated_token)
+            user_cache.set(user_id, user)
+            return copy.copy(user)
+
+        # Users are evicted when they are saved, but the revocation check depends on the token
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+
+        return copy.copy(user)
+
+    async def aauthenticate(self, request):
+        """
+        Authenticate a plain Django request from an async view.
+        Returns `(user, token)`, or None if the request carries no token.
+        """
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        # Token validation is CPU only; only a cache miss needs the database
+        validated_token = self.get_validated_token(raw_token)
+        if user_cache.get(validated_token.get(api_settings.USER_ID_CLAIM)) is not None:
+            return self.get_user(validated_token), validated_token
+        return await sync_to_async(self.get_user)(validated_token), validated_token
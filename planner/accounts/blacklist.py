@@ -0,0 +1,158 @@
+# Import necessary modules
+import datetime
+import hashlib  # Hash functions of the Bloom filter
+import math
+import threading  # Protects the filter from concurrent requests
+import time  # Monotonic clock for filter synchronisation
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import BlacklistedToken, BlacklistGeneration
+
+
+class BloomFilter:
+    """
+    Compact probabilistic set: `in` never returns a false negative, and returns a false
+    positive with roughly `error_rate` probability once `capacity` items were added.
+    """
+
+    def __init__(self, capacity, error_rate):
+        self.capacity = capacity
+        # Optimal number of bits and hash functions for the capacity and error rate
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def positions(self, item):
+        # Double hashing: derive all positions from two 64-bit halves of one digest
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return [(first + i * second) % self.size for i in range(self.hashes)]
+
+    def add(self, item):
+        for position in self.positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self.positions(item))
+
+
+class TokenBlacklist:
+    """
+    Blacklist of refresh tokens keyed by `jti`.
+
+    Membership is checked against an in-memory Bloom filter first: a token that is not in
+    the filter is not blacklisted, so the common case costs no query. Only filter hits are
+    confirmed with a primary key lookup.
+
+    Tokens blacklisted by this process are added to the filter immediately. Entries written
+    by other processes are picked up with one indexed query on `blacklisted_at` at most
+    every `sync_interval` seconds, which bounds how long another worker can keep accepting
+    a token that was just blacklisted. The same sync reads the purge generation (see
+    `BlacklistGeneration`) and rebuilds the filter when another process purged entries.
+    """
+    # Entries re-read on every sync, covering clock skew and late commits between processes
+    sync_overlap = datetime.timedelta(seconds=5)
+
+    def __init__(self, capacity=1000000, error_rate=0.01, sync_interval=1.0):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.sync_interval = sync_interval
+        self.lock = threading.Lock()
+        self.filter = None
+        self.synced_at = None  # Database time of the last sync
+        self.generation = None  # Purge generation the filter was built from
+        self.next_sync = 0.0  # Monotonic time of the next sync
+
+    def rebuild(self):
+        """
+        Load every unexpired entry into a fresh filter.
+        """
+        now = timezone.now()
+        # Read first: a purge committed during the rebuild triggers another one
+        generation = BlacklistGeneration.current()
+        bloom = BloomFilter(self.capacity, self.error_rate)
+        for jti in BlacklistedToken.objects.filter(expires_at__gt=now).values_list('jti', flat=True).iterator():
+            bloom.add(jti)
+        self.filter = bloom
+        self.synced_at = now
+        self.generation = generation
+
+    def sync(self):
+        """
+        Bring the filter up to date with entries added by other processes.
+        """
+        with self.lock:
+            if self.filter is not None and time.monotonic() < self.next_sync:
+                return
+            if (self.filter is None or self.filter.count > self.capacity
+                    or BlacklistGeneration.current() != self.generation):
+                # First use, the filter is saturated and its error rate degraded, or
+                # entries were purged
+                self.rebuild()
+            else:
+                now = timezone.now()
+                recent = BlacklistedToken.objects.filter(blacklisted_at__gte=self.synced_at - self.sync_overlap)
+                for jti in recent.values_list('jti', flat=True):
+                    self.filter.add(jti)
+                self.synced_at = now
+            self.next_sync = time.monotonic() + self.sync_interval
+
+    def contains(self, jti):
+        """
+        Return True if the token with this `jti` is blacklisted.
+        """
+        self.sync()
+        with self.lock:
+            bloom = self.filter
+        if bloom is not None and jti not in bloom:
+            return False
+        # Confirm filter hits, which may be false positives or expired entries
+        return BlacklistedToken.objects.filter(jti=jti).exists()
+
+    def add(self, jti, expires_at):
+        """
+        Blacklist the token with this `jti` until it expires.
+        """
+        try:
+            with transaction.atomic():
+                BlacklistedToken.objects.create(jti=jti, expires_at=expires_at)
+        except IntegrityError:
+            # Already blacklisted
+            pass
+        self.sync()
+        with self.lock:
+            if self.filter is not None:
+                self.filter.add(jti)
+
+    def purge(self, batch_size=1000):
+        """
+        Delete expired entries in batches and return how many were deleted.
+        """
+        deleted = 0
+        expired = BlacklistedToken.objects.filter(expires_at__lte=timezone.now())
+        while True:
+            batch = list(expired.values_list('jti', flat=True)[:batch_size])
+            if not batch:
+                break
+            deleted += BlacklistedToken.objects.filter(jti__in=batch).delete()[0]
+        if deleted:
+            # Every process, this one included, starts from a filter without the purged entries
+            BlacklistGeneration.bump()
+            with self.lock:
+                self.filter = None
+        return deleted
+
+
+# Shared blacklist used by the token classes
+_blacklist_settings = getattr(settings, 'TOKEN_BLACKLIST', {})
+token_blacklist = TokenBlacklist(
+    capacity=_blacklist_settings.get('FILTER_CAPACITY', 1000000),
+    error_rate=_blacklist_settings.get('FILTER_ERROR_RATE', 0.01),
+    sync_interval=_blacklist_settings.get('SYNC_INTERVAL', 1.0),
+)
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from accounts.blacklist import token_blacklist
+
+
+class Command(BaseCommand):
+    """
+    Delete expired entries from the token blacklist.
+    Intended to be run periodically, e.g. from cron or a systemd timer.
+    """
+    help = "Delete expired tokens from the token blacklist in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help="Number of entries deleted per query (default: 1000).")
+
+    def handle(self, *args, **options):
+        deleted = token_blacklist.purge(batch_size=options['batch_size'])
+        self.stdout.write(f"Purged {deleted} expired blacklisted token(s).")
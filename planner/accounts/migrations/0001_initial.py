@@ -0,0 +1,22 @@
+# Generated by Django 5.1.15 on 2026-10-18 19:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BlacklistedToken',
+            fields=[
+                ('jti', models.CharField(max_length=255, primary_key=True, serialize=False)),
+                ('expires_at', models.DateTimeField(db_index=True)),
+                ('blacklisted_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+        ),
+    ]
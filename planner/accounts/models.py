@@ -0,0 +1,42 @@
+from django.db import models, transaction
+
+
+class BlacklistedToken(models.Model):
+    """
+    A refresh token that may no longer be used, keyed by its `jti` claim.
+    Rows can be purged once the token has expired (see the `purge_blacklist` command).
+    """
+    jti = models.CharField(max_length=255, primary_key=True)
+    # Expiry of the token; after this moment the row is no longer needed
+    expires_at = models.DateTimeField(db_index=True)
+    # Used by other processes to pick up new entries incrementally
+    blacklisted_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f"Blacklisted token {self.jti}"
+
+
+class BlacklistGeneration(models.Model):
+    """
+    Counter bumped whenever blacklist entries are purged. Every process keeps a Bloom filter
+    of the entries, which cannot forget purged ones: a process that sees the counter move
+    rebuilds its filter.
+    """
+    generation = models.BigIntegerField(default=0)
+
+    @classmethod
+    def current(cls):
+        """
+        Return the current generation with a single primary key lookup.
+        """
+        return cls.objects.filter(pk=1).values_list('generation', flat=True).first() or 0
+
+    @classmethod
+    def bump(cls):
+        """
+        Start a new generation, telling every process to rebuild its filter.
+        """
+        with transaction.atomic():
+            if not cls.objects.filter(pk=1).update(generation=models.F('generation') + 1):
+                cls.objects.get_or_create(pk=1)
+                cls.objects.filter(pk=1).update(generation=models.F('generation') + 1)
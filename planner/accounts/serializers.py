@@ -1,6 +1,9 @@
 # Import necessary modules from Django REST Framework and Django's auth models
 from rest_framework import serializers
 from django.contrib.auth.models import User
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer as BaseTokenRefreshSerializer
+
+from .tokens import RefreshToken
 
 
 # Define a serializer class for user registration
@@ -53,3 +56,10 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
         )
         # Return the newly created user instance
         return user
+
+
+# Define a serializer class for refreshing tokens
+class TokenRefreshSerializer(BaseTokenRefreshSerializer):
+    # Use the refresh token class backed by the accounts token blacklist, so rotated
+    # tokens are blacklisted and blacklisted tokens are rejected
+    token_class = RefreshToken
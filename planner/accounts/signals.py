@@ -0,0 +1,15 @@
+# Import necessary modules
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .authentication import user_cache
+
+
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def invalidate_cached_user(sender, instance, **kwargs):
+    """
+    Drop a saved or deleted user from the authentication cache.
+    """
+    user_cache.invalidate(instance.pk)
@@ -0,0 +1,54 @@
+# Import necessary modules
+import datetime
+
+from django.conf import settings
+from django.test import AsyncClient, TestCase, override_settings
+from django.utils import timezone
+
+from planner.throttling import get_counter_store
+from .blacklist import TokenBlacklist
+
+
+class TokenBlacklistTests(TestCase):
+    """
+    Each process keeps its own Bloom filter of the blacklist; `first` and `second` stand for
+    two worker processes.
+    """
+
+    def setUp(self):
+        self.first = TokenBlacklist(capacity=100, sync_interval=0)
+        self.second = TokenBlacklist(capacity=100, sync_interval=0)
+
+    def test_entries_reach_other_processes(self):
+        self.first.add('revoked', timezone.now() + datetime.timedelta(days=1))
+        self.assertTrue(self.second.contains('revoked'))
+        self.assertFalse(self.second.contains('valid'))
+
+    def test_purge_rebuilds_the_filters_of_other_processes(self):
+        self.first.add('expired', timezone.now() - datetime.timedelta(seconds=1))
+        self.first.add('revoked', timezone.now() + datetime.timedelta(days=1))
+        self.first.sync()
+        self.assertIn('expired', self.first.filter)
+
+        self.assertEqual(self.second.purge(), 1)
+        self.first.sync()
+        self.assertNotIn('expired', self.first.filter)
+        self.assertTrue(self.first.contains('revoked'))
+
+
+@override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': {'user': None, 'anon': '2/min'}})
+class AsyncLoginThrottleTests(TestCase):
+
+    def setUp(self):
+        get_counter_store().clear()
+
+    async def test_failed_logins_are_throttled(self):
+        client = AsyncClient()
+        # The throttle must not load the user of the session
+        client.cookies[settings.SESSION_COOKIE_NAME] = 'x' * 32
+        statuses = []
+        for _ in range(3):
+            response = await client.post('/api/async/login/', {'username': 'nobody', 'password': 'wrong'},
+                                         content_type='application/json')
+            statuses.append(response.status_code)
+        self.assertEqual(statuses, [401, 401, 429])
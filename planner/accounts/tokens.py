@@ -0,0 +1,32 @@
+# Import necessary modules
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt import tokens
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import datetime_from_epoch
+
+from .blacklist import token_blacklist
+
+
+class RefreshToken(tokens.RefreshToken):
+    """
+    Refresh token checked against (and added to) the `accounts` token blacklist,
+    instead of the table-backed `rest_framework_simplejwt.token_blacklist` app.
+    """
+
+    def verify(self, *args, **kwargs):
+        self.check_blacklist()
+        super().verify(*args, **kwargs)
+
+    def check_blacklist(self):
+        """
+        Raise `TokenError` if this token is blacklisted.
+        """
+        if token_blacklist.contains(self.payload[api_settings.JTI_CLAIM]):
+            raise TokenError(_("Token is blacklisted"))
+
+    def blacklist(self):
+        """
+        Blacklist this token until it expires.
+        """
+        token_blacklist.add(self.payload[api_settings.JTI_CLAIM], datetime_from_epoch(self.payload['exp']))
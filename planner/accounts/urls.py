@@ -1,5 +1,6 @@
 from django.urls import path
 from .views import LoginView, register, AccountInfoView, logout_view, DashboardView
+from .async_views import AsyncLoginView
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 
 
@@ -7,6 +8,7 @@ urlpatterns = [
     path('token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('login/', LoginView.as_view(), name='login'),
+    path('async/login/', AsyncLoginView.as_view(), name='async-login'),
     path('register/', register, name='register'),
     path('dashboard/', DashboardView.as_view(), name='dashboard'),
     path('account/', AccountInfoView.as_view(), name='account_info'),
@@ -1,13 +1,15 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework import status, permissions, throttling
+from rest_framework import status, permissions
 from django.contrib.auth.models import User
 from django.contrib.auth.password_validation import validate_password
-from rest_framework_simplejwt.tokens import RefreshToken
+from .tokens import RefreshToken
 from rest_framework.decorators import api_view, permission_classes, throttle_classes
 from django.core.exceptions import ValidationError
 
 from .serializers import UserRegistrationSerializer
+from viewer.models import TaskStats  # Per-user task statistics shown on the dashboard
+from planner import throttling  # Sliding window rate limiting
 
 
 # Helper function to generate JWT tokens
@@ -124,13 +126,17 @@ class DashboardView(APIView):
 
     def get(self, request):
         """
-        Returns a welcome message and user information for the dashboard.
+        Returns a welcome message, user information and task statistics for the dashboard.
+        - The statistics are maintained on every task write, so they are read with a single
+          primary key lookup instead of aggregating the user's tasks.
         """
+        stats = TaskStats.objects.filter(owner_id=request.user.pk).first() or TaskStats(owner_id=request.user.pk)
         dashboard_data = {
             "message": "Welcome to the Dashboard!",
             "user_info": {
                 "username": request.user.username,
                 "email": request.user.email
-            }
+            },
+            "task_stats": stats.as_dict(),
         }
         return Response(dashboard_data)
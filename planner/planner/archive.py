@@ -0,0 +1,102 @@
+# Import necessary modules
+import datetime
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from viewer.models import Task, ArchivedTask, DeletedTask
+from .events import resync_event, publish_on_commit  # Tells push clients to refetch their lists
+
+# Columns copied from the task table to the archive
+ARCHIVED_FIELDS = ('id', 'title', 'owner_id', 'description', 'status', 'creation_date', 'revision', 'version')
+
+
+def get_archive_settings():
+    """
+    Return the `TASK_ARCHIVE` setting with its defaults filled in.
+    """
+    config = getattr(settings, 'TASK_ARCHIVE', {})
+    return {
+        'AGE_DAYS': config.get('AGE_DAYS', 90),
+        'BATCH_SIZE': config.get('BATCH_SIZE', 1000),
+        'PAUSE': config.get('PAUSE', 0.1),
+        'TOMBSTONE_DAYS': config.get('TOMBSTONE_DAYS', 30),
+    }
+
+
+def archive_batch(cutoff, batch_size):
+    """
+    Move up to `batch_size` tasks completed before `cutoff` to the archive, in one
+    transaction. Returns the number of archived tasks.
+
+    For the task list the archived tasks are gone: their owners get tombstones (so delta
+    sync drops them and their cached lists go stale) and their push clients resync.
+    The per-user statistics keep counting them.
+    """
+    with transaction.atomic():
+        rows = list(
+            Task.objects.filter(status=Task.CMPL, completed_at__lt=cutoff)
+            .order_by('id').values(*ARCHIVED_FIELDS)[:batch_size]
+        )
+        if not rows:
+            return 0
+
+        ArchivedTask.objects.bulk_create([ArchivedTask(**row) for row in rows])
+        by_owner = defaultdict(list)
+        for row in rows:
+            by_owner[row['owner_id']].append(row['id'])
+        for owner_id, task_ids in by_owner.items():
+            DeletedTask.record(owner_id, task_ids)
+            publish_on_commit(owner_id, resync_event())
+        Task.objects.filter(id__in=[row['id'] for row in rows]).delete()
+    return len(rows)
+
+
+def archive_completed_tasks(age_days=None, batch_size=None, pause=None, max_batches=None):
+    """
+    Archive every task completed more than `age_days` ago, one batch per transaction.
+
+    Short transactions keep the write lock for a moment only, and the `pause` between
+    batches lets requests write in between. Returns the number of archived tasks.
+    """
+    config = get_archive_settings()
+    age_days = config['AGE_DAYS'] if age_days is None else age_days
+    batch_size = config['BATCH_SIZE'] if batch_size is None else batch_size
+    pause = config['PAUSE'] if pause is None else pause
+
+    cutoff = timezone.now() - datetime.timedelta(days=age_days)
+    archived = batches = 0
+    while max_batches is None or batches < max_batches:
+        count = archive_batch(cutoff, batch_size)
+        archived += count
+        batches += 1
+        if count < batch_size:
+            break
+        if pause:
+            time.sleep(pause)
+    return archived
+
+
+def purge_tombstones(age_days=None, batch_size=None, pause=None):
+    """
+    Delete the tombstones of tasks deleted (or archived) more than `age_days` ago, one batch
+    per transaction. Clients that last synced before them have to refetch their lists.
+    Returns the number of deleted tombstones.
+    """
+    config = get_archive_settings()
+    age_days = config['TOMBSTONE_DAYS'] if age_days is None else age_days
+    batch_size = config['BATCH_SIZE'] if batch_size is None else batch_size
+    pause = config['PAUSE'] if pause is None else pause
+
+    cutoff = timezone.now() - datetime.timedelta(days=age_days)
+    purged = 0
+    while True:
+        count = DeletedTask.purge(cutoff, batch_size)
+        purged += count
+        if count < batch_size:
+            break
+        if pause:
+            time.sleep(pause)
+    return purged
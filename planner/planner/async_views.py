@@ -0,0 +1,291 @@
+# Import necessary modules
+import json  # For parsing request bodies
+import time  # Bounds the duration of event streams
+
+from asgiref.sync import sync_to_async  # For the (rare) blocking steps of a request
+from django.contrib.auth.models import AnonymousUser
+from django.core.handlers.asgi import ASGIRequest  # Event streams need an ASGI server
+from django.http import HttpResponse, StreamingHttpResponse
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import status  # Provides HTTP status codes
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.exceptions import InvalidToken
+from accounts.authentication import CachedJWTAuthentication  # JWT authentication with an in-process user cache
+from .events import get_broker, get_events_settings  # Task change events
+from .events import issue_stream_ticket, read_stream_ticket  # Authentication of event streams
+from .listing import json_dumps  # DRF-compatible JSON
+from .serializers import TaskSerializer  # Import the TaskSerializer for validating Task data
+from .throttling import UserRateThrottle, LocalCounterStore, get_counter_store  # Rate limiting
+from .updates import update_task, delete_task  # Conditional (`If-Match`) task updates and deletion
+from .coalescing import WriteTimeout, write_coalescer  # Opt-in group commit of task writes
+from .views import UserTasksView  # Task listing shared with the synchronous endpoint
+
+
+def json_response(data, status=status.HTTP_200_OK, headers=None):
+    """
+    Return a JSON response encoded exactly like DRF's JSONRenderer does.
+    """
+    content = b'' if data is None else json_dumps(data).encode()
+    return HttpResponse(content, status=status, headers=headers, content_type='application/json')
+
+
+def write_timeout_response(timeout):
+    """
+    Return the 503 Service Unavailable response of a write that did not commit in time.
+    """
+    return json_response({"detail": timeout.detail}, status=timeout.status_code,
+                         headers={'Retry-After': str(timeout.retry_after)})
+
+
+class AsyncAPIView(View):
+    """
+    Base class for native async (ASGI) API views.
+
+    DRF's APIView only runs synchronously, so this class provides the parts of it the
+    async endpoints need: JWT authentication, rate limiting, JSON bodies and CSRF exemption.
+    Handlers (`async def get/post/...`) run on the event loop and use the async ORM, so a
+    request does not hold a worker thread while it waits for the database.
+    """
+    authentication_class = CachedJWTAuthentication  # Use JWT authentication for secure token handling
+    throttle_classes = [UserRateThrottle]  # Apply rate limiting to prevent abuse
+    requires_authentication = True  # Reject anonymous requests with 401 Unauthorized
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        # Token authentication does not rely on cookies, so CSRF checks do not apply
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    async def dispatch(self, request, *args, **kwargs):
+        """
+        Authenticate, throttle and parse the request, then call the handler.
+        """
+        try:
+            result = await self.authentication_class().aauthenticate(request)
+        except (InvalidToken, AuthenticationFailed) as exc:
+            return self.unauthorized(exc.detail)
+        if result is not None:
+            request.user, request.auth = result
+        elif self.requires_authentication:
+            return self.unauthorized("Authentication credentials were not provided.")
+        else:
+            # The throttles read `request.user`: replace the lazy session user, whose database
+            # lookup cannot run on the event loop
+            request.user, request.auth = AnonymousUser(), None
+
+        for throttle_class in self.throttle_classes:
+            throttle = throttle_class()
+            # The local counter store never blocks; others may do network I/O
+            if isinstance(get_counter_store(), LocalCounterStore):
+                allowed = throttle.allow_request(request, self)
+            else:
+                allowed = await sync_to_async(throttle.allow_request)(request, self)
+            if not allowed:
+                return json_response({"detail": "Request was throttled."}, status=status.HTTP_429_TOO_MANY_REQUESTS)
+
+        # Parse the JSON body of write requests
+        request.data = {}
+        if request.body:
+            try:
+                request.data = json.loads(request.body)
+            except ValueError:
+                return json_response({"detail": "JSON parse error."}, status=status.HTTP_400_BAD_REQUEST)
+
+        return await super().dispatch(request, *args, **kwargs)
+
+    def unauthorized(self, detail):
+        """
+        Return a 401 Unauthorized response in DRF's format.
+        """
+        if isinstance(detail, dict):
+            data = detail
+        else:
+            data = {"detail": str(detail)}
+        return json_response(data, status=status.HTTP_401_UNAUTHORIZED,
+                             headers={'WWW-Authenticate': 'Bearer realm="api"'})
+
+
+class AsyncTaskCreateView(AsyncAPIView):
+    """
+    Async view for creating a new task.
+    Only authenticated users can access this view.
+    """
+
+    async def post(self, request, *args, **kwargs):
+        """
+        Handle the creation of a task.
+        - Validate the incoming data using the TaskSerializer.
+        - Save the task if the data is valid.
+        - Return the created task data or validation errors.
+        """
+        serializer = TaskSerializer(data=request.data, context={'request': request})
+        if not serializer.is_valid():
+            return json_response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        # Save the task using the serializer's `create` method (group committed if enabled),
+        # which also notifies the user's other clients
+        try:
+            await write_coalescer.arun(serializer.save)
+        except WriteTimeout as timeout:
+            return write_timeout_response(timeout)
+        return json_response(serializer.data, status=status.HTTP_201_CREATED)
+
+
+# Listing view shared with the async endpoint, which has already throttled the request
+user_tasks_view = UserTasksView.as_view(throttle_classes=[])
+
+
+class AsyncUserTasksView(AsyncAPIView):
+    """
+    Async view for retrieving, updating, and deleting tasks for the logged-in user.
+    Only authenticated users can access this view.
+    """
+
+    async def get(self, request):
+        """
+        Retrieve the tasks owned by the logged-in user, with the same code as `UserTasksView.get`:
+        filters, ordering, keyset pagination, `If-None-Match`, `?since=` deltas and counts.
+        That code uses the synchronous ORM and DRF's rendering, so it runs in a worker thread.
+        """
+        return await sync_to_async(user_tasks_view)(request)
+
+    async def update(self, request, pk, partial):
+        """
+        Validate the incoming data and write the changed fields with a conditional update
+        (`If-Match`, see `planner.updates.update_task`).
+        """
+        try:
+            status_code, data, etag = await write_coalescer.arun(
+                update_task, request.user.pk, pk, request.data, partial, if_match=request.headers.get('If-Match'))
+        except WriteTimeout as timeout:
+            return write_timeout_response(timeout)
+        return json_response(data, status=status_code, headers={'ETag': etag} if etag else None)
+
+    async def patch(self, request, pk):
+        """
+        Allow partial updates to a task.
+        """
+        return await self.update(request, pk, partial=True)
+
+    async def put(self, request, pk):
+        """
+        Allow full updates to a task.
+        """
+        return await self.update(request, pk, partial=False)
+
+    async def delete(self, request, pk):
+        """
+        Delete a task, leaving a tombstone for delta sync (see `planner.updates.delete_task`).
+        """
+        try:
+            status_code, data = await write_coalescer.arun(delete_task, request.user.pk, pk)
+        except WriteTimeout as timeout:
+            return write_timeout_response(timeout)
+        return json_response(data, status=status_code)
+
+
+def asgi_required(request):
+    """
+    Return a 501 Not Implemented response if the request is not served by an ASGI server.
+
+    Under WSGI an event stream is consumed synchronously and holds a worker thread for the
+    whole `MAX_DURATION`, so clients must fall back to refetching instead.
+    """
+    if isinstance(request, ASGIRequest):
+        return None
+    return json_response({"error": "Task events are only available when the API is served over ASGI"},
+                         status=status.HTTP_501_NOT_IMPLEMENTED)
+
+
+class AsyncTaskEventsTicketView(AsyncAPIView):
+    """
+    Issues the short-lived tickets that open the task event stream (ASGI only).
+    Only authenticated users can access this view.
+    """
+
+    async def dispatch(self, request, *args, **kwargs):
+        # Answering 501 under WSGI tells clients that push is not available
+        return asgi_required(request) or await super().dispatch(request, *args, **kwargs)
+
+    async def post(self, request):
+        """
+        Return a ticket for `/api/async/tasks/events/?ticket=...` and its lifetime in seconds.
+        """
+        return json_response({"ticket": issue_stream_ticket(request.user.pk),
+                              "expires_in": get_events_settings()['TICKET_TTL']})
+
+
+class AsyncTaskEventsView(AsyncAPIView):
+    """
+    Server-Sent Events stream of the changes to the logged-in user's tasks (ASGI only).
+
+    Every create, update and delete is sent as an event whose id is the user's revision
+    after the change, with the task (or the deleted task's id) as JSON data. A `resync`
+    event asks the client to refetch its list instead. Reconnecting clients resume from
+    the `Last-Event-ID` header (sent automatically by EventSource); `?since=<revision>`,
+    e.g. the `X-Task-Revision` of the list the client loaded, does the same for the first
+    connection. Streams end after `TASK_EVENTS['MAX_DURATION']` seconds and clients
+    reconnect, so workers can be restarted without cutting clients off for good.
+
+    EventSource cannot send an Authorization header: the stream is opened with a ticket from
+    `/api/async/tasks/events/ticket/` in `?ticket=`, never with the access token.
+    """
+    ticket_query_param = 'ticket'
+
+    async def dispatch(self, request, *args, **kwargs):
+        """
+        Check the stream ticket instead of a JWT, then call the handler.
+        """
+        response = asgi_required(request)
+        if response is not None:
+            return response
+        user_id = read_stream_ticket(request.GET.get(self.ticket_query_param, ''))
+        if user_id is None:
+            return self.unauthorized("A valid stream ticket is required.")
+        request.stream_user_id = user_id
+        return await View.dispatch(self, request, *args, **kwargs)
+
+    async def get(self, request):
+        """
+        Stream the user's task events.
+        - Replay the changes made after the client's revision, if it sent one.
+        - Send live changes as they commit, and a comment line as heartbeat when idle.
+        """
+        since = request.headers.get('Last-Event-ID') or request.GET.get('since')
+        try:
+            revision = int(since) if since else None
+        except ValueError:
+            return json_response({"error": "`since` must be an integer revision"}, status=status.HTTP_400_BAD_REQUEST)
+
+        config = get_events_settings()
+        subscription = await get_broker().subscribe(request.stream_user_id, revision)
+        response = StreamingHttpResponse(
+            self.stream(subscription, config['HEARTBEAT'], config['MAX_DURATION']),
+            content_type='text/event-stream',
+        )
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'  # Disable proxy buffering (nginx)
+        return response
+
+    async def stream(self, subscription, heartbeat, max_duration):
+        """
+        Yield the subscription's events in the SSE wire format until `max_duration` elapsed.
+        """
+        deadline = time.monotonic() + max_duration
+        try:
+            yield b'retry: 3000\n\n'  # Reconnection delay of EventSource, in milliseconds
+            while (remaining := deadline - time.monotonic()) > 0:
+                event = await subscription.get(timeout=min(heartbeat, remaining))
+                if event is None:
+                    yield b': keep-alive\n\n'
+                else:
+                    yield self.format_event(event)
+        finally:
+            # Also runs when the client disconnects and the stream is cancelled
+            await subscription.close()
+
+    def format_event(self, event):
+        lines = [f"event: {event['type']}", f"data: {json_dumps(event)}"]
+        if event["revision"] is not None:
+            lines.insert(0, f"id: {event['revision']}")
+        return ('\n'.join(lines) + '\n\n').encode()
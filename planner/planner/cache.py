@@ -0,0 +1,67 @@
+# Import necessary modules
+import threading  # Protects the hit/miss counters
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+class TaskListCache:
+    """
+    Per-user task list responses, keyed by the user's revision.
+
+    Entries live in the Django cache configured by the `TASK_LIST_CACHE` setting, so size
+    bounds, LRU eviction and TTL come from that backend (`MAX_ENTRIES` / `TIMEOUT` for the
+    local memory and file-based caches, the server configuration for shared backends).
+
+    Every write to a user's tasks moves `TaskSyncState.revision`, which the request reads
+    from the database, so an entry can only be hit while the listing it holds is current,
+    in every process: nothing has to be invalidated, and entries of older revisions are
+    never read again and age out of the cache.
+    """
+
+    def __init__(self, alias=None):
+        self.alias = alias
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    @property
+    def cache(self):
+        return caches[self.alias or getattr(settings, 'TASK_LIST_CACHE', 'default')]
+
+    def entry_key(self, user_id, revision, key):
+        return f"tasks:{user_id}:{revision}:{key}"
+
+    def get(self, user_id, revision, key):
+        """
+        Return the cached value for a listing at `revision`, counting the hit or miss.
+        """
+        value = self.cache.get(self.entry_key(user_id, revision, key))
+        with self.lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def set(self, user_id, revision, key, value):
+        """
+        Store a listing built at `revision`.
+        """
+        self.cache.set(self.entry_key(user_id, revision, key), value)
+
+    def stats(self):
+        """
+        Return the hit/miss counters of this process.
+        """
+        with self.lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / total if total else 0.0,
+            }
+
+
+# Shared instance used by the task views and serializer
+task_list_cache = TaskListCache()
@@ -0,0 +1,221 @@
+# Import necessary modules
+import asyncio  # For awaiting writes from async views
+import concurrent.futures
+import contextlib
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from asgiref.sync import sync_to_async  # Runs writes in a thread when coalescing is off
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from rest_framework import status  # Provides HTTP status codes
+
+from .metrics import current_query_counter  # Counts the writer's queries with their request
+
+
+def get_write_coalescing_settings():
+    """
+    Return the `WRITE_COALESCING` setting with its defaults filled in.
+    """
+    config = getattr(settings, 'WRITE_COALESCING', {})
+    return {
+        'ENABLED': config.get('ENABLED', False),
+        'WINDOW': config.get('WINDOW', 0.002),
+        'MAX_BATCH': config.get('MAX_BATCH', 64),
+        'TIMEOUT': config.get('TIMEOUT', 30),
+    }
+
+
+class WriteTimeout(TimeoutError):
+    """
+    A write was not committed within `TIMEOUT` seconds. If the writer had not `started` it,
+    it was cancelled and nothing was written; otherwise it still commits, so the request must
+    not be treated as failed. `status_code`, `detail` and `retry_after` describe the response.
+    """
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    retry_after = 1
+
+    def __init__(self, started):
+        if started:
+            detail = "The write is taking longer than usual but will be applied: fetch the task before retrying."
+        else:
+            detail = "The server is busy and the write was not applied: retry later."
+        super().__init__(detail)
+        self.detail = detail
+        self.started = started
+
+
+class WriteCoalescer:
+    """
+    Group commit of database writes.
+
+    Requests hand their writes (plain functions doing ORM writes) to a single writer thread
+    per process. The writer takes the first queued write, collects those arriving within
+    the next `WINDOW` seconds (at most `MAX_BATCH`), and runs them all in one transaction:
+    SQLite allows a single writer and syncs on every commit, so concurrent requests share
+    one commit instead of queueing on the database lock for their own.
+
+    Each write runs in its own savepoint, so a write that raises only rolls back itself and
+    its exception is re-raised in its request. Results are handed back once the batch has
+    committed, and `transaction.on_commit()` callbacks registered by the writes (cache
+    invalidation, push events) run after that commit. The queries of each write are counted
+    in the request metrics of the request that queued it.
+    """
+
+    def __init__(self, using=DEFAULT_DB_ALIAS, window=None, max_batch=None):
+        self.using = using
+        self.window = window
+        self.max_batch = max_batch
+        self.lock = threading.Lock()  # Protects the writer thread start and the counters
+        self.queue = None
+        self.thread = None
+        self.pid = None
+        self.batches = 0
+        self.writes = 0
+
+    @property
+    def enabled(self):
+        return get_write_coalescing_settings()['ENABLED']
+
+    def submit(self, function, *args, **kwargs):
+        """
+        Queue a write and return the Future of its result.
+        """
+        future = Future()
+        self.get_queue().put((future, function, args, kwargs, current_query_counter.get()))
+        return future
+
+    def run(self, function, *args, **kwargs):
+        """
+        Run a write and return its result: through the writer thread when coalescing is
+        enabled, directly otherwise.
+
+        Raises WriteTimeout after `TIMEOUT` seconds. A write still queued by then is
+        cancelled, so that a client retrying the request cannot get it applied twice; one
+        the writer has already started still commits.
+        """
+        if not self.enabled:
+            return function(*args, **kwargs)
+        future = self.submit(function, *args, **kwargs)
+        try:
+            return future.result(timeout=get_write_coalescing_settings()['TIMEOUT'])
+        except concurrent.futures.TimeoutError:
+            # `cancel()` fails once the writer has started the write
+            raise WriteTimeout(started=not future.cancel()) from None
+
+    async def arun(self, function, *args, **kwargs):
+        """
+        Async version of `run()`, for the async views.
+        """
+        if not self.enabled:
+            return await sync_to_async(function)(*args, **kwargs)
+        future = self.submit(function, *args, **kwargs)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), get_write_coalescing_settings()['TIMEOUT'])
+        except asyncio.TimeoutError:
+            raise WriteTimeout(started=not future.cancel()) from None
+
+    def get_queue(self):
+        """
+        Return the queue of the writer thread, starting the thread on first use (and again
+        in a forked worker process, which does not inherit threads).
+        """
+        with self.lock:
+            if self.pid != os.getpid():
+                self.queue = queue.SimpleQueue()
+                self.pid = os.getpid()
+                self.thread = threading.Thread(target=self.writer, args=(self.queue,), name='write-coalescer',
+                                               daemon=True)
+                self.thread.start()
+            return self.queue
+
+    def close(self):
+        """
+        Stop the writer thread once the writes queued so far are committed, and close its
+        database connection. A later write starts a new writer thread.
+        """
+        with self.lock:
+            thread = self.thread if self.pid == os.getpid() else None
+            if thread is not None:
+                self.queue.put(None)
+            self.queue = self.thread = self.pid = None
+        if thread is not None:
+            thread.join()
+
+    def writer(self, jobs):
+        config = get_write_coalescing_settings()
+        window = config['WINDOW'] if self.window is None else self.window
+        max_batch = config['MAX_BATCH'] if self.max_batch is None else self.max_batch
+        closing = False
+        while not closing:
+            job = jobs.get()
+            if job is None:
+                break
+            batch = [job]
+            deadline = time.monotonic() + window
+            while len(batch) < max_batch:
+                try:
+                    job = jobs.get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    break
+                if job is None:
+                    closing = True
+                    break
+                batch.append(job)
+            self.commit(batch)
+        connections[self.using].close()
+
+    def commit(self, batch):
+        """
+        Run a batch of writes in one transaction, then complete their futures.
+        """
+        outcomes = []
+        try:
+            with transaction.atomic(using=self.using):
+                for future, function, args, kwargs, counter in batch:
+                    if not future.set_running_or_notify_cancel():
+                        outcomes.append(None)
+                        continue
+                    try:
+                        with self.counting(counter), transaction.atomic(using=self.using):
+                            outcomes.append((function(*args, **kwargs), None))
+                    except Exception as exc:
+                        outcomes.append((None, exc))
+        except Exception as exc:
+            # The commit itself failed: none of the writes happened
+            connections[self.using].close()
+            outcomes = [None if future.cancelled() else (None, exc) for future, *_ in batch]
+
+        with self.lock:
+            self.batches += 1
+            self.writes += len(batch)
+        for (future, *_), outcome in zip(batch, outcomes):
+            if outcome is None:
+                continue  # Cancelled before it ran
+            result, exc = outcome
+            if exc is None:
+                future.set_result(result)
+            else:
+                future.set_exception(exc)
+
+    def counting(self, counter):
+        """
+        Count the queries of a write with its request's query counter, if it has one.
+        """
+        if counter is None:
+            return contextlib.nullcontext()
+        return connections[self.using].execute_wrapper(counter)
+
+    def stats(self):
+        """
+        Return the batch and write counters of this process.
+        """
+        with self.lock:
+            return {"batches": self.batches, "writes": self.writes}
+
+
+# Shared instance used by the task views
+write_coalescer = WriteCoalescer()
@@ -0,0 +1,278 @@
+# Import necessary modules
+import asyncio  # Subscriber queues live on the event loop of the streaming request
+import threading  # Protects the subscriber registry
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core import signing  # Stream tickets
+from django.db import transaction
+from django.utils.module_loading import import_string
+from viewer.models import Task, TaskSyncState, DeletedTask
+
+# Event types
+CREATED = 'created'
+UPDATED = 'updated'
+DELETED = 'deleted'
+RESYNC = 'resync'  # The client missed events and should refetch its list
+
+# Signing salt of stream tickets, so no other signed value can open a stream
+STREAM_TICKET_SALT = 'planner.events.stream-ticket'
+
+
+def task_event(event_type, revision, data=None, task_id=None):
+    """
+    Build a task event: the serialized task for creations and updates, its id for deletions.
+    `revision` is the owner's revision of the change, so clients can resume from it.
+    """
+    event = {"type": event_type, "revision": revision}
+    if data is not None:
+        event["task"] = data
+    if task_id is not None:
+        event["id"] = task_id
+    return event
+
+
+def resync_event():
+    return {"type": RESYNC, "revision": None}
+
+
+def get_events_settings():
+    """
+    Return the `TASK_EVENTS` setting with its defaults filled in.
+    """
+    config = getattr(settings, 'TASK_EVENTS', {})
+    return {
+        'BACKEND': config.get('BACKEND', 'planner.events.InProcessBroker'),
+        'OPTIONS': config.get('OPTIONS', {}),
+        'HEARTBEAT': config.get('HEARTBEAT', 15),
+        'MAX_DURATION': config.get('MAX_DURATION', 3600),
+        'TICKET_TTL': config.get('TICKET_TTL', 30),
+    }
+
+
+def issue_stream_ticket(user_id):
+    """
+    Return a ticket opening the user's event stream within `TICKET_TTL` seconds.
+
+    EventSource cannot send an Authorization header, so the stream is opened with a ticket
+    in the query string instead of the access token: URLs end up in access logs, and a
+    ticket only opens a stream, for a few seconds.
+    """
+    return signing.dumps({"user": user_id}, salt=STREAM_TICKET_SALT)
+
+
+def read_stream_ticket(ticket):
+    """
+    Return the user id of a valid, unexpired stream ticket, else None.
+    """
+    try:
+        return signing.loads(ticket, salt=STREAM_TICKET_SALT, max_age=get_events_settings()['TICKET_TTL'])['user']
+    except (signing.BadSignature, KeyError, TypeError):
+        return None
+
+
+class Subscription:
+    """
+    Stream of the events published for one user, consumed on the event loop of a request.
+    Events at or below the revision the client already has are skipped.
+    """
+
+    def __init__(self, broker, user_id, queue_size, revision):
+        self.broker = broker
+        self.user_id = user_id
+        self.revision = revision
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.early = []  # Live events received while the missed ones were being read
+
+    async def catch_up(self):
+        """
+        Queue the events the client missed since its revision, then the live events that
+        arrived meanwhile, in revision order.
+        """
+        missed = await sync_to_async(read_events_since)(self.user_id, self.revision)
+        early, self.early = self.early, None
+        for event in missed + early:
+            self.deliver(event)
+
+    def deliver(self, event):
+        # Runs on the subscriber's event loop
+        if self.early is not None:
+            self.early.append(event)
+            return
+        if event["revision"] is not None:
+            if self.revision is not None and event["revision"] <= self.revision:
+                return
+            self.revision = event["revision"]
+        if self.queue.full():
+            # The client does not keep up: drop the backlog and ask it to refetch
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            event = resync_event()
+        self.queue.put_nowait(event)
+
+    async def get(self, timeout):
+        """
+        Return the next event, or None if none arrived within `timeout` seconds.
+        """
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    async def close(self):
+        self.broker.unsubscribe(self)
+
+
+class InProcessBroker:
+    """
+    Fans events out to the subscribers of the current process.
+
+    Publishing is thread-safe: events written by synchronous views are handed to each
+    subscriber's event loop. Subscribers that fall more than `queue_size` events behind get
+    a `resync` event instead of the backlog. Only reaches clients connected to the same
+    process; use DatabaseBroker when running several workers.
+    """
+
+    def __init__(self, queue_size=1000):
+        self.queue_size = queue_size
+        self.subscribers = {}  # user id -> set of subscriptions
+        self.lock = threading.Lock()
+
+    def publish(self, user_id, event):
+        with self.lock:
+            subscriptions = list(self.subscribers.get(user_id, ()))
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.deliver, event)
+            except RuntimeError:
+                # The subscriber's event loop is closed
+                self.unsubscribe(subscription)
+
+    async def subscribe(self, user_id, revision=None):
+        """
+        Start receiving the user's events. With the `revision` the client is at, the changes
+        it missed since are replayed first; without, only new changes are sent.
+        """
+        subscription = Subscription(self, user_id, self.queue_size, revision)
+        if revision is None:
+            subscription.early = None
+        with self.lock:
+            self.subscribers.setdefault(user_id, set()).add(subscription)
+        if revision is not None:
+            # Subscribed first, so nothing committed from now on can be missed
+            await subscription.catch_up()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            subscriptions = self.subscribers.get(subscription.user_id)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self.subscribers[subscription.user_id]
+
+
+class PollingSubscription:
+    """
+    Subscription of the DatabaseBroker: polls the user's revision and reads the changes.
+    """
+
+    def __init__(self, user_id, revision, interval):
+        self.user_id = user_id
+        self.revision = revision
+        self.interval = interval
+        self.pending = []
+
+    def read_changes(self):
+        # Tasks changed and deleted since the last revision seen, in revision order
+        current = TaskSyncState.current_revision(self.user_id)
+        if current <= self.revision:
+            return []
+        events = read_events_since(self.user_id, self.revision)
+        # Writes committed after `current` was read are returned too: continue after them.
+        # After a `resync` event the client refetches everything, so continue from `current`
+        last = events[-1]["revision"] if events else None
+        self.revision = current if last is None else last
+        return events
+
+    async def get(self, timeout):
+        deadline = time.monotonic() + timeout
+        while not self.pending:
+            self.pending = await sync_to_async(self.read_changes)()
+            if self.pending:
+                break
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            await asyncio.sleep(min(self.interval, remaining))
+        return self.pending.pop(0)
+
+    async def close(self):
+        pass
+
+
+class DatabaseBroker:
+    """
+    Derives events from the database instead of passing them between processes.
+
+    Every write already bumps the owner's revision (and deletions leave tombstones), so each
+    subscriber polls its user's revision with a primary key lookup every `interval`
+    seconds and reads the changes when it moved. Works with any number of worker
+    processes and needs no extra service; creations are reported as `updated` events.
+    """
+
+    def __init__(self, interval=1.0):
+        self.interval = interval
+
+    def publish(self, user_id, event):
+        # The write itself is the event
+        pass
+
+    async def subscribe(self, user_id, revision=None):
+        if revision is None:
+            revision = await sync_to_async(TaskSyncState.current_revision)(user_id)
+        return PollingSubscription(user_id, revision, self.interval)
+
+
+def read_events_since(user_id, revision):
+    """
+    Return events for the user's tasks changed and deleted after `revision`, in revision order,
+    or a `resync` event if the tombstones since `revision` were purged.
+    """
+    if not TaskSyncState.can_sync_from(user_id, revision):
+        return [resync_event()]
+    # Imported here: the listing module imports the serializers, which publish events
+    from .listing import TASK_FIELDS, serialize_tasks
+
+    changed = Task.objects.filter(owner_id=user_id, revision__gt=revision).values(*TASK_FIELDS, 'revision')
+    events = [task_event(UPDATED, row.pop('revision'), data=row) for row in serialize_tasks(changed)]
+    deleted = DeletedTask.objects.filter(owner_id=user_id, revision__gt=revision)
+    events += [task_event(DELETED, deleted_revision, task_id=task_id)
+               for task_id, deleted_revision in deleted.values_list('task_id', 'revision')]
+    return sorted(events, key=lambda event: event["revision"])
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    """
+    Return the broker configured by the `TASK_EVENTS` setting.
+    """
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                config = get_events_settings()
+                _broker = import_string(config['BACKEND'])(**config['OPTIONS'])
+    return _broker
+
+
+def publish_on_commit(user_id, event):
+    """
+    Publish an event to the user's subscribers once the current transaction commits.
+    """
+    transaction.on_commit(lambda: get_broker().publish(user_id, event))
@@ -0,0 +1,85 @@
+# Import necessary modules
+from django.db.models import Count  # For the per-status aggregate
+from django.utils.dateparse import parse_date  # For parsing the date range bounds
+from rest_framework.exceptions import ValidationError  # Returned to the client as 400 Bad Request
+from rest_framework.filters import BaseFilterBackend
+from viewer.models import Task  # Import the Task model
+
+
+class TaskFilterBackend(BaseFilterBackend):
+    """
+    Server-side filtering of the task list.
+
+    Supported query parameters:
+    - `status`: one or more statuses, repeated (`?status=a&status=b`) or comma separated.
+    - `date_from` / `date_to`: inclusive bounds on `creation_date` (YYYY-MM-DD).
+    """
+    status_query_param = 'status'
+    date_from_query_param = 'date_from'
+    date_to_query_param = 'date_to'
+
+    def get_statuses(self, request):
+        """
+        Return the list of requested statuses, or an empty list if none were given.
+        """
+        statuses = []
+        for value in request.query_params.getlist(self.status_query_param):
+            statuses.extend(item.strip() for item in value.split(',') if item.strip())
+
+        # Reject statuses that are not valid task choices
+        invalid = [item for item in statuses if item not in Task.STATUS_CHOICES]
+        if invalid:
+            raise ValidationError({self.status_query_param: [f"Unknown status: {item}" for item in invalid]})
+        return statuses
+
+    def get_date(self, request, param):
+        """
+        Parse a date bound from the query string.
+        """
+        value = request.query_params.get(param)
+        if not value:
+            return None
+        try:
+            date = parse_date(value)
+        except ValueError:
+            date = None
+        if date is None:
+            raise ValidationError({param: ["Date has wrong format. Use YYYY-MM-DD."]})
+        return date
+
+    def filter_by_date(self, request, queryset):
+        """
+        Restrict the queryset to the requested creation date range.
+        """
+        date_from = self.get_date(request, self.date_from_query_param)
+        date_to = self.get_date(request, self.date_to_query_param)
+        if date_from:
+            queryset = queryset.filter(creation_date__gte=date_from)
+        if date_to:
+            queryset = queryset.filter(creation_date__lte=date_to)
+        return queryset
+
+    def filter_queryset(self, request, queryset, view):
+        """
+        Apply the date range and status filters to the queryset.
+        """
+        queryset = self.filter_by_date(request, queryset)
+        statuses = self.get_statuses(request)
+        if statuses:
+            queryset = queryset.filter(status__in=statuses)
+        return queryset
+
+    def get_status_counts(self, request, queryset):
+        """
+        Count tasks per status in a single `GROUP BY` query.
+
+        The counts honour the date range but not the status filter, so a client can
+        show how many tasks each status option would return. The query is answered
+        from the `(owner, status, id)` index.
+        """
+        queryset = self.filter_by_date(request, queryset)
+        counts = {value: 0 for value in Task.STATUS_CHOICES if value}
+        rows = queryset.order_by().values_list('status').annotate(total=Count('id'))
+        for value, total in rows:
+            counts[value] = total
+        return counts
@@ -0,0 +1,146 @@
+# Import necessary modules
+import hashlib  # For request fingerprints
+import json  # For a canonical encoding of request bodies
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status  # Provides HTTP status codes
+from viewer.models import IdempotencyKey  # Claimed keys and stored responses
+
+# Request header carrying the client's key, and response header marking a replayed response
+IDEMPOTENCY_KEY_HEADER = 'Idempotency-Key'
+REPLAYED_HEADER = 'Idempotent-Replayed'
+MAX_KEY_LENGTH = 255
+
+
+def get_idempotency_settings():
+    """
+    Return the `IDEMPOTENCY` setting with its defaults filled in.
+    """
+    config = getattr(settings, 'IDEMPOTENCY', {})
+    return {
+        'TIMEOUT': config.get('TIMEOUT', 86400),
+        'LOCK_TIMEOUT': config.get('LOCK_TIMEOUT', 120),
+    }
+
+
+def request_fingerprint(request):
+    """
+    Identify a request by its method, path and (canonically encoded) body.
+    """
+    body = json.dumps(request.data, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(f"{request.method}:{request.path}:{body}".encode('utf-8')).hexdigest()
+
+
+class IdempotencyConflict(Exception):
+    """
+    The key cannot be used for this request; `status_code` and `detail` describe the response.
+    """
+
+    def __init__(self, status_code, detail, retry_after=None):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = retry_after
+
+
+class IdempotencyStore:
+    """
+    Responses of requests sent with an `Idempotency-Key` header, per user.
+
+    Keys are rows of the `IdempotencyKey` table, so a retry is recognised by every process
+    serving the API. Completed responses are kept for `TIMEOUT` seconds; the
+    `purge_idempotency_keys` command deletes them afterwards.
+
+    A request claims its key by inserting a pending row, which the unique `(owner, key)`
+    constraint lets only one request do; the claim expires after `LOCK_TIMEOUT` seconds,
+    in case the process dies. The request stores its response in the row in the transaction
+    of its write, so the key is completed exactly when the write commits. A duplicate
+    arriving meanwhile gets 409 Conflict and retries later.
+    """
+
+    @property
+    def config(self):
+        return get_idempotency_settings()
+
+    def begin(self, user_id, key, fingerprint):
+        """
+        Claim `key` for a request. Returns `(claim, None)` if the request should run, where
+        `claim` is passed to `complete()` or `release()`, or `(None, (status, data))` with the
+        stored response of the original request if this is a retry.
+
+        Raises IdempotencyConflict if the key was used for a different request, or if the
+        original request is still running.
+        """
+        config = self.config
+        while True:
+            now = timezone.now()
+            try:
+                with transaction.atomic():
+                    entry = IdempotencyKey.objects.create(
+                        owner_id=user_id, key=key, fingerprint=fingerprint,
+                        expires_at=now + timedelta(seconds=config['LOCK_TIMEOUT']),
+                    )
+                return entry.pk, None
+            except IntegrityError:
+                pass  # Claimed by an earlier request
+
+            entry = (IdempotencyKey.objects.filter(owner_id=user_id, key=key)
+                     .values('fingerprint', 'status', 'response', 'expires_at').first())
+            if entry is None:
+                continue  # Released in the meantime: claim it again
+            if entry['expires_at'] <= now:
+                # An expired response, or the claim of a request that never finished: take
+                # the key over, unless another request just did
+                IdempotencyKey.objects.filter(owner_id=user_id, key=key, expires_at=entry['expires_at']).delete()
+                continue
+            if entry['fingerprint'] != fingerprint:
+                raise IdempotencyConflict(
+                    status.HTTP_422_UNPROCESSABLE_ENTITY,
+                    f"This {IDEMPOTENCY_KEY_HEADER} was already used for a different request.",
+                )
+            if entry['status'] is not None:
+                return None, (entry['status'], entry['response'])
+            raise IdempotencyConflict(
+                status.HTTP_409_CONFLICT,
+                f"A request with this {IDEMPOTENCY_KEY_HEADER} is still in progress.",
+                retry_after=1,
+            )
+
+    def complete(self, claim, status_code, data):
+        """
+        Store the response of the request holding `claim`, for its retries.
+
+        Call it in the transaction of the request's write: if the claim expired and another
+        request took the key over, it raises IdempotencyConflict, which rolls the write back.
+        """
+        completed = IdempotencyKey.objects.filter(pk=claim, status__isnull=True).update(
+            status=status_code, response=data,
+            expires_at=timezone.now() + timedelta(seconds=self.config['TIMEOUT']),
+        )
+        if not completed:
+            raise IdempotencyConflict(
+                status.HTTP_409_CONFLICT,
+                f"The request took too long and its {IDEMPOTENCY_KEY_HEADER} was taken over.",
+                retry_after=1,
+            )
+
+    def release(self, claim):
+        """
+        Give up `claim` after a request that changed nothing, so that the key can be retried.
+        A completed claim is never released.
+        """
+        IdempotencyKey.objects.filter(pk=claim, status__isnull=True).delete()
+
+    def purge(self):
+        """
+        Delete the expired keys and return how many were deleted.
+        """
+        deleted, _ = IdempotencyKey.objects.filter(expires_at__lte=timezone.now()).delete()
+        return deleted
+
+
+# Shared instance used by the task creation view
+idempotency_store = IdempotencyStore()
@@ -0,0 +1,64 @@
+# Import necessary modules
+import json  # The C-accelerated encoder used by DRF's JSONRenderer
+
+from rest_framework.settings import api_settings  # JSON rendering options shared with JSONRenderer
+from .serializers import TaskSerializer
+
+# Fields of a listed task, in the order produced by the TaskSerializer
+TASK_FIELDS = tuple(TaskSerializer.Meta.fields)
+
+
+def task_values(queryset):
+    """
+    Return the queryset as plain dicts of `TASK_FIELDS`, skipping model instantiation.
+    """
+    return queryset.values(*TASK_FIELDS)
+
+
+def serialize_tasks_iter(rows):
+    """
+    Lazily convert `task_values()` rows into the data the TaskSerializer would produce.
+
+    All listed fields are already JSON-native except `creation_date`, which the
+    serializer's DateField renders in ISO 8601, so no per-field serializer calls are needed.
+    """
+    for task in rows:
+        date = task['creation_date']
+        if date is not None:
+            task['creation_date'] = date.isoformat()
+        yield task
+
+
+def serialize_tasks(rows):
+    """
+    Convert `task_values()` rows into the data `TaskSerializer(many=True)` would produce.
+    """
+    return list(serialize_tasks_iter(rows))
+
+
+def json_dumps(data):
+    """
+    Encode data with the same options as DRF's JSONRenderer (non-indented).
+    """
+    content = json.dumps(
+        data,
+        ensure_ascii=not api_settings.UNICODE_JSON,
+        allow_nan=not api_settings.STRICT_JSON,
+        separators=(',', ':') if api_settings.COMPACT_JSON else (', ', ': '),
+    )
+    # Escape the line separators the same way JSONRenderer does
+    return content.replace('\u2028', '\\u2028').replace('\u2029', '\\u2029')
+
+
+def iter_ndjson(rows, lines_per_chunk=500):
+    """
+    Yield `task_values()` rows as newline-delimited JSON, a few hundred lines per chunk.
+    """
+    lines = []
+    for task in serialize_tasks_iter(rows):
+        lines.append(json_dumps(task))
+        if len(lines) >= lines_per_chunk:
+            yield ('\n'.join(lines) + '\n').encode()
+            lines = []
+    if lines:
+        yield ('\n'.join(lines) + '\n').encode()
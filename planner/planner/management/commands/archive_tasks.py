@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from planner.archive import archive_completed_tasks
+
+
+class Command(BaseCommand):
+    """
+    Move old completed tasks to the archive table in batches.
+    Intended to be run periodically, e.g. from cron or a systemd timer.
+    Defaults come from the `TASK_ARCHIVE` setting.
+    """
+    help = "Archive tasks completed more than a given number of days ago, in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--age-days', type=int, help="Archive tasks completed more than this many days ago.")
+        parser.add_argument('--batch-size', type=int, help="Tasks moved per transaction.")
+        parser.add_argument('--pause', type=float, help="Seconds to wait between batches.")
+        parser.add_argument('--max-batches', type=int, help="Stop after this many batches.")
+
+    def handle(self, *args, **options):
+        if options['batch_size'] is not None and options['batch_size'] < 1:
+            raise CommandError("--batch-size must be at least 1")
+        archived = archive_completed_tasks(
+            age_days=options['age_days'],
+            batch_size=options['batch_size'],
+            pause=options['pause'],
+            max_batches=options['max_batches'],
+        )
+        self.stdout.write(f"Archived {archived} task(s).")
@@ -0,0 +1,231 @@
+# Import necessary modules
+import datetime
+import io
+import json
+import platform
+import statistics
+import subprocess
+import time
+
+import django
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.management import call_command
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import setup_test_environment, teardown_test_environment
+from rest_framework_simplejwt.tokens import RefreshToken
+from viewer.models import Task
+from planner.cache import task_list_cache
+from planner.metrics import QueryCounter
+
+PASSWORD = 'benchmark-password'
+USER_PREFIX = 'benchmark-user-'
+
+
+class Command(BaseCommand):
+    """
+    Benchmark the API endpoints at several dataset sizes.
+
+    Runs against a throwaway test database. For each size, seeds `--users` users with that
+    many tasks each (see `seed_tasks`) and sends requests through the Django test client
+    with JWT authentication, so the timings cover the whole middleware, authentication,
+    view and database stack but no network. For every endpoint it reports the p50/p95/p99
+    latency, throughput and SQL queries per request. `--output` writes the results as JSON,
+    to compare runs between commits.
+
+    - `list` lists the user's tasks with the task list cache cleared first, `list_cached`
+      without clearing it.
+    - `delete` deletes the tasks made by `create`, so the dataset size stays the same.
+    - `token` and `login` hash a password per request and run `--auth-requests` times.
+    - Throttling is disabled, since every request comes from a few users on one address.
+    """
+    help = "Benchmark the task, auth and dashboard API endpoints at several dataset sizes."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='100,1000,10000',
+                            help="Comma separated numbers of tasks per user (default: 100,1000,10000).")
+        parser.add_argument('--users', type=int, default=2, help="Users seeded per size (default: 2).")
+        parser.add_argument('--requests', type=int, default=50,
+                            help="Requests per endpoint and size (default: 50).")
+        parser.add_argument('--auth-requests', type=int, default=5,
+                            help="Requests to the password checking endpoints (default: 5).")
+        parser.add_argument('--output', help="Write the results to this JSON file.")
+
+    def handle(self, *args, **options):
+        try:
+            sizes = sorted(int(size) for size in options['sizes'].split(','))
+        except ValueError:
+            raise CommandError("--sizes must be a comma separated list of integers")
+        if options['users'] < 1 or options['requests'] < 1 or options['auth_requests'] < 1:
+            raise CommandError("--users, --requests and --auth-requests must be at least 1")
+
+        # Never touch the configured database: work in a test database
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        # Measure the endpoints, not the rate limits
+        unthrottled = override_settings(REST_FRAMEWORK={
+            **settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': {'user': None, 'anon': None},
+        })
+        try:
+            with unthrottled:
+                results = self.run(sizes, options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        if options['output']:
+            report = {"meta": self.get_meta(options), "results": results}
+            with open(options['output'], 'w') as output:
+                json.dump(report, output, indent=2)
+                output.write('\n')
+            self.stdout.write(f"Results written to {options['output']}")
+
+    def get_meta(self, options):
+        """
+        Describe the environment the benchmark ran in.
+        """
+        try:
+            commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                                    check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            commit = None
+        return {
+            "commit": commit,
+            "date": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "database": connection.vendor,
+            "users": options['users'],
+            "requests": options['requests'],
+            "auth_requests": options['auth_requests'],
+        }
+
+    def run(self, sizes, options):
+        self.stdout.write(f"{'tasks':>7} {'endpoint':>12} {'p50 (ms)':>9} {'p95 (ms)':>9} {'p99 (ms)':>9} "
+                          f"{'req/s':>8} {'queries':>8} {'errors':>7}")
+        results = []
+        for size in sizes:
+            # Start every size from an empty dataset
+            Task.objects.all().delete()
+            User.objects.filter(username__startswith=USER_PREFIX).delete()
+            for cache in caches.all():
+                cache.clear()
+            call_command('seed_tasks', users=options['users'], tasks=size, prefix=USER_PREFIX,
+                         password=PASSWORD, stdout=io.StringIO())
+
+            users = list(User.objects.filter(username__startswith=USER_PREFIX).order_by('pk'))
+            clients = [
+                Client(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(user).access_token}") for user in users
+            ]
+            for endpoint, requests in self.get_scenarios(users, clients, options):
+                result = self.measure(requests)
+                result.update({"tasks_per_user": size, "endpoint": endpoint})
+                results.append(result)
+                self.stdout.write(
+                    f"{size:>7} {endpoint:>12} {result['p50_ms']:>9.2f} {result['p95_ms']:>9.2f} "
+                    f"{result['p99_ms']:>9.2f} {result['throughput']:>8.1f} {result['queries_per_request']:>8.1f} "
+                    f"{result['errors']:>7}"
+                )
+        return results
+
+    def get_scenarios(self, users, clients, options):
+        """
+        Yield `(endpoint, requests)` pairs. Each request is a `(prepare, send, expected_status)`
+        triple: `prepare` runs untimed before `send`, which returns the response.
+        """
+        count = options['requests']
+
+        def pick(number):
+            # Spread the requests over the seeded users
+            return users[number % len(users)], clients[number % len(clients)]
+
+        task_ids = {user.pk: list(Task.objects.filter(owner=user).values_list('id', flat=True)[:count])
+                    for user in users}
+        data = {'title': 'Benchmark task', 'description': 'Created by the benchmark', 'status': Task.INQU}
+
+        def list_request(number, cached):
+            user, client = pick(number)
+            prepare = (lambda: None) if cached else task_list_cache.cache.clear
+            return prepare, lambda: client.get('/api/tasks/'), 200
+
+        yield 'list', [list_request(number, cached=False) for number in range(count)]
+        yield 'list_cached', [list_request(number, cached=True) for number in range(count)]
+
+        created = []  # (client, task id) pairs, deleted by the `delete` scenario
+
+        def create(number):
+            user, client = pick(number)
+
+            def send():
+                response = client.post('/api/tasks/create/', data, content_type='application/json')
+                if response.status_code == 201:
+                    created.append((client, response.json()['id']))
+                return response
+            return None, send, 201
+
+        def update(number, method, payload):
+            user, client = pick(number)
+            ids = task_ids[user.pk]
+            url = f'/api/tasks/{ids[number % len(ids)]}/' if ids else '/api/tasks/0/'
+            return None, lambda: getattr(client, method)(url, payload, content_type='application/json'), 200
+
+        def delete(number):
+            def send():
+                client, task_id = created[number]
+                return client.delete(f'/api/tasks/delete/{task_id}/')
+            return None, send, 204
+
+        yield 'create', [create(number) for number in range(count)]
+        yield 'put', [update(number, 'put', data) for number in range(count)]
+        yield 'patch', [update(number, 'patch', {'status': Task.CMPL}) for number in range(count)]
+        yield 'delete', [delete(number) for number in range(count)]
+
+        def authenticate(number, url):
+            user, client = pick(number)
+            credentials = {'username': user.username, 'password': PASSWORD}
+            return None, lambda: Client().post(url, credentials, content_type='application/json'), 200
+
+        yield 'token', [authenticate(number, '/api/token/') for number in range(options['auth_requests'])]
+        yield 'login', [authenticate(number, '/api/login/') for number in range(options['auth_requests'])]
+
+        def dashboard(number):
+            user, client = pick(number)
+            return None, lambda: client.get('/api/dashboard/'), 200
+
+        yield 'dashboard', [dashboard(number) for number in range(count)]
+
+    def measure(self, requests):
+        """
+        Send the requests one after another and summarise their latencies and query counts.
+        """
+        latencies, queries, errors = [], [], 0
+        for prepare, send, expected_status in requests:
+            if prepare is not None:
+                prepare()
+            counter = QueryCounter()
+            with connection.execute_wrapper(counter):
+                start = time.perf_counter()
+                response = send()
+                latencies.append(time.perf_counter() - start)
+            queries.append(counter.count)
+            if response.status_code != expected_status:
+                errors += 1
+
+        latencies.sort()
+
+        def percentile(fraction):
+            return round(latencies[min(len(latencies) - 1, int(len(latencies) * fraction))] * 1000, 3)
+
+        return {
+            "requests": len(latencies),
+            "p50_ms": percentile(0.50),
+            "p95_ms": percentile(0.95),
+            "p99_ms": percentile(0.99),
+            # Requests per second of timed time, excluding the untimed preparation steps
+            "throughput": round(len(latencies) / sum(latencies), 1) if sum(latencies) else 0.0,
+            "queries_per_request": round(statistics.mean(queries), 2),
+            "errors": errors,
+        }
@@ -0,0 +1,183 @@
+# Import necessary modules
+import os
+import random
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections, transaction
+from planner.coalescing import WriteCoalescer, get_write_coalescing_settings
+
+BENCHMARK_ALIAS = 'benchmark'
+
+# Stand-in for the task table, with the index the listing uses
+SCHEMA = [
+    """
+    CREATE TABLE task (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        owner_id INTEGER NOT NULL,
+        title VARCHAR(255) NOT NULL,
+        description TEXT NOT NULL,
+        status VARCHAR(10) NOT NULL,
+        revision BIGINT NOT NULL
+    )
+    """,
+    "CREATE INDEX task_owner_idx ON task (owner_id, id)",
+    "CREATE TABLE sync_state (owner_id INTEGER PRIMARY KEY, revision BIGINT NOT NULL)",
+]
+
+
+class Command(BaseCommand):
+    """
+    Benchmark concurrent reads and writes with the default and production SQLite profiles.
+
+    Each profile gets a fresh database file in a temporary directory, seeded with the same
+    tasks. Reader threads list one owner's latest tasks while writer threads create tasks the
+    way `Task.save()` does (bump the owner's revision, then insert) in one transaction.
+    Every operation is wrapped like a request: connections are opened and closed according to
+    the profile's CONN_MAX_AGE, and the profile's pragmas and transaction mode apply.
+
+    With `--coalesce`, every profile runs a second time with the writes group committed by a
+    `planner.coalescing.WriteCoalescer` (WINDOW and MAX_BATCH from `WRITE_COALESCING`).
+    """
+    help = "Benchmark concurrent SQLite read/write throughput with the default and production profiles."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=8, help="Reader threads (default: 8).")
+        parser.add_argument('--writers', type=int, default=2, help="Writer threads (default: 2).")
+        parser.add_argument('--duration', type=float, default=5.0,
+                            help="Seconds to run each profile for (default: 5).")
+        parser.add_argument('--rows', type=int, default=20000, help="Tasks seeded per profile (default: 20000).")
+        parser.add_argument('--owners', type=int, default=100, help="Owners the tasks belong to (default: 100).")
+        parser.add_argument('--coalesce', action='store_true',
+                            help="Also run each profile with the writes group committed.")
+
+    def handle(self, *args, **options):
+        if options['readers'] < 0 or options['writers'] < 0 or options['readers'] + options['writers'] == 0:
+            raise CommandError("At least one reader or writer thread is required")
+
+        profiles = {
+            'default': {},
+            'production': settings.SQLITE_PRODUCTION_PROFILE,
+        }
+        runs = [(name, profile, False) for name, profile in profiles.items()]
+        if options['coalesce']:
+            runs += [(f"{name}+gc", profile, True) for name, profile in profiles.items()]
+        self.stdout.write(f"{'profile':>13} {'reads/s':>10} {'writes/s':>10} {'read p99 (ms)':>14} "
+                          f"{'write p99 (ms)':>15} {'errors':>7}")
+        with tempfile.TemporaryDirectory() as directory:
+            for name, profile, coalesce in runs:
+                path = os.path.join(directory, f"{name}.sqlite3")
+                result = self.run(path, profile, options, coalesce)
+                self.stdout.write(
+                    f"{name:>13} {result['reads'] / result['elapsed']:>10.0f} "
+                    f"{result['writes'] / result['elapsed']:>10.0f} {result['read_p99'] * 1000:>14.1f} "
+                    f"{result['write_p99'] * 1000:>15.1f} {result['errors']:>7}"
+                )
+
+    def run(self, path, profile, options, coalesce=False):
+        """
+        Seed a database with the profile's settings and run the readers and writers against it.
+        """
+        config = {'ENGINE': 'django.db.backends.sqlite3', 'NAME': path, **profile}
+        connections.settings[BENCHMARK_ALIAS] = connections.configure_settings({DEFAULT_DB_ALIAS: config})[DEFAULT_DB_ALIAS]
+        try:
+            self.seed(options['rows'], options['owners'])
+
+            coalescer = WriteCoalescer(using=BENCHMARK_ALIAS) if coalesce else None
+            write = self.write
+            if coalescer is not None:
+                def write(owner_id):
+                    coalescer.submit(self.write, owner_id).result(get_write_coalescing_settings()['TIMEOUT'])
+
+            stop = threading.Event()
+            results = []
+            threads = [threading.Thread(target=self.worker, args=('read', self.read, options, stop, results))
+                       for _ in range(options['readers'])]
+            threads += [threading.Thread(target=self.worker, args=('write', write, options, stop, results))
+                        for _ in range(options['writers'])]
+            start = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            time.sleep(options['duration'])
+            stop.set()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - start
+            if coalescer is not None:
+                coalescer.close()
+        finally:
+            connections[BENCHMARK_ALIAS].close()
+            # Drop the connection object too, so the next profile starts from its own settings
+            del connections[BENCHMARK_ALIAS]
+            del connections.settings[BENCHMARK_ALIAS]
+
+        reads = sorted(latency for kind, latency, ok in results if kind == 'read' and ok)
+        writes = sorted(latency for kind, latency, ok in results if kind == 'write' and ok)
+        return {
+            'elapsed': elapsed,
+            'reads': len(reads),
+            'writes': len(writes),
+            'read_p99': reads[int(len(reads) * 0.99)] if reads else 0.0,
+            'write_p99': writes[int(len(writes) * 0.99)] if writes else 0.0,
+            'errors': sum(1 for kind, latency, ok in results if not ok),
+        }
+
+    def seed(self, rows, owners):
+        with connections[BENCHMARK_ALIAS].cursor() as cursor:
+            for statement in SCHEMA:
+                cursor.execute(statement)
+            with transaction.atomic(using=BENCHMARK_ALIAS):
+                cursor.executemany(
+                    "INSERT INTO task (owner_id, title, description, status, revision) VALUES (%s, %s, %s, %s, %s)",
+                    [(i % owners, f"Task {i}", f"Description of task {i}", 'CMPL' if i % 3 else 'INQU', i)
+                     for i in range(rows)],
+                )
+                cursor.executemany("INSERT INTO sync_state (owner_id, revision) VALUES (%s, %s)",
+                                   [(owner, rows) for owner in range(owners)])
+
+    def worker(self, kind, operation, options, stop, results):
+        """
+        Run `operation` as one request at a time until `stop` is set.
+        """
+        timings = []
+        connection = connections[BENCHMARK_ALIAS]
+        try:
+            while not stop.is_set():
+                # Same connection handling as the request_started/request_finished signals
+                connection.close_if_unusable_or_obsolete()
+                start = time.perf_counter()
+                try:
+                    operation(random.randrange(options['owners']))
+                    ok = True
+                except DatabaseError:
+                    # e.g. "database is locked" once busy_timeout ran out
+                    ok = False
+                timings.append((kind, time.perf_counter() - start, ok))
+                connection.close_if_unusable_or_obsolete()
+        finally:
+            connection.close()
+            results.extend(timings)
+
+    def read(self, owner_id):
+        # The task listing query
+        with connections[BENCHMARK_ALIAS].cursor() as cursor:
+            cursor.execute(
+                "SELECT id, title, description, status FROM task WHERE owner_id = %s ORDER BY id DESC LIMIT 50",
+                [owner_id],
+            )
+            cursor.fetchall()
+
+    def write(self, owner_id):
+        # Task creation: reserve the owner's next revision, then insert the task
+        with transaction.atomic(using=BENCHMARK_ALIAS):
+            with connections[BENCHMARK_ALIAS].cursor() as cursor:
+                cursor.execute("UPDATE sync_state SET revision = revision + 1 WHERE owner_id = %s", [owner_id])
+                cursor.execute("SELECT revision FROM sync_state WHERE owner_id = %s", [owner_id])
+                revision = cursor.fetchone()[0]
+                cursor.execute(
+                    "INSERT INTO task (owner_id, title, description, status, revision) VALUES (%s, %s, %s, %s, %s)",
+                    [owner_id, "New task", "Created by the benchmark", 'INQU', revision],
+                )
@@ -0,0 +1,82 @@
+# Import necessary modules
+import datetime
+import gzip
+import json
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from rest_framework.renderers import JSONRenderer
+from viewer.models import Task
+from planner.listing import task_values, serialize_tasks
+from planner.middleware import brotli, get_compression_settings
+from planner.renderers import CompactTaskRenderer
+
+
+class Command(BaseCommand):
+    """
+    Compare the JSON and compact (columnar) task list formats.
+
+    Runs against a throwaway test database, seeds one user with N tasks per size and reports,
+    for each format, the payload size (plain, gzip and, if installed, brotli, at the levels
+    of the `RESPONSE_COMPRESSION` setting) and the best encode and decode (`json.loads`) time.
+    """
+    help = "Compare payload sizes and encode/decode times of the JSON and compact task list formats."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='1000,10000',
+                            help="Comma separated numbers of tasks to list (default: 1000,10000).")
+        parser.add_argument('--repeat', type=int, default=5,
+                            help="Timed runs per format; the best run is reported (default: 5).")
+
+    def handle(self, *args, **options):
+        try:
+            sizes = [int(size) for size in options['sizes'].split(',')]
+        except ValueError:
+            raise CommandError("--sizes must be a comma separated list of integers")
+
+        # Never touch the configured database: work in a test database
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            self.run(sizes, options['repeat'])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    def best_time(self, function, repeat):
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            function()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best
+
+    def run(self, sizes, repeat):
+        user = User.objects.create_user('benchmark', 'benchmark@example.com', 'benchmark')
+        config = get_compression_settings()
+        renderers = {'json': JSONRenderer(), 'compact': CompactTaskRenderer()}
+
+        self.stdout.write(f"{'rows':>8} {'format':>8} {'bytes':>10} {'gzip':>9} {'brotli':>9} "
+                          f"{'encode (ms)':>12} {'decode (ms)':>12}")
+        seeded = 0
+        for size in sorted(sizes):
+            # Top up the user's tasks to the requested size
+            Task.objects.bulk_create(
+                [Task(title=f"Task {i}", owner=user, description=f"Description of task {i}",
+                      status=Task.CMPL if i % 3 else Task.INQU,
+                      creation_date=datetime.date(2024, 1, 1) + datetime.timedelta(days=i % 365))
+                 for i in range(seeded, size)],
+                batch_size=5000,
+            )
+            seeded = size
+            data = serialize_tasks(task_values(Task.objects.filter(owner=user)))
+
+            for name, renderer in renderers.items():
+                content = renderer.render(data)
+                gzipped = len(gzip.compress(content, compresslevel=config['GZIP_LEVEL'], mtime=0))
+                brotli_size = len(brotli.compress(content, quality=config['BROTLI_QUALITY'])) if brotli else '-'
+                encode = self.best_time(lambda: renderer.render(data), repeat)
+                decode = self.best_time(lambda: json.loads(content), repeat)
+                self.stdout.write(f"{size:>8} {name:>8} {len(content):>10} {gzipped:>9} {brotli_size:>9} "
+                                  f"{encode * 1000:>12.1f} {decode * 1000:>12.1f}")
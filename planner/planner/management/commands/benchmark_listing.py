@@ -0,0 +1,96 @@
+# Import necessary modules
+import datetime
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory, force_authenticate
+from viewer.models import Task
+from planner.cache import task_list_cache
+from planner.serializers import TaskSerializer
+from planner.listing import task_values, serialize_tasks
+from planner.views import UserTasksView
+
+
+class Command(BaseCommand):
+    """
+    Benchmark the task listing read paths against each other.
+
+    Runs against a throwaway test database, seeds one user with N tasks per size and times:
+    - `serializer`: `TaskSerializer(many=True)` + `JSONRenderer` (the original path),
+    - `values`: `task_values()` + `serialize_tasks()` + `JSONRenderer` (the view's path),
+    - `view`: a `GET /api/tasks/` through `UserTasksView`, with the task list cache cleared
+      first, so the revision lookup, the status counts and DRF's rendering are included.
+    Every path must produce byte-identical output.
+    """
+    help = "Benchmark the fast task listing path against TaskSerializer(many=True)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='1000,10000,100000',
+                            help="Comma separated numbers of tasks to list (default: 1000,10000,100000).")
+        parser.add_argument('--repeat', type=int, default=3,
+                            help="Timed runs per path; the best run is reported (default: 3).")
+
+    def handle(self, *args, **options):
+        try:
+            sizes = [int(size) for size in options['sizes'].split(',')]
+        except ValueError:
+            raise CommandError("--sizes must be a comma separated list of integers")
+
+        # Never touch the configured database: work in a test database
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            self.run(sizes, options['repeat'])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    def run(self, sizes, repeat):
+        user = User.objects.create_user('benchmark', 'benchmark@example.com', 'benchmark')
+        renderer = JSONRenderer()
+        view = UserTasksView.as_view(throttle_classes=[])
+        factory = APIRequestFactory()
+
+        def through_view(queryset):
+            task_list_cache.cache.clear()
+            request = factory.get('/api/tasks/')
+            force_authenticate(request, user=user)
+            return view(request).render().content
+
+        paths = {
+            'serializer': lambda qs: renderer.render(TaskSerializer(qs, many=True).data),
+            'values': lambda qs: renderer.render(serialize_tasks(task_values(qs))),
+            'view': through_view,
+        }
+
+        self.stdout.write(f"{'rows':>8} {'path':>10} {'best (ms)':>10} {'speedup':>8}")
+        seeded = 0
+        for size in sorted(sizes):
+            # Top up the user's tasks to the requested size
+            Task.objects.bulk_create(
+                [Task(title=f"Task {i}", owner=user, description=f"Description of task {i}",
+                      status=Task.CMPL if i % 3 else Task.INQU,
+                      creation_date=datetime.date(2024, 1, 1) + datetime.timedelta(days=i % 365))
+                 for i in range(seeded, size)],
+                batch_size=5000,
+            )
+            seeded = size
+            queryset = Task.objects.filter(owner=user)
+
+            outputs, timings = {}, {}
+            for name, path in paths.items():
+                best = None
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    outputs[name] = path(queryset)
+                    elapsed = time.perf_counter() - start
+                    best = elapsed if best is None else min(best, elapsed)
+                timings[name] = best
+
+            if len(set(outputs.values())) != 1:
+                raise CommandError(f"Listing paths produced different output for {size} rows")
+
+            for name, best in timings.items():
+                speedup = timings['serializer'] / best if best else 0.0
+                self.stdout.write(f"{size:>8} {name:>10} {best * 1000:>10.1f} {speedup:>7.1f}x")
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from planner.idempotency import idempotency_store
+
+
+class Command(BaseCommand):
+    """
+    Delete the idempotency keys whose stored response (or pending claim) has expired.
+    Intended to be run periodically, e.g. from cron or a systemd timer.
+    """
+    help = "Delete expired idempotency keys."
+
+    def handle(self, *args, **options):
+        deleted = idempotency_store.purge()
+        self.stdout.write(f"Deleted {deleted} expired idempotency key(s).")
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from planner.archive import purge_tombstones
+
+
+class Command(BaseCommand):
+    """
+    Delete the tombstones of tasks deleted or archived long ago, in batches.
+    Intended to be run periodically, e.g. from cron or a systemd timer.
+    Defaults come from the `TASK_ARCHIVE` setting.
+    """
+    help = "Delete tombstones older than a given number of days, in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--age-days', type=int, help="Delete tombstones recorded more than this many days ago.")
+        parser.add_argument('--batch-size', type=int, help="Tombstones deleted per transaction.")
+        parser.add_argument('--pause', type=float, help="Seconds to wait between batches.")
+
+    def handle(self, *args, **options):
+        if options['batch_size'] is not None and options['batch_size'] < 1:
+            raise CommandError("--batch-size must be at least 1")
+        purged = purge_tombstones(
+            age_days=options['age_days'],
+            batch_size=options['batch_size'],
+            pause=options['pause'],
+        )
+        self.stdout.write(f"Purged {purged} tombstone(s).")
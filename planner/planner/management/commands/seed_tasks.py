@@ -0,0 +1,81 @@
+# Import necessary modules
+import datetime
+import random
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from viewer.models import Task, TaskStats, TaskSyncState
+
+# Words the synthetic titles and descriptions are made of, so search has something to match
+WORDS = (
+    'report', 'meeting', 'invoice', 'review', 'deploy', 'backup', 'design', 'budget', 'client',
+    'release', 'sprint', 'migration', 'audit', 'training', 'roadmap', 'support', 'hiring', 'launch',
+)
+STATUSES = (Task.INQU, Task.PRGR, Task.CMPL, Task.PSPD)
+
+
+class Command(BaseCommand):
+    """
+    Seed a database with synthetic users and tasks, e.g. for benchmarks.
+
+    Users are named `<prefix><n>` and share one password (hashed once). Tasks are inserted
+    with chunked `bulk_create`, with the revisions, sync state and statistics the API
+    maintains, so every endpoint sees a consistent dataset.
+    """
+    help = "Create N users with M synthetic tasks each."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10, help="Users to create (default: 10).")
+        parser.add_argument('--tasks', type=int, default=1000, help="Tasks per user (default: 1000).")
+        parser.add_argument('--chunk-size', type=int, default=5000,
+                            help="Tasks inserted per bulk_create (default: 5000).")
+        parser.add_argument('--prefix', default='seed-user-', help="Username prefix (default: seed-user-).")
+        parser.add_argument('--password', default='seed-password', help="Password of every seeded user.")
+        parser.add_argument('--seed', type=int, default=0, help="Random seed, for repeatable datasets (default: 0).")
+
+    def handle(self, *args, **options):
+        if options['users'] < 0 or options['tasks'] < 0 or options['chunk_size'] < 1:
+            raise CommandError("--users and --tasks must be positive and --chunk-size at least 1")
+
+        rng = random.Random(options['seed'])
+        users = self.create_users(options['users'], options['prefix'], options['password'])
+        for user in users:
+            self.create_tasks(user, options['tasks'], options['chunk_size'], rng)
+        TaskStats.rebuild(owner_ids=[user.pk for user in users])
+
+        self.stdout.write(f"Seeded {len(users)} user(s) with {options['tasks']} task(s) each.")
+
+    def create_users(self, count, prefix, password):
+        # Continue the numbering of users seeded earlier with the same prefix
+        start = User.objects.filter(username__startswith=prefix).count()
+        encoded = make_password(password)
+        return User.objects.bulk_create([
+            User(username=f"{prefix}{number}", email=f"{prefix}{number}@example.com", password=encoded)
+            for number in range(start, start + count)
+        ])
+
+    def create_tasks(self, user, count, chunk_size, rng):
+        today = datetime.date.today()
+        with transaction.atomic():
+            # Stamp the tasks with consecutive revisions for delta sync
+            first = TaskSyncState.next_revision(user.pk, count) - count + 1 if count else 0
+            for offset in range(0, count, chunk_size):
+                tasks = [
+                    Task(
+                        title=' '.join(rng.sample(WORDS, 3)).capitalize(),
+                        owner=user,
+                        description=' '.join(rng.choices(WORDS, k=12)),
+                        status=rng.choice(STATUSES),
+                        creation_date=today - datetime.timedelta(days=rng.randrange(365)),
+                        revision=first + number,
+                    )
+                    for number in range(offset, min(offset + chunk_size, count))
+                ]
+                for task in tasks:
+                    # Completed tasks count as completed on the day they were created
+                    task.stamp_completion(now=timezone.make_aware(
+                        datetime.datetime.combine(task.creation_date, datetime.time())))
+                Task.objects.bulk_create(tasks)
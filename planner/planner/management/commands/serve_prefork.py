@@ -0,0 +1,106 @@
+# Import necessary modules
+import os
+import socket
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.wsgi import get_wsgi_application
+
+from planner.prefork import (
+    LISTENER_FD_VARIABLE, RETIRING_VARIABLE, WORKERS_VARIABLE, PreforkServer, find_process_local_state, warm_up,
+)
+
+
+class Command(BaseCommand):
+    """
+    Serve the WSGI application from pre-forked, warmed up worker processes.
+
+    The master process loads the application, warms up the routes of `planner/urls.py` and
+    `accounts/urls.py`, the serializers and the database connections (see
+    `planner.prefork.warm_up`), then forks the workers, so none of them pays for that on
+    its first requests. Each worker serves with a pool of threads that open their database
+    connections before the first request (kept with persistent connections, e.g. the
+    production database profile).
+
+    Send SIGHUP to the master for a rolling restart after a deploy and SIGTERM to stop it
+    (see `planner.prefork.PreforkServer`). Run it behind a reverse proxy serving static
+    files; the async endpoints (/api/async/...) need an ASGI server.
+
+    More than one worker is refused while state that has to be shared between the workers
+    (throttle counters, replica sticky flags, push events) is kept per
+    process; see `planner.prefork.find_process_local_state`.
+
+    The workers serve requests with Django's development HTTP server (`basehttp`), which
+    is not hardened for exposure to the internet. In production serve `planner.wsgi` with
+    gunicorn (`gunicorn planner.wsgi --preload`) or `planner.asgi` with uvicorn instead.
+    """
+    help = "Serve the API from pre-forked workers sharing a warmed up application."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--bind', default='127.0.0.1:8000', help="Address to listen on (default: 127.0.0.1:8000).")
+        parser.add_argument('--workers', type=int, default=1,
+                            help="Worker processes (default: 1). More than one needs shared caches and a "
+                                 "DatabaseBroker for task events.")
+        parser.add_argument('--threads', type=int, default=4, help="Threads per worker (default: 4).")
+        parser.add_argument('--backlog', type=int, default=2048, help="Listen queue length (default: 2048).")
+        parser.add_argument('--graceful-timeout', type=float, default=30,
+                            help="Seconds a stopping worker may take to finish its requests (default: 30).")
+        parser.add_argument('--check', action='store_true',
+                            help="Load and warm up the application, then exit without serving.")
+
+    def handle(self, *args, **options):
+        if not hasattr(os, 'fork'):
+            raise CommandError("The pre-forking server needs os.fork(), which this platform lacks")
+        if options['workers'] < 1 or options['threads'] < 1:
+            raise CommandError("--workers and --threads must be at least 1")
+        if options['workers'] > 1:
+            problems = find_process_local_state()
+            if problems:
+                raise CommandError(
+                    "Several workers would not share their state: " + "; ".join(problems)
+                    + ". Configure shared backends or run a single worker."
+                )
+
+        start = time.perf_counter()
+        application = get_wsgi_application()
+        routes = warm_up(application, self.log)
+        self.log(f"Application loaded and {routes} routes warmed up in {time.perf_counter() - start:.2f}s")
+        if options['check']:
+            return
+
+        # After a rolling restart, the socket and the workers come from the previous master
+        inherited_fd = os.environ.pop(LISTENER_FD_VARIABLE, None)
+        previous_workers = self.pop_pids(WORKERS_VARIABLE)
+        retiring = self.pop_pids(RETIRING_VARIABLE)
+        if inherited_fd is not None:
+            listener = socket.socket(fileno=int(inherited_fd))
+        else:
+            listener = self.listen(options['bind'], options['backlog'])
+
+        server = PreforkServer(
+            listener, application,
+            workers=options['workers'],
+            threads=options['threads'],
+            graceful_timeout=options['graceful_timeout'],
+            log=self.log,
+            check_command=[sys.executable, *sys.orig_argv[1:], '--check'],
+        )
+        server.run(previous_workers=previous_workers, retiring=retiring)
+
+    def listen(self, bind, backlog):
+        host, _, port = bind.rpartition(':')
+        host = host.strip('[]') or '0.0.0.0'
+        try:
+            address = (host, int(port))
+        except ValueError:
+            raise CommandError(f"--bind must be HOST:PORT, not {bind!r}")
+        family = socket.AF_INET6 if ':' in host else socket.AF_INET
+        return socket.create_server(address, family=family, backlog=backlog)
+
+    def pop_pids(self, variable):
+        return [int(pid) for pid in os.environ.pop(variable, '').split(',') if pid]
+
+    def log(self, message):
+        self.stdout.write(f"[{os.getpid()}] {message}")
+        self.stdout.flush()
@@ -0,0 +1,224 @@
+# Import necessary modules
+import argparse
+import gc
+import json
+import logging
+import os
+import statistics
+import subprocess
+import sys
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.handlers.base import BaseHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory, override_settings
+
+# What a worker runs before it can serve its first request, in a fresh interpreter
+COLD_START = "import planner.wsgi; from django.urls import get_resolver; get_resolver().url_patterns"
+
+# Appended to COLD_START to print the profile's installed apps
+INSTALLED_APPS_OUTPUT = "; import json; from django.conf import settings; print(json.dumps(settings.INSTALLED_APPS))"
+
+
+class Command(BaseCommand):
+    """
+    Report the worker cold-start time and the per-request middleware cost of settings profiles.
+
+    For every profile in `--profiles` (values of PLANNER_PROFILE, see the settings):
+    - starts `--repeat` fresh interpreters that load the WSGI application and the URL
+      patterns, as a worker does before its first request, and reports the median wall
+      time and its spread, the number of imported modules, the packages taking the most
+      import time (from `python -X importtime`), and which imports pull in the modules of
+      apps the profile leaves out;
+    - times requests to `--path` through each middleware on its own, and through no
+      middleware, in `--samples` interleaved samples of `--requests` requests, and reports
+      the median cost of each middleware over the bare request.
+
+    A middleware that fails on its own (e.g. AuthenticationMiddleware needs the session) is
+    timed on top of the middleware listed before it instead, and marked with `*`.
+
+    The requests are unauthenticated, so the view answers 401 without touching the database
+    and the timings are made of the middleware, URL resolving and DRF dispatch.
+    """
+    help = "Report import time and per-request middleware cost of the settings profiles."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--profiles', default='full,api',
+                            help="Comma separated PLANNER_PROFILE values to compare (default: full,api).")
+        parser.add_argument('--repeat', type=int, default=11,
+                            help="Cold starts per profile; the median is reported (default: 11).")
+        parser.add_argument('--samples', type=int, default=200,
+                            help="Timed samples per middleware; the median is reported (default: 200).")
+        parser.add_argument('--requests', type=int, default=20,
+                            help="Requests per sample (default: 20).")
+        parser.add_argument('--path', default='/api/tasks/', help="Path requested (default: /api/tasks/).")
+        parser.add_argument('--top', type=int, default=10, help="Packages listed by import time (default: 10).")
+        # Internal: measure the middleware of the current process' settings and print JSON
+        parser.add_argument('--middleware-only', action='store_true', help=argparse.SUPPRESS)
+
+    def handle(self, *args, **options):
+        if options['repeat'] < 1 or options['requests'] < 1 or options['samples'] < 1:
+            raise CommandError("--repeat, --samples and --requests must be at least 1")
+        if options['middleware_only']:
+            self.stdout.write(json.dumps(self.measure_middleware(options['path'], options['requests'],
+                                                                 options['samples'])))
+            return
+
+        results = {}
+        for profile in [profile for profile in options['profiles'].split(',') if profile]:
+            environment = {**os.environ, 'PLANNER_PROFILE': profile,
+                           'PYTHONPATH': os.pathsep.join(filter(None, [str(settings.BASE_DIR),
+                                                                        os.environ.get('PYTHONPATH')]))}
+            startup = self.measure_startup(environment, options['repeat'])
+            middleware = json.loads(self.run_python(
+                ['-m', 'django', 'startup_report', '--middleware-only', '--samples', str(options['samples']),
+                 '--requests', str(options['requests']), '--path', options['path']],
+                environment,
+            ).stdout)
+            results[profile] = startup, middleware
+            self.report(profile, startup, middleware, options['path'], options['top'])
+
+        if len(results) > 1:
+            (base, (base_startup, base_middleware)), *others = results.items()
+            for profile, (startup, middleware) in others:
+                self.stdout.write(
+                    f"{profile} vs {base}: cold start {(startup['seconds'] - base_startup['seconds']) * 1000:+.1f} ms "
+                    f"(medians), {startup['modules'] - base_startup['modules']:+d} modules, middleware "
+                    f"{(middleware['total'] - middleware['base'] - base_middleware['total'] + base_middleware['base']) * 1e6:+.1f} µs per request"
+                )
+
+    def run_python(self, arguments, environment):
+        result = subprocess.run([sys.executable, *arguments], env=environment, cwd=settings.BASE_DIR,
+                                capture_output=True, text=True)
+        if result.returncode:
+            raise CommandError(f"{' '.join(arguments)} failed:\n{result.stderr}")
+        return result
+
+    def measure_startup(self, environment, repeat):
+        """
+        Time cold starts and break the import time down by package.
+        """
+        runs = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            self.run_python(['-c', COLD_START], environment)
+            runs.append(time.perf_counter() - start)
+
+        # Lines look like "import time:  <self us> | <cumulative us> | <indented module>",
+        # each module listed after the modules it imported, one level deeper
+        packages, modules, total = Counter(), 0, 0
+        result = self.run_python(['-X', 'importtime', '-c', COLD_START + INSTALLED_APPS_OUTPUT], environment)
+        imports = []
+        for line in result.stderr.splitlines():
+            if not line.startswith('import time:') or 'self [us]' in line:
+                continue
+            own, _, module = line.removeprefix('import time:').split('|')
+            imports.append((len(module) - len(module.lstrip()), module.strip()))
+            module = module.strip()
+            parts = module.split('.')
+            packages['.'.join(parts[:3] if module.startswith('django.contrib.') else parts[:2])] += int(own)
+            modules += 1
+            total += int(own)
+
+        installed = json.loads(result.stdout)
+        left_out = [app for app in settings.API_PROFILE_EXCLUDED_APPS if app not in installed]
+        return {"seconds": statistics.median(runs), "min_seconds": min(runs), "max_seconds": max(runs),
+                "modules": modules, "import_seconds": total / 1e6,
+                "packages": [(package, own / 1e6) for package, own in packages.most_common()],
+                "left_out_imports": {app: find_import_chain(imports, app) for app in left_out
+                                     if find_import_chain(imports, app)}}
+
+    def measure_middleware(self, path, count, samples):
+        """
+        Return the median time of a request with no middleware (`base`), with the whole
+        stack (`total`), and what each middleware adds, each timed on its own.
+
+        Every sample times `count` requests through each handler in turn, with the garbage
+        collector paused like `timeit` does, so that drifts in the machine's speed affect all
+        the handlers alike; the medians leave out the occasional slow sample.
+        """
+        factory = RequestFactory()
+
+        def load(middleware):
+            with override_settings(MIDDLEWARE=middleware):
+                handler = BaseHandler()
+                handler.load_middleware()
+            return handler
+
+        logger = logging.getLogger('django.request')
+        level = logger.level
+        logger.setLevel(logging.CRITICAL)  # The 401 responses are expected
+        try:
+            base = load([])
+            base_status = base.get_response(factory.get(path, HTTP_HOST='localhost')).status_code
+            # Each middleware alone, or after the middleware before it if it fails alone
+            stacks = {'': base, '*': load(settings.MIDDLEWARE)}
+            contexts = {}
+            for index, name in enumerate(settings.MIDDLEWARE):
+                handler = load([name])
+                try:
+                    alone = handler.get_response(factory.get(path, HTTP_HOST='localhost')).status_code == base_status
+                except Exception:
+                    alone = False
+                if alone:
+                    stacks[name], contexts[name] = handler, ''
+                else:
+                    before = settings.MIDDLEWARE[:index]
+                    stacks[name], contexts[name] = load(before + [name]), f'before:{index}'
+                    stacks.setdefault(f'before:{index}', load(before))
+
+            timings = {key: [] for key in stacks}
+            for _ in range(samples):
+                for key, handler in stacks.items():
+                    requests = [factory.get(path, HTTP_HOST='localhost') for _ in range(count + 1)]
+                    handler.get_response(requests.pop()).close()  # Warm-up
+                    gc.disable()
+                    start = time.perf_counter()
+                    for request in requests:
+                        handler.get_response(request).close()
+                    timings[key].append((time.perf_counter() - start) / count)
+                    gc.enable()
+        finally:
+            logger.setLevel(level)
+        medians = {key: statistics.median(values) for key, values in timings.items()}
+        return {
+            "base": medians[''],
+            "total": medians['*'],
+            "middleware": [(name, medians[name] - medians[contexts[name]], bool(contexts[name]))
+                           for name in settings.MIDDLEWARE],
+        }
+
+    def report(self, profile, startup, middleware, path, top):
+        self.stdout.write(f"Profile '{profile}'")
+        self.stdout.write(f"  Cold start: {startup['seconds'] * 1000:.1f} ms median "
+                          f"({startup['min_seconds'] * 1000:.1f}-{startup['max_seconds'] * 1000:.1f} ms), "
+                          f"{startup['modules']} modules, {startup['import_seconds'] * 1000:.1f} ms importing")
+        self.stdout.write("  Import time by package:")
+        for package, seconds in startup['packages'][:top]:
+            self.stdout.write(f"    {seconds * 1000:>8.1f} ms  {package}")
+        for app, chain in startup['left_out_imports'].items():
+            self.stdout.write(f"  {app} is not installed but imported by: {' <- '.join(chain)}")
+        self.stdout.write(f"  Per request (GET {path}), medians:")
+        for name, seconds, stacked in middleware['middleware']:
+            self.stdout.write(f"    {seconds * 1e6:>8.1f} µs  {name}{' *' if stacked else ''}")
+        self.stdout.write(f"    {(middleware['total'] - middleware['base']) * 1e6:>8.1f} µs  all middleware")
+        self.stdout.write(f"    {middleware['total'] * 1e6:>8.1f} µs  whole request")
+        self.stdout.write("")
+
+
+def find_import_chain(imports, package):
+    """
+    Return the chain of modules through which `package` was first imported, from the
+    package up to the top-level import, given `(indent, module)` pairs of `-X importtime`.
+    """
+    for index, (indent, module) in enumerate(imports):
+        if module == package or module.startswith(package + '.'):
+            chain = [module]
+            for parent_indent, parent in imports[index + 1:]:
+                if parent_indent < indent:
+                    chain.append(parent)
+                    indent = parent_indent
+            return chain
+    return None
@@ -0,0 +1,168 @@
+# Import necessary modules
+import bisect  # Bucket lookup for histogram observations
+import contextvars  # Follows a request into the threads doing work for it
+import threading  # Protects the metric series
+import time
+
+from django.conf import settings
+
+# Upper bounds of the histogram buckets (a final +Inf bucket is implicit)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)  # Seconds
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)  # Queries per request
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)  # Response bytes
+
+# Label values used for requests that do not match a known series
+UNMATCHED_ROUTE = '<unmatched>'
+OTHER_ROUTE = '<other>'
+KNOWN_METHODS = frozenset(['GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'])
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram: one counter per bucket plus the sum and count of observations.
+    Memory does not grow with the number of observations.
+    """
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def render(self, name, labels):
+        """
+        Yield the Prometheus text lines of this histogram (cumulative buckets).
+        """
+        cumulative = 0
+        for bound, count in zip((*self.buckets, '+Inf'), self.counts):
+            cumulative += count
+            yield f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}'
+        yield f'{name}_sum{{{labels}}} {self.sum}'
+        yield f'{name}_count{{{labels}}} {self.count}'
+
+
+class RouteMetrics:
+    """
+    Metrics of one (route, method) series.
+    """
+
+    def __init__(self):
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.queries = Histogram(QUERY_COUNT_BUCKETS)
+        self.query_seconds = 0.0
+        self.response_size = Histogram(SIZE_BUCKETS)
+        self.statuses = {}  # Status code -> number of responses
+
+
+class RequestMetrics:
+    """
+    In-process request metrics, keyed by URL route pattern (not path) and method.
+
+    Routes come from the URL configuration, so the number of series is bounded by it.
+    `max_series` caps it anyway; requests beyond the cap are counted under the `<other>`
+    route. Each worker process keeps its own metrics.
+    """
+
+    def __init__(self, max_series=1000):
+        self.max_series = max_series
+        self.series = {}
+        self.lock = threading.Lock()
+
+    def observe(self, route, method, status_code, seconds, query_count, query_seconds, size):
+        """
+        Record one request. `size` is None when the response size is unknown (streaming).
+        """
+        if method not in KNOWN_METHODS:
+            method = 'OTHER'
+        key = (route, method)
+        with self.lock:
+            series = self.series.get(key)
+            if series is None:
+                if len(self.series) >= self.max_series:
+                    key = (OTHER_ROUTE, method)
+                    series = self.series.get(key)
+                if series is None:
+                    series = self.series[key] = RouteMetrics()
+            series.latency.observe(seconds)
+            series.queries.observe(query_count)
+            series.query_seconds += query_seconds
+            if size is not None:
+                series.response_size.observe(size)
+            series.statuses[status_code] = series.statuses.get(status_code, 0) + 1
+
+    def clear(self):
+        with self.lock:
+            self.series.clear()
+
+    def render(self):
+        """
+        Return the metrics in the Prometheus text exposition format.
+        """
+        with self.lock:
+            series = sorted(self.series.items())
+            lines = [
+                '# HELP planner_http_requests_total Requests handled, by route, method and status code.',
+                '# TYPE planner_http_requests_total counter',
+            ]
+            for (route, method), metrics in series:
+                for code, count in sorted(metrics.statuses.items()):
+                    lines.append(f'planner_http_requests_total{{{labels(route, method)},status="{code}"}} {count}')
+
+            histograms = [
+                ('planner_http_request_duration_seconds', 'Request latency in seconds.', 'latency'),
+                ('planner_db_queries_per_request', 'SQL queries issued per request.', 'queries'),
+                ('planner_http_response_size_bytes', 'Response body size in bytes (streaming responses excluded).',
+                 'response_size'),
+            ]
+            for name, description, attribute in histograms:
+                lines += [f'# HELP {name} {description}', f'# TYPE {name} histogram']
+                for (route, method), metrics in series:
+                    lines.extend(getattr(metrics, attribute).render(name, labels(route, method)))
+
+            lines += [
+                '# HELP planner_db_query_seconds_total Time spent executing SQL queries, in seconds.',
+                '# TYPE planner_db_query_seconds_total counter',
+            ]
+            for (route, method), metrics in series:
+                lines.append(f'planner_db_query_seconds_total{{{labels(route, method)}}} {metrics.query_seconds}')
+        return lines
+
+
+def escape(value):
+    # Label value escaping of the Prometheus text format
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def labels(route, method):
+    return f'route="{escape(route)}",method="{method}"'
+
+
+class QueryCounter:
+    """
+    Database execute wrapper counting the queries of a request and the time they take.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.seconds += time.perf_counter() - start
+
+
+# Query counter of the request being served. Work handed to another thread for the request
+# (the write coalescer's writer thread) counts its queries with it too
+current_query_counter = contextvars.ContextVar('current_query_counter', default=None)
+
+# Shared instance fed by RequestMetricsMiddleware
+request_metrics = RequestMetrics(max_series=getattr(settings, 'METRICS', {}).get('MAX_SERIES', 1000))
@@ -0,0 +1,214 @@
+# Import necessary modules
+import gzip
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli  # Optional: brotli compression, preferred over gzip when installed
+except ImportError:
+    brotli = None
+
+from .metrics import QueryCounter, UNMATCHED_ROUTE, current_query_counter, request_metrics
+from .routers import begin_request, end_request, get_request_user_id, stick_to_primary
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Routes the database reads of each request (see `planner.routers.ReplicaRouter`).
+
+    After a successful write by an authenticated user, that user's reads stick to the
+    primary for a few seconds, so a list fetched right after an edit includes the edit.
+    Works with both WSGI and ASGI (async views) request handling.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = begin_request(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            end_request(token)
+        user_id = self.get_writer_id(request, response)
+        if user_id is not None:
+            stick_to_primary(user_id)
+        return response
+
+    async def __acall__(self, request):
+        token = begin_request(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            end_request(token)
+        user_id = self.get_writer_id(request, response)
+        if user_id is not None:
+            await sync_to_async(stick_to_primary)(user_id)
+        return response
+
+    def get_writer_id(self, request, response):
+        """
+        Return the id of the user who wrote in this request, if any.
+        """
+        if request.method in ('GET', 'HEAD', 'OPTIONS') or response.status_code >= 400:
+            return None
+        return get_request_user_id(request)
+
+
+class RequestMetricsMiddleware:
+    """
+    Records the latency, SQL query count and time, response size and status code of every
+    request, per URL route, in `planner.metrics.request_metrics` (served on /api/metrics/).
+
+    Queries are counted with an execute wrapper installed on every database connection for
+    the duration of the request. Under ASGI the wrappers are installed from the thread the
+    request's synchronous code (views, ORM calls) runs in, since connections are per thread.
+    Writes run by the write coalescer's writer thread are counted with the request that
+    queued them (see `current_query_counter`); the shared commit of a batch is not counted.
+    Streaming responses are recorded when their headers are ready; their size is not known.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        start = time.perf_counter()
+        counter = self.install(QueryCounter())
+        token = current_query_counter.set(counter)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_query_counter.reset(token)
+            self.uninstall(counter)
+        self.record(request, response, time.perf_counter() - start, counter)
+        return response
+
+    async def __acall__(self, request):
+        start = time.perf_counter()
+        counter = await sync_to_async(self.install)(QueryCounter())
+        token = current_query_counter.set(counter)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_query_counter.reset(token)
+            await sync_to_async(self.uninstall)(counter)
+        self.record(request, response, time.perf_counter() - start, counter)
+        return response
+
+    def install(self, counter):
+        for connection in connections.all():
+            connection.execute_wrappers.append(counter)
+        return counter
+
+    def uninstall(self, counter):
+        for connection in connections.all():
+            if counter in connection.execute_wrappers:
+                connection.execute_wrappers.remove(counter)
+
+    def record(self, request, response, seconds, counter):
+        match = request.resolver_match
+        route = match.route if match is not None else UNMATCHED_ROUTE
+        size = None if response.streaming else len(response.content)
+        request_metrics.observe(route, request.method, response.status_code, seconds,
+                                counter.count, counter.seconds, size)
+
+
+def get_compression_settings():
+    """
+    Return the `RESPONSE_COMPRESSION` setting with its defaults filled in.
+    """
+    config = getattr(settings, 'RESPONSE_COMPRESSION', {})
+    return {
+        'MIN_SIZE': config.get('MIN_SIZE', 1024),
+        'GZIP_LEVEL': config.get('GZIP_LEVEL', 6),
+        'BROTLI_QUALITY': config.get('BROTLI_QUALITY', 5),
+    }
+
+
+class CompressionMiddleware:
+    """
+    Compresses responses of at least `MIN_SIZE` bytes with brotli or gzip, whichever the
+    client accepts (brotli first, if the `brotli` package is installed).
+
+    Smaller responses are sent as they are: compressing them costs more time than it saves
+    bytes. Streaming responses (task exports, Server-Sent Events) are never compressed, so
+    they keep being flushed as they are produced. ETags of compressed responses are made
+    weak, like Django's GZipMiddleware does.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.config = get_compression_settings()
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.compress(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.compress(request, await self.get_response(request))
+
+    def get_encoding(self, request):
+        """
+        Return the content coding to use for the request, or None.
+        """
+        accepted = set()
+        for item in request.headers.get('Accept-Encoding', '').split(','):
+            coding, _, params = item.strip().lower().partition(';')
+            quality = params.strip().removeprefix('q=')
+            try:
+                if params and float(quality) <= 0:
+                    continue
+            except ValueError:
+                continue
+            accepted.add(coding.strip())
+        if brotli is not None and 'br' in accepted:
+            return 'br'
+        if 'gzip' in accepted:
+            return 'gzip'
+        return None
+
+    def compress(self, request, response):
+        if response.streaming or response.has_header('Content-Encoding'):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        if len(response.content) < self.config['MIN_SIZE']:
+            return response
+        encoding = self.get_encoding(request)
+        if encoding is None:
+            return response
+
+        if encoding == 'br':
+            content = brotli.compress(response.content, quality=self.config['BROTLI_QUALITY'])
+        else:
+            content = gzip.compress(response.content, compresslevel=self.config['GZIP_LEVEL'], mtime=0)
+        if len(content) >= len(response.content):
+            return response
+
+        response.content = content
+        response.headers['Content-Length'] = str(len(content))
+        response.headers['Content-Encoding'] = encoding
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        return response
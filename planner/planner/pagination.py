@@ -0,0 +1,203 @@
+# Import necessary modules
+import base64  # For encoding/decoding opaque cursors
+import json  # For packing cursor positions into a compact string
+from collections import OrderedDict
+
+from django.core.exceptions import ValidationError  # Raised by `to_python` for values of the wrong type
+from django.db.models import Q  # For building keyset (seek) conditions
+from rest_framework.exceptions import NotFound  # Raised for malformed cursors, like DRF's CursorPagination
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+from viewer.models import Task  # Ranks statuses in workflow order
+
+
+class TaskKeysetPagination(BasePagination):
+    """
+    Keyset (cursor) pagination for task listings.
+
+    Pages are sliced with a seek condition on `(<ordering field>, id)` instead of OFFSET,
+    so every page is a single index range scan on the composite indexes declared on
+    `Task.Meta.indexes`, no matter how deep the client pages.
+
+    Pagination is opt-in: it is only applied when the request carries a `cursor` or
+    `page_size` query parameter, so existing clients keep receiving a plain list.
+    """
+    page_size = 100  # Default number of tasks per page
+    max_page_size = 1000  # Upper bound for the client-supplied page size
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    ordering_query_param = 'ordering'
+    invalid_cursor_message = 'Invalid cursor'
+
+    # Orderings that are backed by a composite `(owner, <column>, id)` index
+    orderings = ('creation_date', '-creation_date', 'status', '-status', 'id', '-id')
+    default_ordering = 'creation_date'
+    # Orderings sorting by another column than their name: statuses sort in workflow
+    # order (In queue, In progress, Completed, Postponed), not alphabetically
+    ordering_columns = {'status': 'status_rank'}
+
+    def is_requested(self, request):
+        """
+        Return True if the client asked for a paginated response.
+        """
+        params = request.query_params
+        return self.cursor_query_param in params or self.page_size_query_param in params
+
+    def get_page_size(self, request):
+        """
+        Read the page size from the query string, clamped to `max_page_size`.
+        """
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if size <= 0:
+            return self.page_size
+        return min(size, self.max_page_size)
+
+    def get_ordering(self, request):
+        """
+        Return the requested ordering, falling back to the default for unknown values.
+        """
+        ordering = request.query_params.get(self.ordering_query_param, self.default_ordering)
+        return ordering if ordering in self.orderings else self.default_ordering
+
+    def get_column(self, ordering):
+        """
+        Return the column an ordering sorts by.
+        """
+        field = ordering.lstrip('-')
+        return self.ordering_columns.get(field, field)
+
+    def get_order_by(self, ordering):
+        """
+        Return the `order_by()` arguments for an ordering, with `id` as the tie-breaker.
+        """
+        column = self.get_column(ordering)
+        descending = ordering.startswith('-')
+        if column == 'id':
+            return [ordering]
+        return ['-' + column if descending else column, '-id' if descending else 'id']
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """
+        Return one page of tasks, or None when pagination was not requested.
+        """
+        if not self.is_requested(request):
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.page_size_value = self.get_page_size(request)
+        self.ordering = self.get_ordering(request)
+        self.model = queryset.model
+
+        descending = self.ordering.startswith('-')
+        field = self.get_column(self.ordering)
+
+        # Apply the seek condition for the position encoded in the cursor
+        position = self.decode_cursor(request)
+        if position is not None:
+            queryset = queryset.filter(self.get_seek_condition(field, descending, *position))
+
+        # Order by the field with `id` as the tie-breaker so the position is unique,
+        # fetching one extra row to find out whether there is a next page
+        order = self.get_order_by(self.ordering)
+        page = list(queryset.order_by(*order)[:self.page_size_value + 1])
+
+        self.has_next = len(page) > self.page_size_value
+        page = page[:self.page_size_value]
+        self.next_position = None
+        if self.has_next:
+            last = page[-1]
+            self.next_position = (self.get_position_value(last, field), self.get_position_value(last, 'id'))
+        return page
+
+    def get_seek_condition(self, field, descending, value, pk):
+        """
+        Build the condition selecting rows strictly after `(value, pk)` in the page order.
+        """
+        if field == 'id':
+            return Q(id__lt=pk) if descending else Q(id__gt=pk)
+        if descending:
+            # The leading `<=` bound lets the database seek straight into the index
+            return Q(**{f'{field}__lte': value}) & (Q(**{f'{field}__lt': value}) | Q(id__lt=pk))
+        return Q(**{f'{field}__gte': value}) & (Q(**{f'{field}__gt': value}) | Q(id__gt=pk))
+
+    def get_position_value(self, task, field):
+        """
+        Return the JSON-serializable ordering value of a task instance or `values()` row.
+        """
+        if field == 'status_rank':
+            # Computed by the database and not selected: rank the status the same way
+            status = task['status'] if isinstance(task, dict) else task.status
+            return Task.get_status_rank(status)
+        value = task[field] if isinstance(task, dict) else getattr(task, field)
+        return value.isoformat() if hasattr(value, 'isoformat') else value
+
+    def decode_cursor(self, request):
+        """
+        Decode the cursor from the query string into a `(value, pk)` position.
+        Cursors are client-supplied: anything that does not decode to a valid position
+        of the current ordering is answered with 404, like DRF's CursorPagination.
+        """
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')))
+            # A cursor is only valid for the ordering it was issued for
+            if payload['o'] != self.ordering:
+                raise ValueError
+            value, pk = payload['v'], payload['k']
+            if isinstance(value, (list, dict)) or isinstance(pk, (list, dict)):
+                raise ValueError
+            # Convert the values as the ordering column would, so that the database only
+            # ever compares the column with a value of its type
+            field = self.model._meta.get_field(self.get_column(self.ordering))
+            value = getattr(field, 'output_field', field).to_python(value)
+            return value, int(pk)
+        except (TypeError, ValueError, KeyError, UnicodeError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, position):
+        """
+        Encode a `(value, pk)` position into an url carrying an opaque cursor.
+        """
+        value, pk = position
+        payload = json.dumps({'o': self.ordering, 'v': value, 'k': pk}, separators=(',', ':'))
+        encoded = base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self.encode_cursor(self.next_position)
+
+    def get_paginated_response(self, data, counts=None):
+        """
+        Wrap a page of tasks, optionally with the per-status counts of the whole listing.
+        """
+        envelope = OrderedDict([('next', self.get_next_link())])
+        if counts is not None:
+            envelope['counts'] = counts
+        envelope['results'] = data
+        return Response(envelope)
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {
+                    'type': 'string',
+                    'nullable': True,
+                    'format': 'uri',
+                },
+                'counts': {
+                    'type': 'object',
+                    'additionalProperties': {'type': 'integer'},
+                },
+                'results': schema,
+            },
+        }
@@ -0,0 +1,383 @@
+# Import necessary modules
+import gc
+import logging
+import os
+import select
+import signal
+import socket
+import sys
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.servers.basehttp import WSGIRequestHandler, WSGIServer
+from django.db import connections
+from django.test import RequestFactory
+from django.urls import URLPattern, URLResolver, get_resolver, reverse
+from django.utils import translation
+from rest_framework import serializers
+
+from .metrics import request_metrics  # Warm-up requests are not reported
+from .events import InProcessBroker, get_broker  # Push events between processes
+from .routers import get_routing_settings  # Where the replica sticky flags are stored
+from .throttling import CacheCounterStore, LocalCounterStore, get_counter_store  # Where throttle counters are stored
+
+# Environment variables handing the listening socket and the running workers to the
+# re-executed master during a rolling restart
+LISTENER_FD_VARIABLE = 'PLANNER_PREFORK_FD'
+WORKERS_VARIABLE = 'PLANNER_PREFORK_WORKERS'
+RETIRING_VARIABLE = 'PLANNER_PREFORK_RETIRING'
+
+# Apps whose URL patterns and serializers are warmed up
+WARM_UP_APPS = ('planner', 'accounts')
+
+# Sample values for the URL converters of the warmed up routes
+CONVERTER_SAMPLES = {'IntConverter': 0, 'StringConverter': 'x', 'SlugConverter': 'x', 'PathConverter': 'x'}
+
+
+def iter_routes(resolver=None, prefix=''):
+    """
+    Yield `(route, pattern)` for every URL pattern of the warmed up apps, skipping
+    namespaced includes such as the admin.
+    """
+    resolver = resolver or get_resolver()
+    for pattern in resolver.url_patterns:
+        route = prefix + str(pattern.pattern)
+        if isinstance(pattern, URLResolver):
+            if pattern.namespace is None:
+                yield from iter_routes(pattern, route)
+        elif isinstance(pattern, URLPattern) and pattern.lookup_str.split('.')[0] in WARM_UP_APPS:
+            yield route, pattern
+
+
+def warm_up(application, log):
+    """
+    Do in the master process what a worker would otherwise do on its first requests.
+
+    - Compiles the URL resolver and sends an unauthenticated GET to every (synchronous)
+      route of the planner and accounts apps through the full middleware stack. These
+      requests stop at authentication (401) or at the method check (405) and change nothing.
+    - Builds the fields of every serializer of those apps.
+    - Loads the translation catalogs and opens (then closes) every database connection, so
+      the driver and connection settings are loaded and checked before forking.
+    Returns the number of warmed up routes.
+    """
+    resolver = get_resolver()
+    resolver.reverse_dict  # Compile the reverse lookup tables
+    translation.activate(settings.LANGUAGE_CODE)
+
+    host = next((host for host in settings.ALLOWED_HOSTS if host not in ('*', '')), 'localhost').lstrip('.')
+    factory = RequestFactory()
+    logger = logging.getLogger('django.request')
+    level = logger.level
+    logger.setLevel(logging.CRITICAL)  # The 401 and 405 responses are expected
+    routes = 0
+    try:
+        for route, pattern in iter_routes(resolver):
+            view_class = getattr(pattern.callback, 'view_class', None)
+            if getattr(view_class, 'view_is_async', False):
+                # Async views start event loop threads, which must not exist when forking
+                continue
+            kwargs = {name: CONVERTER_SAMPLES.get(type(converter).__name__, 'x')
+                      for name, converter in pattern.pattern.converters.items()}
+            path = reverse(pattern.name, kwargs=kwargs) if pattern.name else '/' + route
+            application.get_response(factory.get(path, HTTP_HOST=host)).close()
+            routes += 1
+    finally:
+        logger.setLevel(level)
+    request_metrics.clear()
+
+    for serializer_class in iter_serializers(serializers.BaseSerializer):
+        try:
+            serializer_class().fields
+        except Exception as error:  # A serializer needing arguments only misses its warm-up
+            log(f"Could not warm up {serializer_class.__qualname__}: {error}")
+
+    for connection in connections.all():
+        connection.ensure_connection()
+    connections.close_all()
+    return routes
+
+
+def iter_serializers(base):
+    for subclass in base.__subclasses__():
+        if subclass.__module__.split('.')[0] in WARM_UP_APPS:
+            yield subclass
+        yield from iter_serializers(subclass)
+
+
+def open_connections():
+    # Runs in every thread of a worker's pool: persistent connections (CONN_MAX_AGE) are
+    # per thread, so each thread starts with its own
+    for connection in connections.all():
+        try:
+            connection.ensure_connection()
+        except Exception:
+            pass  # The first query connects (and reports the error) instead
+
+
+def find_process_local_state():
+    """
+    Return descriptions of the settings keeping state that several worker processes would
+    each have their own copy of, while it has to be shared for the API to behave correctly.
+
+    The task list cache is not among them (its entries are keyed by the database revision),
+    nor are the JWT user cache (entries expire after `JWT_USER_CACHE['TTL']` seconds) and the
+    request metrics (each process reports its own counters).
+    """
+    def is_local(alias):
+        return isinstance(caches[alias], LocMemCache)
+
+    problems = []
+    store = get_counter_store()
+    if isinstance(store, LocalCounterStore) or (isinstance(store, CacheCounterStore) and is_local(store.alias)):
+        problems.append("THROTTLE_COUNTER_STORE keeps the rate limit counters per process")
+    routing = get_routing_settings()
+    if routing['REPLICAS'] and is_local(routing['STICKY_CACHE']):
+        problems.append(f"DATABASE_ROUTING['STICKY_CACHE'] ({routing['STICKY_CACHE']!r}) is a local memory cache")
+    if isinstance(get_broker(), InProcessBroker):
+        problems.append("TASK_EVENTS uses the InProcessBroker")
+    return problems
+
+
+class PoolRequestHandler(WSGIRequestHandler):
+    """
+    Request handler that gives up on clients sending nothing for `timeout` seconds.
+    """
+    timeout = 30
+
+
+class PoolWSGIServer(WSGIServer):
+    """
+    WSGI server of a worker process.
+
+    Serves an inherited listening socket with a fixed pool of `threads` threads, which keep
+    their database connections between requests. The worker only accepts a connection when
+    a thread is free, leaving the others to the other workers. Responses close the
+    connection (no keep-alive), as the server is meant to run behind a reverse proxy.
+    """
+
+    def __init__(self, listener, application, threads):
+        host, port = listener.getsockname()[:2]
+        super().__init__((host, port), PoolRequestHandler, ipv6=listener.family == socket.AF_INET6,
+                         bind_and_activate=False)
+        self.socket.close()
+        self.socket = listener
+        self.server_name, self.server_port = socket.getfqdn(host), port
+        self.setup_environ()
+        self.set_app(application)
+        self.slots = threading.BoundedSemaphore(threads)
+        self.executor = ThreadPoolExecutor(threads, thread_name_prefix='worker', initializer=open_connections)
+        # Start every thread (and so open its connections) before serving
+        barrier = threading.Barrier(threads)
+        for future in [self.executor.submit(barrier.wait) for _ in range(threads)]:
+            future.result()
+
+    def get_request(self):
+        # Wait for a free thread before taking the next connection
+        self.slots.acquire()
+        try:
+            return super().get_request()
+        except BaseException:
+            self.slots.release()
+            raise
+
+    def process_request(self, request, client_address):
+        request.setblocking(True)
+        self.executor.submit(self.process_request_thread, request, client_address)
+
+    def process_request_thread(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            self.slots.release()
+
+    def server_close(self):
+        # Finish the requests in progress; the listening socket stays open in the master
+        self.executor.shutdown(wait=True)
+        connections.close_all()
+
+
+class PreforkServer:
+    """
+    Master process of the pre-forking server.
+
+    The Django application is loaded and warmed up once in the master, which then forks
+    `workers` worker processes sharing its memory copy-on-write (objects created during the
+    warm-up are moved out of the garbage collector's reach with `gc.freeze()`, so collections
+    do not dirty their pages). Workers that exit are replaced.
+
+    Signals:
+    - SIGTERM / SIGINT: graceful stop. Workers finish the requests in progress, for at most
+      `graceful_timeout` seconds.
+    - SIGHUP: graceful rolling restart, e.g. after a deploy. The master checks that the new
+      code loads, re-executes itself (keeping the listening socket open), warms up again,
+      then replaces the workers one at a time: each old worker is stopped gracefully once
+      its replacement is ready, so there is no moment without workers.
+    """
+
+    def __init__(self, listener, application, workers, threads, graceful_timeout, log, check_command):
+        self.listener = listener
+        # Idle workers all wake up on a new connection; those that lose the race must not block
+        self.listener.setblocking(False)
+        self.application = application
+        self.worker_count = workers
+        self.threads = threads
+        self.graceful_timeout = graceful_timeout
+        self.log = log
+        self.check_command = check_command  # Loads and warms up the new code, for SIGHUP
+        self.workers = set()  # Pids of the current workers
+        self.retiring = {}  # Pid of a stopping worker -> deadline to finish its requests
+        self.signals = []
+
+    def handle_signal(self, signum, frame):
+        self.signals.append(signum)
+
+    def run(self, previous_workers=(), retiring=()):
+        """
+        Serve until stopped. `previous_workers` are the workers of the master this process
+        replaced on SIGHUP; they are replaced one at a time. `retiring` are its workers
+        that were already stopping.
+        """
+        for signum in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP):
+            signal.signal(signum, self.handle_signal)
+        gc.freeze()
+
+        for pid in retiring:
+            self.retiring[pid] = time.monotonic() + self.graceful_timeout
+        for pid in previous_workers:
+            if len(self.workers) < self.worker_count:
+                self.spawn()
+            self.retire(pid)
+        while len(self.workers) < self.worker_count:
+            self.spawn()
+        self.log(f"Serving on {self.listener.getsockname()[:2]} with {len(self.workers)} workers "
+                 f"of {self.threads} threads")
+
+        while True:
+            self.reap()
+            while self.signals:
+                signum = self.signals.pop(0)
+                if signum == signal.SIGHUP:
+                    self.reload()
+                else:
+                    return self.stop()
+            while len(self.workers) < self.worker_count:
+                self.spawn()
+            self.kill_overdue()
+            time.sleep(0.1)
+
+    def spawn(self):
+        """
+        Fork a worker and wait until it is ready to accept requests.
+        """
+        ready_read, ready_write = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(ready_read)
+            code = 1
+            try:
+                self.serve(ready_write)
+                code = 0
+            except BaseException:
+                traceback.print_exc()
+            finally:
+                os._exit(code)
+
+        os.close(ready_write)
+        readable, _, _ = select.select([ready_read], [], [], 60)
+        ready = readable and os.read(ready_read, 1) == b'1'
+        os.close(ready_read)
+        if not ready:
+            self.log(f"Worker {pid} did not start")
+        self.workers.add(pid)
+        return pid
+
+    def serve(self, ready_fd):
+        """
+        Body of a worker process.
+        """
+        self.workers, self.retiring = set(), {}
+        signal.signal(signal.SIGHUP, signal.SIG_IGN)  # Rolling restarts are driven by the master
+        server = PoolWSGIServer(self.listener, self.application, self.threads)
+
+        def stop(signum, frame):
+            # `shutdown()` waits for the serving loop, which runs in this (main) thread
+            threading.Thread(target=server.shutdown).start()
+
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, stop)
+        os.write(ready_fd, b'1')
+        os.close(ready_fd)
+        try:
+            server.serve_forever(poll_interval=0.5)
+        finally:
+            server.server_close()
+
+    def retire(self, pid):
+        """
+        Ask a worker to stop once its requests are done.
+        """
+        self.workers.discard(pid)
+        self.retiring[pid] = time.monotonic() + self.graceful_timeout
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            self.retiring.pop(pid)
+
+    def reap(self):
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            if pid in self.workers:
+                self.log(f"Worker {pid} exited unexpectedly (status {status}), starting a new one")
+            self.workers.discard(pid)
+            self.retiring.pop(pid, None)
+
+    def kill_overdue(self):
+        now = time.monotonic()
+        for pid, deadline in list(self.retiring.items()):
+            if now >= deadline:
+                self.log(f"Worker {pid} did not stop within {self.graceful_timeout}s, killing it")
+                try:
+                    os.kill(pid, signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+                self.retiring[pid] = float('inf')  # Reaped like any other exit
+
+    def stop(self):
+        self.log("Stopping workers")
+        for pid in list(self.workers):
+            self.retire(pid)
+        while self.retiring:
+            self.reap()
+            self.kill_overdue()
+            time.sleep(0.1)
+
+    def reload(self):
+        """
+        Re-execute the master with the current code, handing it the socket and the workers.
+        """
+        self.log("Checking the new code before restarting")
+        if os.spawnv(os.P_WAIT, sys.executable, self.check_command):
+            self.log("The new code failed to load; keeping the current workers")
+            return
+        os.set_inheritable(self.listener.fileno(), True)
+        os.environ[LISTENER_FD_VARIABLE] = str(self.listener.fileno())
+        os.environ[WORKERS_VARIABLE] = ','.join(str(pid) for pid in self.workers)
+        os.environ[RETIRING_VARIABLE] = ','.join(str(pid) for pid in self.retiring)
+        self.log("Restarting")
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os.execv(sys.executable, [sys.executable, *sys.orig_argv[1:]])
@@ -0,0 +1,74 @@
+# Import necessary modules
+from rest_framework.renderers import JSONRenderer  # The compact format is JSON too
+
+
+class CompactTaskRenderer(JSONRenderer):
+    """
+    Columnar representation of task lists, selected with
+    `Accept: application/vnd.planner.tasks+json` or `?format=compact`.
+
+    Every list of tasks in the response (the list itself, a page's `results`, a delta's
+    `changed`) becomes an object where field names appear once and each field is a column:
+
+        {"count": 2, "fields": ["id", "title", "status", ...],
+         "columns": [[1, 2], ["Report", "Budget"], [0, 1], ...],
+         "constants": {"owner": 7}, "dictionaries": {"status": ["In queue", "Completed"]}}
+
+    - Fields in `constant_fields` that have the same value in every task are moved to
+      `constants` and have no column.
+    - Fields in `dictionary_fields` are dictionary-encoded: their column holds indexes into
+      the values listed in `dictionaries`.
+
+    Everything else (errors, counts, cursors) is rendered as plain JSON.
+    """
+    media_type = 'application/vnd.planner.tasks+json'
+    format = 'compact'
+    constant_fields = ('owner',)
+    dictionary_fields = ('status',)
+    task_list_keys = ('results', 'changed')  # Keys holding task lists in paginated and delta responses
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return super().render(self.compact(data), accepted_media_type, renderer_context)
+
+    def compact(self, data):
+        if self.is_task_list(data):
+            return self.compact_tasks(data)
+        if isinstance(data, dict):
+            return {key: self.compact_tasks(value) if key in self.task_list_keys and self.is_task_list(value) else value
+                    for key, value in data.items()}
+        return data
+
+    def is_task_list(self, value):
+        return isinstance(value, list) and (not value or isinstance(value[0], dict))
+
+    def compact_tasks(self, tasks):
+        """
+        Convert a list of task dicts (all with the same fields) to columns.
+        """
+        fields = list(tasks[0]) if tasks else []
+        columns = [list(column) for column in zip(*(task.values() for task in tasks))]
+
+        constants = {}
+        for field in self.constant_fields:
+            if field in fields:
+                column = columns[fields.index(field)]
+                if column.count(column[0]) == len(column):
+                    constants[field] = column[0]
+                    del columns[fields.index(field)]
+                    fields.remove(field)
+
+        dictionaries = {}
+        for field in self.dictionary_fields:
+            if field in fields:
+                index = fields.index(field)
+                codes = {}
+                columns[index] = [codes.setdefault(value, len(codes)) for value in columns[index]]
+                dictionaries[field] = list(codes)
+
+        return {
+            "count": len(tasks),
+            "fields": fields,
+            "columns": columns,
+            "constants": constants,
+            "dictionaries": dictionaries,
+        }
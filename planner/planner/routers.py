@@ -0,0 +1,128 @@
+# Import necessary modules
+import contextvars  # Per-request routing state, shared by sync and async code
+import random
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.functional import LazyObject, empty
+
+# Routing state of the request being handled, set by ReplicaRoutingMiddleware
+_routing_state = contextvars.ContextVar('planner_routing_state', default=None)
+
+
+def get_routing_settings():
+    """
+    Return the `DATABASE_ROUTING` setting with its defaults filled in.
+    """
+    config = getattr(settings, 'DATABASE_ROUTING', {})
+    return {
+        'REPLICAS': config.get('REPLICAS', []),
+        'STICKY_SECONDS': config.get('STICKY_SECONDS', 5),
+        'STICKY_CACHE': config.get('STICKY_CACHE', 'default'),
+    }
+
+
+def sticky_key(user_id):
+    return f"replica-sticky:{user_id}"
+
+
+def get_request_user_id(request):
+    """
+    Return the id of the request's user once authentication resolved it, else None.
+
+    DRF and the async views set `request.user` when they authenticate. A lazy user that was
+    not loaded yet is skipped: loading it would query the database from inside the router.
+    """
+    user = request.__dict__.get('user')
+    if isinstance(user, LazyObject) and user._wrapped is empty:
+        return None
+    if user is None or not user.is_authenticated:
+        return None
+    return user.pk
+
+
+class RoutingState:
+    """
+    Where the reads of one request go.
+
+    - Unsafe requests (POST, PUT, PATCH, DELETE) use the primary for every query, so reads
+      made while writing (and inside write transactions) see the writes.
+    - Safe requests read from one replica, chosen once so all their queries see the same
+      snapshot, unless the user wrote recently (read-your-writes stickiness).
+    """
+
+    def __init__(self, request, pinned):
+        self.request = request
+        self.pinned = pinned
+        self.alias = None  # Database alias the reads go to, chosen on the first read
+        self.user_checked = False
+
+    def db_for_read(self):
+        if self.pinned:
+            return DEFAULT_DB_ALIAS
+        if not self.user_checked:
+            user_id = get_request_user_id(self.request)
+            if user_id is not None:
+                self.user_checked = True
+                config = get_routing_settings()
+                if caches[config['STICKY_CACHE']].get(sticky_key(user_id)):
+                    # The user wrote within the last few seconds: replicas may still lag behind
+                    self.pinned = True
+                    return DEFAULT_DB_ALIAS
+        if self.alias is None:
+            replicas = get_routing_settings()['REPLICAS']
+            self.alias = random.choice(replicas) if replicas else DEFAULT_DB_ALIAS
+        return self.alias
+
+
+def begin_request(request):
+    """
+    Start routing the queries of a request. Returns the token for `end_request()`.
+    """
+    pinned = request.method not in ('GET', 'HEAD', 'OPTIONS')
+    return _routing_state.set(RoutingState(request, pinned))
+
+
+def end_request(token):
+    _routing_state.reset(token)
+
+
+def stick_to_primary(user_id):
+    """
+    Send the user's reads to the primary for the next `STICKY_SECONDS`.
+    """
+    config = get_routing_settings()
+    caches[config['STICKY_CACHE']].set(sticky_key(user_id), True, timeout=config['STICKY_SECONDS'])
+
+
+class ReplicaRouter:
+    """
+    Database router sending safe reads to the replicas listed in `DATABASE_ROUTING['REPLICAS']`.
+
+    Writes always go to the primary (`default`). Queries made outside a request (management
+    commands, shells, background threads) use the primary too, as do reads when no replica
+    is configured.
+    """
+
+    def db_for_read(self, model, **hints):
+        state = _routing_state.get()
+        if state is None:
+            return DEFAULT_DB_ALIAS
+        return state.db_for_read()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary
+        databases = {DEFAULT_DB_ALIAS, *get_routing_settings()['REPLICAS']}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas are copies of the primary and get its schema from it
+        if db in get_routing_settings()['REPLICAS']:
+            return False
+        return None
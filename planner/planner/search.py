@@ -0,0 +1,54 @@
+# Import necessary modules
+from django.db import connection
+from django.db.models import Case, Q, Value, When
+from viewer.models import Task  # Import the Task model
+from .listing import task_values, serialize_tasks
+
+
+def fts_query(text):
+    """
+    Turn free text into an FTS5 query: every word must match, as a prefix.
+    Words are quoted, so FTS5 operators and syntax in user input are matched literally.
+    """
+    terms = [term.replace('"', '') for term in text.split()]
+    return ' '.join(f'"{term}"*' for term in terms if term)
+
+
+def search_task_ids(owner_id, text, limit, offset):
+    """
+    Return the ids of the owner's tasks matching `text`, best match first.
+    Titles weigh ten times more than descriptions in the BM25 ranking.
+    """
+    query = fts_query(text)
+    if not query:
+        return []
+
+    if connection.vendor == 'sqlite':
+        # Restricting on the indexed `owner_id` column keeps the match inside the owner's rows
+        sql = (
+            "SELECT rowid FROM viewer_task_fts "
+            "WHERE viewer_task_fts MATCH %s "
+            "ORDER BY bm25(viewer_task_fts, 10.0, 1.0, 0.0), rowid "
+            "LIMIT %s OFFSET %s"
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [f'owner_id:"{int(owner_id)}" AND ({query})', limit, offset])
+            return [row[0] for row in cursor.fetchall()]
+
+    # Other databases: substring search, tasks whose title has every word first
+    tasks = Task.objects.filter(owner_id=owner_id)
+    in_title = Q()
+    for term in text.split():
+        tasks = tasks.filter(Q(title__icontains=term) | Q(description__icontains=term))
+        in_title &= Q(title__icontains=term)
+    tasks = tasks.annotate(title_match=Case(When(in_title, then=Value(0)), default=Value(1)))
+    return list(tasks.order_by('title_match', 'id').values_list('id', flat=True)[offset:offset + limit])
+
+
+def search_tasks(owner_id, text, limit, offset=0):
+    """
+    Return the serialized tasks of the owner matching `text`, in rank order.
+    """
+    ids = search_task_ids(owner_id, text, limit, offset)
+    rows = {row['id']: row for row in task_values(Task.objects.filter(owner_id=owner_id, id__in=ids))}
+    return serialize_tasks(rows[task_id] for task_id in ids if task_id in rows)
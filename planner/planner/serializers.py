@@ -2,6 +2,7 @@
 from django.utils import timezone  # For handling timezone-aware dates
 from rest_framework import serializers  # For creating serializers in Django REST Framework
 from viewer.models import Task  # Import the Task model from the viewer app
+from .events import CREATED, task_event, publish_on_commit  # Task change events for push clients
 
 
 # Define a serializer for the Task model
@@ -18,13 +19,13 @@ class TaskSerializer(serializers.ModelSerializer):
         Specifies the model and fields to include in the serialization.
         """
         model = Task  # The model to serialize
-        fields = ['id', 'title', 'owner', 'description', 'status', 'creation_date']  # Fields to include
-        read_only_fields = ['owner', 'creation_date']  # Fields that cannot be edited by the user
+        fields = ['id', 'title', 'owner', 'description', 'status', 'creation_date', 'version']  # Fields to include
+        read_only_fields = ['owner', 'creation_date', 'version']  # Fields that cannot be edited by the user
 
-    def create(self, validated_data):
+    def build(self, validated_data):
         """
-        Override the default create method to set the owner and creation date.
-        This method is called when creating a new Task instance from validated data.
+        Build an unsaved Task instance from validated data, setting the owner and creation date.
+        Used by `create` and by the batch endpoint, which inserts many tasks with `bulk_create`.
         """
         # Get the request object from the serializer context
         request = self.context.get('request')
@@ -39,5 +40,67 @@ class TaskSerializer(serializers.ModelSerializer):
         # Set the owner to the authenticated user
         validated_data['owner'] = request.user
 
-        # Create and return the new Task instance using the validated data
-        return Task.objects.create(**validated_data)
\ No newline at end of file
+        # Return the new (unsaved) Task instance, stamped as completed if created completed
+        task = Task(**validated_data)
+        task.stamp_completion()
+        return task
+
+    def create(self, validated_data):
+        """
+        Override the default create method to set the owner and creation date.
+        This method is called when creating a new Task instance from validated data.
+        """
+        # Build the Task instance with its owner and creation date
+        task = self.build(validated_data)
+
+        # Save and return the new Task instance
+        task.save(force_insert=True)
+        # Notify the owner's other clients
+        publish_on_commit(task.owner_id, task_event(CREATED, task.revision, data=self.to_representation(task)))
+        return task
+
+
+class TaskImportSerializer(TaskSerializer):
+    """
+    Serializer for tasks read from an NDJSON import.
+    Unlike the TaskSerializer, it keeps the exported `creation_date` of each task.
+    """
+
+    class Meta(TaskSerializer.Meta):
+        read_only_fields = ['owner', 'version']
+        extra_kwargs = {'creation_date': {'required': False}}
+
+
+class TaskOperationSerializer(serializers.Serializer):
+    """
+    Serializer for a single operation of a batch request.
+    - `create` requires `data`.
+    - `update` requires `id` and `data` (partial update).
+    - `delete` requires `id`.
+    """
+    CREATE = 'create'
+    UPDATE = 'update'
+    DELETE = 'delete'
+
+    op = serializers.ChoiceField(choices=[CREATE, UPDATE, DELETE])
+    id = serializers.IntegerField(required=False)
+    data = serializers.DictField(required=False)
+
+    def validate(self, attrs):
+        """
+        Ensure each operation carries the fields it needs.
+        """
+        if attrs['op'] in (self.UPDATE, self.DELETE) and 'id' not in attrs:
+            raise serializers.ValidationError(f"`id` is required for `{attrs['op']}` operations.")
+        if attrs['op'] in (self.CREATE, self.UPDATE) and 'data' not in attrs:
+            raise serializers.ValidationError(f"`data` is required for `{attrs['op']}` operations.")
+        return attrs
+
+
+class TaskBatchSerializer(serializers.Serializer):
+    """
+    Serializer for the body of a batch request: a bounded list of operations.
+    """
+    MAX_OPERATIONS = 1000  # Upper bound on the number of operations in one request
+
+    operations = TaskOperationSerializer(many=True, allow_empty=False, max_length=MAX_OPERATIONS)
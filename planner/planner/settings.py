@@ -50,6 +50,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'planner.middleware.RequestMetricsMiddleware',  # Per-route latency, query and size metrics
+    'planner.middleware.CompressionMiddleware',  # Brotli / gzip for responses above RESPONSE_COMPRESSION['MIN_SIZE']
+    'planner.middleware.ReplicaRoutingMiddleware',  # Sends safe reads to the read replicas
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -74,11 +77,43 @@ CORS_ALLOW_METHODS = [
     'PUT',
 ]
 
+# Response headers the Vue.js frontend reads (revalidation, delta sync, per-status counts)
+CORS_EXPOSE_HEADERS = [
+    'ETag',
+    'X-Task-Revision',
+    'X-Task-Counts',
+]
+
 # REST Framework Configuration
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'accounts.authentication.CachedJWTAuthentication',
     ),
+    # Rates of the sliding window throttles (planner.throttling): `user` per authenticated
+    # user on the API, `anon` per client IP on the login endpoints. None disables a throttle.
+    'DEFAULT_THROTTLE_RATES': {
+        'user': '600/min',
+        'anon': '30/min',
+    },
+}
+
+# Counter store of the sliding window throttles (planner.throttling). The local store is
+# per process; CacheCounterStore with a shared cache alias shares the limits between
+# workers, e.g. {'BACKEND': 'planner.throttling.CacheCounterStore', 'OPTIONS': {'alias': 'default'}}
+THROTTLE_COUNTER_STORE = {
+    'BACKEND': 'planner.throttling.LocalCounterStore',
+    'OPTIONS': {
+        'max_keys': 100000,
+    },
+}
+
+# Threads verifying passwords for the async login endpoint
+PASSWORD_HASHING_THREADS = 4
+
+# Cache of users resolved from JWTs (entries, seconds before a user is reloaded)
+JWT_USER_CACHE = {
+    'MAX_SIZE': 10000,
+    'TTL': 60,
 }
 
 # Simple JWT Settings
@@ -87,6 +122,15 @@ SIMPLE_JWT = {
     'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
     'ROTATE_REFRESH_TOKENS': True,
     'BLACKLIST_AFTER_ROTATION': True,
+    # Rotated refresh tokens are blacklisted in the accounts token blacklist
+    'TOKEN_REFRESH_SERIALIZER': 'accounts.serializers.TokenRefreshSerializer',
+}
+
+# Token blacklist: in-memory filter sizing and how often (seconds) other workers' entries are picked up
+TOKEN_BLACKLIST = {
+    'FILTER_CAPACITY': 1000000,
+    'FILTER_ERROR_RATE': 0.01,
+    'SYNC_INTERVAL': 1.0,
 }
 
 ROOT_URLCONF = 'planner.urls'
@@ -109,6 +153,43 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'planner.wsgi.application'
 
+# Application profile, selected with the PLANNER_PROFILE environment variable:
+# - 'full': everything, including the admin, the browsable API and the template engine.
+# - 'api': only what the JWT-authenticated JSON API needs. The admin, sessions, messages,
+#   static files and templates are left out of INSTALLED_APPS and their middleware (plus
+#   CSRF, which only protects session-authenticated requests) does not run on every
+#   request. Responses are JSON only and /admin/ is not routed; URLs must be exact, as
+#   CommonMiddleware no longer redirects to the URL with a trailing slash.
+# Leaving the apps out does not keep all their code from being imported: DRF's views import
+# its schema generators, which import django.contrib.admindocs and through it the admin and
+# messages. The `api` profile mainly saves per-request middleware work, not cold-start time;
+# the `startup_report` management command measures both and shows such import chains.
+APP_PROFILE = os.environ.get('PLANNER_PROFILE', 'full')
+
+API_PROFILE_EXCLUDED_APPS = [
+    'django.contrib.admin',
+    'django.contrib.sessions',
+    'django.contrib.messages',
+    'django.contrib.staticfiles',
+    'rest_framework',  # Templates and static files of the browsable API
+    'active_link',
+]
+
+API_PROFILE_EXCLUDED_MIDDLEWARE = [
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',  # DRF authenticates API requests itself
+    'django.contrib.messages.middleware.MessageMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+]
+
+if APP_PROFILE == 'api':
+    INSTALLED_APPS = [app for app in INSTALLED_APPS if app not in API_PROFILE_EXCLUDED_APPS]
+    MIDDLEWARE = [middleware for middleware in MIDDLEWARE if middleware not in API_PROFILE_EXCLUDED_MIDDLEWARE]
+    TEMPLATES = []
+    REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'] = ('rest_framework.renderers.JSONRenderer',)
+
 
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
@@ -117,9 +198,167 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Tests use a database file rather than SQLite's default in-memory database, whose
+        # table locks fail concurrent requests instead of making them wait
+        'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
     }
 }
 
+# Database profile, selected with the PLANNER_DB_PROFILE environment variable:
+# - 'default': plain SQLite, one connection per request.
+# - 'production': WAL journaling (readers no longer block on the writer), tuned pragmas
+#   applied on every new connection, persistent connections and `BEGIN IMMEDIATE` write
+#   transactions, so writers queue on `busy_timeout` instead of failing with
+#   "database is locked" when upgrading a read lock.
+# Persistent connections are kept per thread, which suits WSGI workers.
+DATABASE_PROFILE = os.environ.get('PLANNER_DB_PROFILE', 'default')
+
+SQLITE_PRODUCTION_PRAGMAS = [
+    'PRAGMA journal_mode=WAL',
+    # Syncs at checkpoints only: the database stays consistent, but a power loss or an OS crash
+    # can lose the last commits (not an application crash). Use FULL to make every commit durable.
+    'PRAGMA synchronous=NORMAL',
+    'PRAGMA cache_size=-65536',  # 64 MiB page cache per connection
+    'PRAGMA mmap_size=268435456',  # Memory-map up to 256 MiB of the database file
+    'PRAGMA busy_timeout=5000',  # Wait up to 5 s for the write lock
+    'PRAGMA temp_store=MEMORY',
+]
+
+SQLITE_PRODUCTION_PROFILE = {
+    'CONN_MAX_AGE': 600,  # Reuse connections for up to 10 minutes
+    'CONN_HEALTH_CHECKS': True,  # Check reused connections before the first query of a request
+    'OPTIONS': {
+        'init_command': ';'.join(SQLITE_PRODUCTION_PRAGMAS),
+        'transaction_mode': 'IMMEDIATE',
+    },
+}
+
+if DATABASE_PROFILE == 'production':
+    DATABASES['default'].update(SQLITE_PRODUCTION_PROFILE)
+
+# Read replicas: comma separated paths of SQLite copies of the primary database kept up to
+# date by replication (e.g. Litestream or LiteFS), in PLANNER_DB_REPLICAS. Safe (GET) requests
+# read from one of them; writes and reads of users who just wrote go to `default`.
+# Tests read from the test primary instead.
+DATABASE_REPLICAS = [path for path in os.environ.get('PLANNER_DB_REPLICAS', '').split(',') if path]
+
+for index, path in enumerate(DATABASE_REPLICAS, start=1):
+    DATABASES[f'replica{index}'] = {
+        **DATABASES['default'],
+        'NAME': path,
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['planner.routers.ReplicaRouter']
+
+DATABASE_ROUTING = {
+    'REPLICAS': [alias for alias in DATABASES if alias != 'default'],
+    'STICKY_SECONDS': 5,  # How long a user's reads stay on the primary after a write
+    'STICKY_CACHE': 'default',  # Use a shared cache when running several processes
+}
+
+# Group commit of task creates, updates and deletes (planner.coalescing), opt-in. Each process
+# gets one writer thread that commits the writes arriving within WINDOW seconds (at most
+# MAX_BATCH) in a single transaction, so concurrent requests share one commit instead of
+# queueing on SQLite's write lock. Requests wait up to TIMEOUT seconds for their write, then get
+# 503 Service Unavailable (the write is cancelled if the writer has not started it yet).
+# It pays off when every commit syncs to disk (the default profile, or synchronous=FULL); with
+# the production profile's WAL and synchronous=NORMAL commits are cheap and a single writer
+# thread can be slower. Compare with the `benchmark_database --coalesce` management command.
+WRITE_COALESCING = {
+    'ENABLED': False,
+    'WINDOW': 0.002,
+    'MAX_BATCH': 64,
+    'TIMEOUT': 30,
+}
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+# The `tasks` cache holds per-user task list responses, keyed by the user's revision read
+# from the database, so a per-process cache never serves stale lists; a shared backend
+# (Redis, Memcached) only raises the hit ratio when several workers serve the API.
+# MAX_ENTRIES bounds its size (LRU eviction) and TIMEOUT is the TTL of each entry in seconds.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'tasks': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'planner-tasks',
+        'TIMEOUT': 300,
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
+    },
+}
+
+TASK_LIST_CACHE = 'tasks'
+
+# Task creation with an `Idempotency-Key` header (planner.idempotency). Keys and responses are
+# stored in the database, so every worker process recognises a retry, and kept for TIMEOUT
+# seconds (`purge_idempotency_keys` deletes them afterwards). A request holds its key for at most
+# LOCK_TIMEOUT seconds, which must be well above WRITE_COALESCING['TIMEOUT']: a request whose claim
+# is taken over rolls its task back. A concurrent duplicate gets 409 Conflict with Retry-After.
+IDEMPOTENCY = {
+    'TIMEOUT': 86400,
+    'LOCK_TIMEOUT': 120,
+}
+
+# Per-user task statistics shown on the dashboard (viewer.models.TaskStats): the number of tasks
+# per creation day is kept for the last DAYS days only.
+TASK_STATS = {
+    'DAYS': 365,
+}
+
+# Archival of completed tasks (`archive_tasks` command): tasks completed more than AGE_DAYS ago
+# (by `Task.completed_at`, not by creation date) move to the archive table, BATCH_SIZE per
+# transaction with PAUSE seconds between batches. Archived tasks are listed with
+# `?include_archived=true|only`.
+# Tombstones of deleted and archived tasks are purged after TOMBSTONE_DAYS (`purge_tombstones`
+# command); `?since=` deltas from before a purge answer 410 Gone and the client refetches.
+TASK_ARCHIVE = {
+    'AGE_DAYS': 90,
+    'BATCH_SIZE': 1000,
+    'PAUSE': 0.1,
+    'TOMBSTONE_DAYS': 30,
+}
+
+# Push of task changes over Server-Sent Events (/api/async/tasks/events/, ASGI only: under
+# WSGI the endpoints answer 501 Not Implemented, as every stream would hold a worker thread).
+# The in-process broker only reaches clients connected to the process that made the change;
+# with several workers use {'BACKEND': 'planner.events.DatabaseBroker', 'OPTIONS': {'interval': 1.0}},
+# which polls each streaming user's revision instead. HEARTBEAT is the idle time (seconds)
+# before a keep-alive comment, MAX_DURATION the lifetime of a stream before clients reconnect,
+# TICKET_TTL the validity (seconds) of the tickets opening a stream.
+TASK_EVENTS = {
+    'BACKEND': 'planner.events.InProcessBroker',
+    'OPTIONS': {
+        'queue_size': 1000,
+    },
+    'HEARTBEAT': 15,
+    'MAX_DURATION': 3600,
+    'TICKET_TTL': 30,
+}
+
+# Request metrics served on /api/metrics/ (Prometheus text format). ALLOWED_IPS lists the
+# scrapers allowed to read them (None allows everyone); MAX_SERIES bounds the number of
+# (route, method) series kept in memory.
+METRICS = {
+    'ALLOWED_IPS': ['127.0.0.1', '::1'],
+    'MAX_SERIES': 1000,
+}
+
+# Compression of non-streaming responses (planner.middleware.CompressionMiddleware). Responses
+# smaller than MIN_SIZE bytes are sent uncompressed; brotli is used when the `brotli` package
+# is installed and the client accepts it, gzip otherwise.
+RESPONSE_COMPRESSION = {
+    'MIN_SIZE': 1024,
+    'GZIP_LEVEL': 6,
+    'BROTLI_QUALITY': 5,
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
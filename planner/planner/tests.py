@@ -0,0 +1,324 @@
+# Import necessary modules
+import base64
+import datetime
+import json
+import threading
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.db import IntegrityError, connection
+from django.conf import settings
+from django.test import AsyncClient, RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from viewer.models import Task, DeletedTask, IdempotencyKey, TaskStats, TaskSyncState
+from .coalescing import WriteCoalescer, WriteTimeout
+from .idempotency import IdempotencyConflict, idempotency_store
+from .throttling import UserRateThrottle, get_counter_store
+
+
+def authenticated_client(user):
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}')
+    return client
+
+
+class TaskAPITestMixin:
+    """
+    A user with 25 tasks, spread over two statuses and five days, and a client logged in as them.
+    """
+
+    def setUp(self):
+        for cache in caches.all():
+            cache.clear()
+        get_counter_store().clear()
+        self.user = User.objects.create_user('owner', password='password')
+        self.client = authenticated_client(self.user)
+        for number in range(25):
+            Task.objects.create(
+                title=f'Task {number}', owner=self.user, description='Description',
+                status=(Task.INQU, Task.CMPL)[number % 2], creation_date=datetime.date(2024, 1, 1 + number % 5),
+            )
+
+    def create(self, title='New task', client=None, **extra):
+        return (client or self.client).post('/api/tasks/create/', {
+            'title': title, 'description': 'Description', 'status': Task.INQU,
+        }, format='json', **extra)
+
+
+class KeysetPaginationTests(TaskAPITestMixin, TestCase):
+
+    def walk(self, url):
+        ids = []
+        while url:
+            page = self.client.get(url).json()
+            ids += [task['id'] for task in page['results']]
+            url = page['next']
+        return ids
+
+    def test_pages_follow_every_ordering(self):
+        tasks = list(Task.objects.filter(owner=self.user))
+        keys = {
+            'id': lambda task: task.id,
+            'creation_date': lambda task: (task.creation_date, task.id),
+            'status': lambda task: (Task.get_status_rank(task.status), task.id),
+        }
+        for field, key in keys.items():
+            for ordering in (field, '-' + field):
+                expected = [task.id for task in sorted(tasks, key=key, reverse=ordering.startswith('-'))]
+                self.assertEqual(self.walk(f'/api/tasks/?page_size=4&ordering={ordering}'), expected, ordering)
+
+    def test_status_ordering_follows_the_workflow(self):
+        Task.objects.create(title='Postponed', owner=self.user, description='Description', status=Task.PSPD,
+                            creation_date=datetime.date(2024, 1, 1))
+        statuses = [task['status'] for task in self.client.get('/api/tasks/?ordering=status').json()]
+        self.assertEqual(list(dict.fromkeys(statuses)), [Task.INQU, Task.CMPL, Task.PSPD])
+
+    def test_tampered_cursors_are_not_found(self):
+        cursors = [
+            'not base64',
+            base64.urlsafe_b64encode(b'not json').decode(),
+            base64.urlsafe_b64encode(json.dumps({'o': 'id', 'v': 1, 'k': 1}).encode()).decode(),
+            base64.urlsafe_b64encode(json.dumps({'o': 'creation_date', 'v': 'not a date', 'k': 1}).encode()).decode(),
+            base64.urlsafe_b64encode(json.dumps({'o': 'creation_date', 'v': [1], 'k': 1}).encode()).decode(),
+        ]
+        for cursor in cursors:
+            response = self.client.get('/api/tasks/', {'cursor': cursor, 'ordering': 'creation_date'})
+            self.assertEqual(response.status_code, 404, cursor)
+
+    def test_counts_are_sent_with_every_listing(self):
+        expected = {Task.INQU: 13, Task.PRGR: 0, Task.CMPL: 12, Task.PSPD: 0}
+        for url in ('/api/tasks/', '/api/tasks/?status=Completed', '/api/tasks/?page_size=5'):
+            response = self.client.get(url)
+            self.assertEqual(json.loads(response['X-Task-Counts']), expected, url)
+            # Served from the cache the second time
+            self.assertEqual(json.loads(self.client.get(url)['X-Task-Counts']), expected, url)
+
+
+class ConditionalListingTests(TaskAPITestMixin, TestCase):
+
+    def test_unchanged_listing_is_not_modified(self):
+        response = self.client.get('/api/tasks/')
+        response = self.client.get('/api/tasks/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_write_changes_the_etag(self):
+        etag = self.client.get('/api/tasks/')['ETag']
+        self.create()
+        response = self.client.get('/api/tasks/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(len(response.json()), 26)
+
+    def test_delta_lists_changes_and_deletions(self):
+        revision = int(self.client.get('/api/tasks/')['X-Task-Revision'])
+        created = self.create().json()
+        deleted = Task.objects.filter(owner=self.user).first()
+        self.client.delete(f'/api/tasks/delete/{deleted.pk}/')
+
+        delta = self.client.get(f'/api/tasks/?since={revision}').json()
+        self.assertEqual([task['id'] for task in delta['changed']], [created['id']])
+        self.assertEqual(delta['deleted'], [deleted.pk])
+        self.assertEqual(delta['revision'], TaskSyncState.current_revision(self.user.pk))
+
+    def test_delta_from_before_purged_tombstones_requires_resync(self):
+        revision = int(self.client.get('/api/tasks/')['X-Task-Revision'])
+        self.client.delete(f'/api/tasks/delete/{Task.objects.filter(owner=self.user).first().pk}/')
+        DeletedTask.purge(timezone.now() + datetime.timedelta(seconds=1), 100)
+
+        response = self.client.get(f'/api/tasks/?since={revision}')
+        self.assertEqual(response.status_code, 410)
+        self.assertTrue(response.json()['resync'])
+
+
+class AsyncListingTests(TaskAPITestMixin, TestCase):
+    """
+    The async endpoint lists tasks with the same code as the synchronous one.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.authorization = f'Bearer {RefreshToken.for_user(self.user).access_token}'
+
+    def async_get(self, url, headers=None):
+        return async_to_sync(AsyncClient().get)(url, headers={'Authorization': self.authorization, **(headers or {})})
+
+    def test_filters_pages_and_counts(self):
+        query = '?status=Completed&ordering=-creation_date&page_size=5'
+        expected = self.client.get('/api/tasks/' + query)
+        response = self.async_get('/api/async/tasks/' + query)
+        self.assertEqual(response.json()['results'], expected.json()['results'])
+        self.assertEqual(response['X-Task-Counts'], expected['X-Task-Counts'])
+
+    def test_unchanged_listing_is_not_modified(self):
+        etag = self.async_get('/api/async/tasks/')['ETag']
+        response = self.async_get('/api/async/tasks/', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+
+    def test_delta(self):
+        revision = int(self.async_get('/api/async/tasks/')['X-Task-Revision'])
+        created = self.create().json()
+        delta = self.async_get(f'/api/async/tasks/?since={revision}').json()
+        self.assertEqual([task['id'] for task in delta['changed']], [created['id']])
+
+
+class ConditionalUpdateTests(TaskAPITestMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.task = Task.objects.filter(owner=self.user).first()
+
+    def test_update_of_the_current_version(self):
+        response = self.client.patch(f'/api/tasks/{self.task.pk}/', {'title': 'Changed'}, format='json',
+                                     HTTP_IF_MATCH='"1"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['ETag'], '"2"')
+        self.assertEqual(response.json()['title'], 'Changed')
+
+    def test_update_of_a_stale_version_fails(self):
+        self.client.patch(f'/api/tasks/{self.task.pk}/', {'title': 'First'}, format='json', HTTP_IF_MATCH='"1"')
+        response = self.client.patch(f'/api/tasks/{self.task.pk}/', {'title': 'Second'}, format='json',
+                                     HTTP_IF_MATCH='"1"')
+        self.assertEqual(response.status_code, 412)
+        self.assertEqual(response['ETag'], '"2"')
+        self.assertEqual(Task.objects.get(pk=self.task.pk).title, 'First')
+
+    def test_failed_update_keeps_the_revision(self):
+        revision = TaskSyncState.current_revision(self.user.pk)
+        self.client.patch(f'/api/tasks/{self.task.pk}/', {'title': 'Stale'}, format='json', HTTP_IF_MATCH='"9"')
+        self.assertEqual(TaskSyncState.current_revision(self.user.pk), revision)
+
+    def test_status_change_moves_the_statistics(self):
+        TaskStats.rebuild(owner_ids=[self.user.pk])
+        self.client.patch(f'/api/tasks/{self.task.pk}/', {'status': Task.PSPD}, format='json')
+        by_status = TaskStats.objects.get(owner=self.user).as_dict()['by_status']
+        self.assertEqual(by_status, {Task.INQU: 12, Task.PRGR: 0, Task.CMPL: 12, Task.PSPD: 1})
+
+    def test_update_of_a_missing_task(self):
+        response = self.client.patch('/api/tasks/999999/', {'title': 'Changed'}, format='json', HTTP_IF_MATCH='"1"')
+        self.assertEqual(response.status_code, 404)
+
+
+class IdempotentCreationTests(TaskAPITestMixin, TransactionTestCase):
+
+    def test_retry_replays_the_response(self):
+        first = self.create('Once', HTTP_IDEMPOTENCY_KEY='retry')
+        retry = self.create('Once', HTTP_IDEMPOTENCY_KEY='retry')
+        self.assertEqual(retry.status_code, 201)
+        self.assertEqual(retry.json(), first.json())
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(Task.objects.filter(title='Once').count(), 1)
+
+    def test_concurrent_retries_create_one_task(self):
+        responses = []
+
+        def post():
+            # Each thread has its own client and database connection
+            responses.append(self.create('Raced', client=authenticated_client(self.user), HTTP_IDEMPOTENCY_KEY='race'))
+            connection.close()
+
+        threads = [threading.Thread(target=post) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        # Retries arriving while the first request runs are told to come back later
+        created = [response for response in responses if response.status_code == 201]
+        conflicts = [response for response in responses if response.status_code == 409]
+        self.assertEqual(len(created) + len(conflicts), 6)
+        self.assertEqual(len({response.json()['id'] for response in created}), 1)
+        self.assertTrue(all(response['Retry-After'] for response in conflicts))
+        self.assertEqual(Task.objects.filter(title='Raced').count(), 1)
+
+    def test_invalid_request_releases_the_key(self):
+        response = self.client.post('/api/tasks/create/', {'title': ''}, format='json', HTTP_IDEMPOTENCY_KEY='fix')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+    def test_claim_taken_over_cannot_complete(self):
+        claim, _ = idempotency_store.begin(self.user.pk, 'slow', 'fingerprint')
+        IdempotencyKey.objects.update(expires_at=timezone.now())
+        takeover, _ = idempotency_store.begin(self.user.pk, 'slow', 'fingerprint')
+        with self.assertRaises(IdempotencyConflict):
+            idempotency_store.complete(claim, 201, {})
+        idempotency_store.complete(takeover, 201, {})
+        # A completed claim is kept
+        idempotency_store.release(takeover)
+        self.assertEqual(idempotency_store.begin(self.user.pk, 'slow', 'fingerprint'), (None, (201, {})))
+
+
+@override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': {'user': '3/min', 'anon': None}})
+class SlidingWindowThrottleTests(TaskAPITestMixin, TestCase):
+
+    def test_requests_over_the_rate_are_rejected(self):
+        responses = [self.client.get('/api/tasks/') for _ in range(4)]
+        self.assertEqual([response.status_code for response in responses], [200, 200, 200, 429])
+        self.assertIn('Retry-After', responses[-1])
+
+    def test_previous_window_slides_out(self):
+        request = RequestFactory().get('/api/tasks/')
+        request.user = self.user
+
+        def allowed(now):
+            throttle = UserRateThrottle()
+            throttle.timer = lambda: now
+            return throttle.allow_request(request, None)
+
+        # Three requests at the start of a one minute window use up the rate
+        self.assertEqual([allowed(600.0) for _ in range(4)], [True, True, True, False])
+        # Halfway through the next window, half of them still count
+        self.assertEqual([allowed(690.0) for _ in range(3)], [True, True, False])
+        # Once the window of those requests has slid out, none do
+        self.assertEqual([allowed(780.0) for _ in range(3)], [True, True, True])
+
+
+class WriteCoalescerTests(TransactionTestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('owner', password='password')
+        self.coalescer = WriteCoalescer(window=0.05)
+
+    def tearDown(self):
+        self.coalescer.close()
+
+    def create(self, title):
+        return Task.objects.create(title=title, owner=self.user, description='Description', status=Task.INQU,
+                                   creation_date=datetime.date(2024, 1, 1)).pk
+
+    def fail(self):
+        self.create('Failed')
+        raise IntegrityError('Rolled back')
+
+    def test_failed_write_only_rolls_back_itself(self):
+        futures = [self.coalescer.submit(self.create, 'First'), self.coalescer.submit(self.fail),
+                   self.coalescer.submit(self.create, 'Second')]
+        self.assertTrue(futures[0].result(5))
+        with self.assertRaises(IntegrityError):
+            futures[1].result(5)
+        self.assertTrue(futures[2].result(5))
+
+        self.assertEqual(self.coalescer.stats(), {'batches': 1, 'writes': 3})
+        self.assertEqual(sorted(Task.objects.values_list('title', flat=True)), ['First', 'Second'])
+
+    @override_settings(WRITE_COALESCING={'ENABLED': True, 'TIMEOUT': 0.2})
+    def test_timed_out_write_is_cancelled_unless_started(self):
+        release = threading.Event()
+
+        def slow():
+            release.wait(5)
+            return self.create('Started')
+
+        with self.assertRaises(WriteTimeout) as started:
+            self.coalescer.run(slow)
+        self.assertTrue(started.exception.started)
+        # Queued behind the slow write
+        with self.assertRaises(WriteTimeout) as queued:
+            self.coalescer.run(self.create, 'Queued')
+        self.assertFalse(queued.exception.started)
+
+        release.set()
+        self.coalescer.close()
+        self.assertEqual(list(Task.objects.values_list('title', flat=True)), ['Started'])
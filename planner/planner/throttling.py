@@ -0,0 +1,185 @@
+# Import necessary modules
+import threading  # Protects the local counter store
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+from rest_framework import throttling
+from rest_framework.settings import api_settings  # Throttle rates
+
+
+class LocalCounterStore:
+    """
+    In-process counter store. Keeps two counters (current and previous window) per key
+    and at most `max_keys` keys, evicting the least recently used ones.
+    Limits are per process; use CacheCounterStore to share them between workers.
+    """
+
+    def __init__(self, max_keys=100000):
+        self.max_keys = max_keys
+        self.entries = OrderedDict()  # key -> [window, current count, previous count]
+        self.lock = threading.Lock()
+
+    def roll(self, entry, window):
+        # Move the counters forward to `window`
+        if entry[0] == window - 1:
+            entry[:] = [window, 0, entry[1]]
+        elif entry[0] != window:
+            entry[:] = [window, 0, 0]
+
+    def counts(self, key, window):
+        """
+        Return the `(previous, current)` window counts of a key.
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return 0, 0
+            entry = list(entry)
+            self.roll(entry, window)
+            return entry[2], entry[1]
+
+    def incr(self, key, window, duration):
+        """
+        Count one request in the current window of a key.
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                entry = self.entries[key] = [window, 0, 0]
+            self.roll(entry, window)
+            entry[1] += 1
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_keys:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+class CacheCounterStore:
+    """
+    Counter store in a Django cache. With a shared backend (Redis, Memcached) the limits
+    are shared by all worker processes; `add` and `incr` are atomic there.
+    """
+
+    def __init__(self, alias='default'):
+        self.alias = alias
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def counts(self, key, window):
+        previous_key, current_key = f"{key}:{window - 1}", f"{key}:{window}"
+        values = self.cache.get_many([previous_key, current_key])
+        return values.get(previous_key, 0), values.get(current_key, 0)
+
+    def incr(self, key, window, duration):
+        current_key = f"{key}:{window}"
+        # Each counter only has to outlive the window after its own
+        if self.cache.add(current_key, 1, timeout=duration * 2):
+            return
+        try:
+            self.cache.incr(current_key)
+        except ValueError:
+            # The counter expired between `add` and `incr`
+            self.cache.add(current_key, 1, timeout=duration * 2)
+
+    def clear(self):
+        self.cache.clear()
+
+
+_counter_store = None
+_counter_store_lock = threading.Lock()
+
+
+def get_counter_store():
+    """
+    Return the counter store configured by the `THROTTLE_COUNTER_STORE` setting.
+    """
+    global _counter_store
+    if _counter_store is None:
+        with _counter_store_lock:
+            if _counter_store is None:
+                config = getattr(settings, 'THROTTLE_COUNTER_STORE', {})
+                backend = import_string(config.get('BACKEND', 'planner.throttling.LocalCounterStore'))
+                _counter_store = backend(**config.get('OPTIONS', {}))
+    return _counter_store
+
+
+class SlidingWindowThrottleMixin:
+    """
+    Replaces the request history of DRF's SimpleRateThrottle with a sliding window counter.
+
+    The number of requests in the last `duration` seconds is estimated from two fixed-size
+    counters: the current window's count plus the previous window's count weighted by the
+    part of it still inside the sliding window. A check costs one read and one increment,
+    whatever the configured rate.
+    """
+
+    def get_rate(self):
+        """
+        Return the rate of the throttle's scope from the current settings. DRF reads the
+        rates once, at import time, which would ignore settings overridden later.
+        """
+        self.THROTTLE_RATES = api_settings.DEFAULT_THROTTLE_RATES
+        return super().get_rate()
+
+    def allow_request(self, request, view):
+        """
+        Implement the check to see if the request should be throttled.
+        """
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        self.now = self.timer()
+        self.window = int(self.now // self.duration)
+        self.elapsed = self.now - self.window * self.duration
+        self.previous, self.current = get_counter_store().counts(self.key, self.window)
+
+        if self.estimate() >= self.num_requests:
+            return self.throttle_failure()
+        return self.throttle_success()
+
+    def estimate(self):
+        # Requests in the sliding window ending now
+        return self.previous * (1 - self.elapsed / self.duration) + self.current
+
+    def throttle_success(self):
+        """
+        Count the request in the current window.
+        """
+        get_counter_store().incr(self.key, self.window, self.duration)
+        return True
+
+    def wait(self):
+        """
+        Returns the recommended next request time in seconds.
+        """
+        remaining = self.duration - self.elapsed
+        if self.current >= self.num_requests:
+            # Wait for the next window, then for the current count to slide out enough
+            return remaining + self.duration * (1 - self.num_requests / self.current)
+        if self.previous:
+            # Wait for enough of the previous window to slide out
+            return max(0.0, self.duration * (1 - (self.num_requests - self.current) / self.previous) - self.elapsed)
+        return remaining
+
+
+class UserRateThrottle(SlidingWindowThrottleMixin, throttling.UserRateThrottle):
+    """
+    Limits the rate of API calls that may be made by a given user (sliding window counter).
+    """
+
+
+class AnonRateThrottle(SlidingWindowThrottleMixin, throttling.AnonRateThrottle):
+    """
+    Limits the rate of API calls that may be made by an anonymous user (sliding window counter).
+    """
@@ -0,0 +1,82 @@
+# Import necessary modules
+from django.utils.http import parse_etags  # For conditional updates (`If-Match`)
+from rest_framework import status  # Provides HTTP status codes
+from viewer.models import Task
+from .events import UPDATED, DELETED, task_event, publish_on_commit  # Task change events for push clients
+from .listing import TASK_FIELDS, serialize_tasks
+from .serializers import TaskSerializer  # Validation of the incoming task data
+
+
+def task_etag(version):
+    """
+    Build the ETag of a single task from its version.
+    """
+    return '"%s"' % version
+
+
+def parse_if_match(header):
+    """
+    Return the task versions listed in an `If-Match` header, or None when the update is
+    unconditional (no header, or `*`). Malformed ETags never match.
+
+    Weak ETags are accepted: the compression middleware weakens the ETag of compressed
+    responses, and a version names the same task state whatever the content coding.
+    """
+    if header is None:
+        return None
+    etags = parse_etags(header)
+    if '*' in etags:
+        return None
+    versions = set()
+    for etag in etags:
+        try:
+            versions.add(int(etag.removeprefix('W/').strip('"')))
+        except ValueError:
+            pass
+    return versions
+
+
+def update_task(owner_id, task_id, data, partial, if_match=None):
+    """
+    Validate `data` and write it to the owner's task with one conditional `UPDATE` of the
+    changed columns (see `Task.update_if_version`), without reading the task beforehand.
+
+    Returns `(status, data, etag)`:
+    - 200 with the updated task,
+    - 400 with the validation errors,
+    - 404 if the owner has no such task,
+    - 412 with the current task if it changed since the version given in `If-Match`.
+    """
+    serializer = TaskSerializer(data=data, partial=partial)
+    if not serializer.is_valid():
+        return status.HTTP_400_BAD_REQUEST, serializer.errors, None
+
+    row, updated = Task.update_if_version(task_id, owner_id, serializer.validated_data, (*TASK_FIELDS, 'revision'),
+                                          versions=parse_if_match(if_match))
+    if row is None:
+        return status.HTTP_404_NOT_FOUND, {"error": "Task not found or unauthorized"}, None
+
+    task = serialize_tasks([{field: row[field] for field in TASK_FIELDS}])[0]
+    if not updated:
+        error = {"error": "Task was modified since the version in If-Match", "task": task}
+        return status.HTTP_412_PRECONDITION_FAILED, error, task_etag(row['version'])
+
+    # Notify the owner's other clients
+    publish_on_commit(owner_id, task_event(UPDATED, row['revision'], data=task))
+    return status.HTTP_200_OK, task, task_etag(row['version'])
+
+
+def delete_task(owner_id, task_id):
+    """
+    Delete the owner's task with a single `DELETE` (see `Task.delete_if_owned`), leaving a
+    tombstone for delta sync.
+
+    Returns `(status, data)`: 204 with a success message, or 404 if the owner has no such task.
+    """
+    revision = Task.delete_if_owned(task_id, owner_id)
+    if revision is None:
+        return status.HTTP_404_NOT_FOUND, {"error": "Task not found or unauthorized"}
+
+    # Notify the owner's other clients
+    publish_on_commit(owner_id, task_event(DELETED, revision, task_id=task_id))
+    return status.HTTP_204_NO_CONTENT, {"message": "Task deleted successfully"}
@@ -14,16 +14,35 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
-from django.contrib import admin
+from django.apps import apps
 from django.urls import path, include
 
-from .views import TaskCreateView, UserTasksView
+from .views import TaskCreateView, UserTasksView, TaskBatchView, TaskExportView, TaskImportView, TaskSearchView
+from .views import MetricsView
+from .async_views import AsyncTaskCreateView, AsyncUserTasksView, AsyncTaskEventsView, AsyncTaskEventsTicketView
 
 urlpatterns = [
-    path('admin/', admin.site.urls),
     path('api/tasks/', UserTasksView.as_view(), name='user-tasks'),
     path('api/tasks/create/', TaskCreateView.as_view(), name='task-create'),
+    path('api/tasks/batch/', TaskBatchView.as_view(), name='task-batch'),
+    path('api/tasks/export/', TaskExportView.as_view(), name='task-export'),
+    path('api/tasks/import/', TaskImportView.as_view(), name='task-import'),
+    path('api/tasks/search/', TaskSearchView.as_view(), name='task-search'),
     path('api/tasks/<int:pk>/', UserTasksView.as_view(), name='user-task-update'),
     path('api/tasks/delete/<int:pk>/', UserTasksView.as_view(), name='user-task-delete'),
+    # Native async versions of the task endpoints, for ASGI deployments
+    path('api/async/tasks/', AsyncUserTasksView.as_view(), name='async-user-tasks'),
+    path('api/async/tasks/create/', AsyncTaskCreateView.as_view(), name='async-task-create'),
+    path('api/async/tasks/<int:pk>/', AsyncUserTasksView.as_view(), name='async-user-task-update'),
+    path('api/async/tasks/delete/<int:pk>/', AsyncUserTasksView.as_view(), name='async-user-task-delete'),
+    path('api/async/tasks/events/', AsyncTaskEventsView.as_view(), name='async-task-events'),  # Server-Sent Events
+    path('api/async/tasks/events/ticket/', AsyncTaskEventsTicketView.as_view(), name='async-task-events-ticket'),
+    path('api/metrics/', MetricsView.as_view(), name='metrics'),  # Prometheus scrape endpoint
     path('api/', include('accounts.urls')),  # Include accounts app API routes
 ]
+
+# The admin is not installed in the API-only settings profile
+if apps.is_installed('django.contrib.admin'):
+    from django.contrib import admin
+
+    urlpatterns.append(path('admin/', admin.site.urls))
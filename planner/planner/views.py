@@ -3,10 +3,54 @@ from rest_framework.permissions import IsAuthenticated  # Ensures only authentic
 from rest_framework.response import Response  # Used to return HTTP responses
 from rest_framework.views import APIView  # Base class for creating API views
 from rest_framework import status  # Provides HTTP status codes
-from rest_framework.throttling import UserRateThrottle  # Rate limiting to prevent abuse
-from rest_framework_simplejwt.authentication import JWTAuthentication  # JWT-based authentication for secure token hand
-from viewer.models import Task  # Import the Task model
+from rest_framework.exceptions import ValidationError  # Invalid query parameters (400 Bad Request)
+from .throttling import UserRateThrottle  # Sliding window rate limiting to prevent abuse
+from accounts.authentication import CachedJWTAuthentication  # JWT authentication with an in-process user cache
+from django.db import transaction  # Used to apply batch operations atomically
+from django.http import StreamingHttpResponse  # For streaming exports
+from django.http import HttpResponse, HttpResponseForbidden  # Plain text metrics responses
+from django.views import View  # Base class of the non-API (metrics) view
+from django.conf import settings
+import hashlib  # For building ETags
+import json  # For parsing NDJSON imports
+from django.utils.http import parse_etags  # For conditional GET (`If-None-Match`)
+from django.utils.cache import patch_vary_headers  # The listing depends on the `Accept` header
+from rest_framework.settings import api_settings  # Default renderers, extended by the compact format
+from viewer.models import Task, TaskSyncState, DeletedTask, TaskStats  # Task model, delta sync bookkeeping and statistics
+from viewer.models import TaskWithArchived  # Tasks and archived tasks as one relation
 from .serializers import TaskSerializer  # Import the TaskSerializer for serializing/deserializing Task objects
+from .serializers import TaskBatchSerializer, TaskOperationSerializer  # Batch request validation
+from .serializers import TaskImportSerializer  # Validation of imported tasks
+from .pagination import TaskKeysetPagination  # Keyset (cursor) pagination for the task list
+from .renderers import CompactTaskRenderer  # Columnar task lists (`?format=compact`)
+from .filters import TaskFilterBackend  # Server-side status / date range filtering
+from .cache import task_list_cache  # Per-user task list cache
+from .listing import TASK_FIELDS, task_values, serialize_tasks, iter_ndjson  # Fast read path bypassing the ModelSerializer
+from .search import search_tasks  # Full-text search over task titles and descriptions
+from rest_framework.pagination import LimitOffsetPagination  # Paging of ranked search results
+from rest_framework.utils.urls import replace_query_param
+from .metrics import request_metrics  # Per-route request metrics recorded by the middleware
+from .events import CREATED, UPDATED, DELETED, task_event, resync_event, publish_on_commit  # Push events
+from .updates import update_task, delete_task  # Conditional (`If-Match`) task updates and deletion
+from .coalescing import WriteTimeout, write_coalescer  # Opt-in group commit of task writes
+from .idempotency import IDEMPOTENCY_KEY_HEADER, MAX_KEY_LENGTH, REPLAYED_HEADER  # Retry-safe task creation
+from .idempotency import IdempotencyConflict, idempotency_store, request_fingerprint
+
+
+def write_timeout_response(timeout):
+    """
+    Return the 503 Service Unavailable response of a write that did not commit in time.
+    """
+    return Response({"detail": timeout.detail}, status=timeout.status_code,
+                    headers={'Retry-After': str(timeout.retry_after)})
+
+
+def idempotency_conflict_response(conflict):
+    """
+    Return the response of a request whose `Idempotency-Key` cannot be used.
+    """
+    headers = {'Retry-After': str(conflict.retry_after)} if conflict.retry_after else None
+    return Response({"detail": conflict.detail}, status=conflict.status_code, headers=headers)
 
 
 class TaskCreateView(APIView):
@@ -15,7 +59,7 @@ class TaskCreateView(APIView):
     Only authenticated users can access this view.
     """
     permission_classes = [IsAuthenticated]  # Ensure the user is authenticated
-    authentication_classes = [JWTAuthentication]  # Use JWT authentication for secure token handling
+    authentication_classes = [CachedJWTAuthentication]  # Use JWT authentication for secure token handling
     throttle_classes = [UserRateThrottle]  # Apply rate limiting to prevent abuse
 
     def post(self, request, *args, **kwargs):
@@ -23,18 +67,69 @@ class TaskCreateView(APIView):
         Handle the creation of a task.
         - Validate the incoming data using the TaskSerializer.
         - Save the task if the data is valid.
-        - Return the created task data or validation errors.
+        - Return the created task data or validation errors, or 503 Service Unavailable if the
+          coalesced write did not commit in time.
+        - With an `Idempotency-Key` header, a retry of the same request returns the original
+          201 response instead of creating the task again (see `planner.idempotency`).
+        """
+        key = request.headers.get(IDEMPOTENCY_KEY_HEADER)
+        if key is None:
+            return self.create(request)
+        if not key or len(key) > MAX_KEY_LENGTH:
+            raise ValidationError({"detail": f"{IDEMPOTENCY_KEY_HEADER} must be 1 to {MAX_KEY_LENGTH} characters."})
+
+        fingerprint = request_fingerprint(request)
+        try:
+            claim, stored = idempotency_store.begin(request.user.pk, key, fingerprint)
+        except IdempotencyConflict as conflict:
+            return idempotency_conflict_response(conflict)
+        if stored is not None:
+            # A retry: answer with the original response without touching the task table
+            status_code, data = stored
+            return Response(data, status=status_code, headers={REPLAYED_HEADER: 'true'})
+        return self.create(request, claim)
+
+    def create(self, request, claim=None):
+        """
+        Validate the task data and create the task.
+        - With an idempotency `claim`, store the response for retries in the transaction that
+          creates the task, and give the claim up if no task can have been created.
         """
         # Pass the request context to the serializer for additional context (e.g., user information)
         serializer = TaskSerializer(data=request.data, context={'request': request})
 
-        if serializer.is_valid():
-            # Save the task using the serializer's `create` method
-            serializer.save()
-            # Return the serialized task data with a 201 Created status
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
-        # If the data is invalid, return the validation errors with a 400 Bad Request status
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        if not serializer.is_valid():
+            if claim is not None:
+                # Nothing was created: the client may fix the request and send it with the same key
+                idempotency_store.release(claim)
+            # If the data is invalid, return the validation errors with a 400 Bad Request status
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        def save():
+            with transaction.atomic():
+                # Save the task using the serializer's `create` method
+                serializer.save()
+                if claim is not None:
+                    idempotency_store.complete(claim, status.HTTP_201_CREATED, dict(serializer.data))
+
+        try:
+            # Group committed if enabled
+            write_coalescer.run(save)
+        except WriteTimeout as timeout:
+            # A write the writer has started still commits, and completes the claim with it
+            if claim is not None and not timeout.started:
+                idempotency_store.release(claim)
+            return write_timeout_response(timeout)
+        except IdempotencyConflict as conflict:
+            # The claim expired and was taken over: the task was rolled back
+            return idempotency_conflict_response(conflict)
+        except BaseException:
+            # The transaction was rolled back
+            if claim is not None:
+                idempotency_store.release(claim)
+            raise
+        # Return the serialized task data with a 201 Created status
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
 
 
 class UserTasksView(APIView):
@@ -43,71 +138,182 @@ class UserTasksView(APIView):
     Only authenticated users can access this view.
     """
     permission_classes = [IsAuthenticated]  # Ensure the user is authenticated
-    authentication_classes = [JWTAuthentication]  # Use JWT authentication for secure token handling
+    authentication_classes = [CachedJWTAuthentication]  # Use JWT authentication for secure token handling
     throttle_classes = [UserRateThrottle]  # Apply rate limiting to prevent abuse
+    pagination_class = TaskKeysetPagination  # Opt-in cursor pagination (`?cursor=` / `?page_size=`)
+    filter_backend = TaskFilterBackend  # Status / date range filtering (`?status=`, `?date_from=`, `?date_to=`)
+    renderer_classes = [*api_settings.DEFAULT_RENDERER_CLASSES, CompactTaskRenderer]  # JSON or compact columns
+
+    since_query_param = 'since'  # Delta sync: only return changes after this revision
+    include_archived_query_param = 'include_archived'  # List archived tasks too (`true`) or only them (`only`)
+    counts_header = 'X-Task-Counts'  # Per-status counts of the listing, as a JSON object
+
+    def get_representation_key(self, request):
+        """
+        Identify the requested listing: user, endpoint, response format and query string.
+        """
+        key = f"{request.user.pk}:{request.path}:{request.accepted_renderer.format}:{request.GET.urlencode()}"
+        return hashlib.md5(key.encode('utf-8')).hexdigest()[:16]
+
+    def get_etag(self, revision, representation_key):
+        """
+        Build the ETag of a listing from the user's revision and the requested representation.
+        """
+        return '"%s-%s"' % (revision, representation_key)
+
+    def get_delta(self, request, revision):
+        """
+        Return the tasks changed and the task ids deleted since the revision given in `?since=`.
+        """
+        try:
+            since = int(request.query_params[self.since_query_param])
+        except ValueError:
+            return Response({"error": "`since` must be an integer revision"}, status=status.HTTP_400_BAD_REQUEST)
+        if not TaskSyncState.can_sync_from(request.user.pk, since):
+            # Tombstones the client needs were purged: it has to refetch the whole list
+            return Response({"error": "Resync required", "resync": True, "revision": revision},
+                            status=status.HTTP_410_GONE)
+
+        # Both lookups are range scans on the `(owner, revision)` indexes
+        changed = Task.objects.filter(owner=request.user, revision__gt=since).order_by('revision')
+        deleted = DeletedTask.objects.filter(owner=request.user, revision__gt=since).order_by('revision')
+        return Response({
+            "revision": revision,
+            "changed": serialize_tasks(task_values(changed)),
+            "deleted": list(deleted.values_list('task_id', flat=True)),
+        })
+
+    def get_owned_tasks(self, request):
+        """
+        Return the tasks of the logged-in user to list, and whether archived tasks are included.
+        - By default only the (hot) task table is read.
+        - `?include_archived=true` lists tasks and archived tasks together, `?include_archived=only`
+          the archived tasks alone, through the `viewer_task_all` view.
+        """
+        mode = request.query_params.get(self.include_archived_query_param, 'false').lower()
+        if mode in ('false', '0', ''):
+            return Task.objects.filter(owner=request.user), False
+        if mode not in ('true', '1', 'only'):
+            raise ValidationError({self.include_archived_query_param: ["Must be one of: true, false, only."]})
+        if self.since_query_param in request.query_params:
+            raise ValidationError({self.include_archived_query_param: ["Cannot be combined with `since`."]})
+        tasks = TaskWithArchived.objects.filter(owner=request.user)
+        if mode == 'only':
+            tasks = tasks.filter(archived=True)
+        return tasks, True
 
     def get(self, request):
         """
         Retrieve all tasks owned by the logged-in user.
+        - Answer `If-None-Match` with 304 Not Modified when nothing changed since the client's copy.
+        - With `?since=<revision>`, return only the tasks changed and deleted after that revision,
+          or 410 Gone when that revision is older than the kept tombstones.
         - Filter tasks by the `owner` field (which should be the logged-in user).
-        - Serialize the tasks and return them in the response.
+        - With `?include_archived=true|only`, list archived tasks too (flagged with `archived`).
+        - Apply the optional status and date range filters and ordering.
+        - If the client asked for a page, return one keyset-paginated page with a `next` cursor
+          and the per-status counts of the listing.
+        - Send the per-status counts of the listing in the `X-Task-Counts` header of every
+          listing, paginated or not.
+        - Serialize the tasks and return them in the response, as JSON or, with `?format=compact`
+          (or `Accept: application/vnd.planner.tasks+json`), as compact columns.
         """
-        # Fetch tasks owned by the logged-in user
-        tasks = Task.objects.filter(owner=request.user)
-        # Serialize the tasks (many=True indicates a list of tasks)
-        serializer = TaskSerializer(tasks, many=True)
-        # Return the serialized task data with a 200 OK status
-        return Response(serializer.data)
+        key = self.get_representation_key(request)
+        # One primary key lookup tells whether anything changed. The revision is read from
+        # the database rather than any per-process state, so every worker process agrees on it
+        revision = TaskSyncState.current_revision(request.user.pk)
 
-    def patch(self, request, pk):
+        etag = self.get_etag(revision, key)
+        # Weak comparison: compressed responses carry the ETag as weak (`W/"..."`)
+        if etag in [tag.removeprefix('W/') for tag in parse_etags(request.headers.get('If-None-Match', ''))]:
+            response = Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+            patch_vary_headers(response, ('Accept',))
+            return response
+
+        cached = task_list_cache.get(request.user.pk, revision, key)
+        if cached is not None:
+            data, counts = cached
+            response = Response(data)
+            if counts is not None:
+                response[self.counts_header] = counts
+        else:
+            response = self.list(request, revision)
+            if response.status_code == status.HTTP_200_OK:
+                task_list_cache.set(request.user.pk, revision, key,
+                                    (response.data, response.get(self.counts_header)))
+
+        if response.status_code == status.HTTP_200_OK:
+            # Let the client revalidate its copy and continue syncing from this revision
+            response['ETag'] = etag
+            response['X-Task-Revision'] = revision
+        # The representation is negotiated from the `Accept` header
+        patch_vary_headers(response, ('Accept',))
+        return response
+
+    def list(self, request, revision):
         """
-        Allow partial updates to a task.
-        - Fetch the task by ID and ensure it belongs to the logged-in user.
-        - Validate the incoming data and update the task if valid.
-        - Return the updated task data or validation errors.
+        Build the task list response for a GET request.
         """
-        # Fetch the task by ID and ensure it belongs to the logged-in user
-        task = Task.objects.filter(id=pk, owner=request.user).first()
+        # Fetch tasks owned by the logged-in user
+        owned, include_archived = self.get_owned_tasks(request)
 
-        if not task:
-            # If the task is not found or does not belong to the user, return a 404 Not Found error
-            return Response({"error": "Task not found or unauthorized"}, status=status.HTTP_404_NOT_FOUND)
+        if self.since_query_param in request.query_params:
+            return self.get_delta(request, revision)
 
-        # Serialize the task with the incoming data, allowing partial updates
-        serializer = TaskSerializer(task, data=request.data, partial=True)
-        if serializer.is_valid():
-            # Save the updated task
-            serializer.save()
-            # Return the updated task data with a 200 OK status
-            return Response(serializer.data)
+        filter_backend = self.filter_backend()
+        tasks = filter_backend.filter_queryset(request, owned, self)
 
-        # If the data is invalid, return the validation errors with a 400 Bad Request status
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        # Read plain rows instead of model instances; `serialize_tasks` turns them into
+        # the same data the TaskSerializer would produce, without per-field calls
+        rows = tasks.values(*TASK_FIELDS, 'archived') if include_archived else task_values(tasks)
 
-    def put(self, request, pk):
+        # One `GROUP BY` query on the `(owner, status, id)` index
+        counts = filter_backend.get_status_counts(request, owned)
+
+        # Return a single page when pagination was requested
+        paginator = self.pagination_class()
+        page = paginator.paginate_queryset(rows, request, view=self)
+        if page is not None:
+            response = paginator.get_paginated_response(serialize_tasks(page), counts=counts)
+        else:
+            # Sort the full list if an ordering was requested
+            if paginator.ordering_query_param in request.query_params:
+                rows = rows.order_by(*paginator.get_order_by(paginator.get_ordering(request)))
+
+            # Return the serialized task data with a 200 OK status
+            response = Response(serialize_tasks(rows))
+        response[self.counts_header] = json.dumps(counts, separators=(',', ':'))
+        return response
+
+    def update(self, request, pk, partial):
         """
-        Allow full updates to a task.
-        - Fetch the task by ID and ensure it belongs to the logged-in user.
-        - Validate the incoming data and update the task if valid.
-        - Return the updated task data or validation errors.
+        Apply the request data to the task and build the response.
+        - Validate the incoming data.
+        - Write only the changed fields with a single conditional `UPDATE`, restricted to the
+          logged-in user's task and, with an `If-Match` header, to the task versions it lists.
+        - Return the updated task with its version as `ETag`, the validation errors, 404 if
+          the task is not found, or 412 Precondition Failed with the current task if it was
+          modified since.
+        - Return 503 Service Unavailable if the coalesced write did not commit in time.
         """
-        # Fetch the task by ID and ensure it belongs to the logged-in user
-        task = Task.objects.filter(id=pk, owner=request.user).first()
+        try:
+            status_code, data, etag = write_coalescer.run(update_task, request.user.pk, pk, request.data, partial,
+                                                          if_match=request.headers.get('If-Match'))
+        except WriteTimeout as timeout:
+            return write_timeout_response(timeout)
+        return Response(data, status=status_code, headers={'ETag': etag} if etag else None)
 
-        if not task:
-            # If the task is not found or does not belong to the user, return a 404 Not Found error
-            return Response({"error": "Task not found or unauthorized"}, status=status.HTTP_404_NOT_FOUND)
-
-        # Serialize the task with the incoming data for a full update
-        serializer = TaskSerializer(task, data=request.data)
-        if serializer.is_valid():
-            # Save the updated task
-            serializer.save()
-            # Return the updated task data with a 200 OK status
-            return Response(serializer.data)
+    def patch(self, request, pk):
+        """
+        Allow partial updates to a task.
+        """
+        return self.update(request, pk, partial=True)
 
-        # If the data is invalid, return the validation errors with a 400 Bad Request status
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    def put(self, request, pk):
+        """
+        Allow full updates to a task.
+        """
+        return self.update(request, pk, partial=False)
 
     def delete(self, request, pk):
         """
@@ -116,14 +322,296 @@ class UserTasksView(APIView):
         - Delete the task if found and authorized.
         - Return a success message or an error if the task is not found.
         """
-        # Fetch the task by ID and ensure it belongs to the logged-in user
-        task = Task.objects.filter(id=pk, owner=request.user).first()
+        try:
+            status_code, data = write_coalescer.run(delete_task, request.user.pk, pk)
+        except WriteTimeout as timeout:
+            return write_timeout_response(timeout)
+        return Response(data, status=status_code)
+
+
+class TaskBatchView(APIView):
+    """
+    View for applying many create/update/delete operations in a single request.
+    Only authenticated users can access this view.
+    """
+    permission_classes = [IsAuthenticated]  # Ensure the user is authenticated
+    authentication_classes = [CachedJWTAuthentication]  # Use JWT authentication for secure token handling
+    throttle_classes = [UserRateThrottle]  # Apply rate limiting to prevent abuse
+
+    def post(self, request, *args, **kwargs):
+        """
+        Apply a list of operations to the logged-in user's tasks.
+        - Load every task referenced by an update or delete with one ownership-checked query.
+        - Validate each operation with the TaskSerializer.
+        - Apply all valid operations in one transaction using `bulk_create`, `bulk_update` and
+          a single `DELETE`.
+        - Return one result per operation, in request order.
+        """
+        batch = TaskBatchSerializer(data=request.data)
+        if not batch.is_valid():
+            # If the request itself is malformed, return the errors with a 400 Bad Request status
+            return Response(batch.errors, status=status.HTTP_400_BAD_REQUEST)
+        operations = batch.validated_data['operations']
+
+        # Fetch all referenced tasks owned by the logged-in user in a single query
+        ids = {operation['id'] for operation in operations if 'id' in operation}
+        tasks = Task.objects.filter(owner=request.user).in_bulk(ids)
+
+        results = [None] * len(operations)
+        created = []  # (index, task) pairs to insert
+        updated = {}  # task id -> task, for tasks to update
+        updated_fields = set()  # Union of the fields changed by update operations
+        deleted = {}  # task id -> index of the delete operation
+
+        for index, operation in enumerate(operations):
+            op = operation['op']
+
+            if op == TaskOperationSerializer.CREATE:
+                serializer = TaskSerializer(data=operation['data'], context={'request': request})
+                if serializer.is_valid():
+                    created.append((index, serializer.build(serializer.validated_data)))
+                else:
+                    results[index] = {"status": status.HTTP_400_BAD_REQUEST, "errors": serializer.errors}
+                continue
+
+            task = tasks.get(operation['id'])
+            if task is None or operation['id'] in deleted:
+                # The task is missing, not owned by the user, or deleted earlier in the batch
+                results[index] = {"status": status.HTTP_404_NOT_FOUND, "error": "Task not found or unauthorized"}
+                continue
+
+            if op == TaskOperationSerializer.UPDATE:
+                serializer = TaskSerializer(task, data=operation['data'], partial=True)
+                if serializer.is_valid():
+                    # Apply the changes in memory; they are written with `bulk_update` below
+                    for field, value in serializer.validated_data.items():
+                        setattr(task, field, value)
+                    if task.id not in updated:
+                        task.version += 1
+                    updated_fields.update(serializer.validated_data)
+                    if 'status' in serializer.validated_data:
+                        task.stamp_completion()
+                        updated_fields.add('completed_at')
+                    updated[task.id] = task
+                    results[index] = {"status": status.HTTP_200_OK, "data": TaskSerializer(task).data}
+                else:
+                    results[index] = {"status": status.HTTP_400_BAD_REQUEST, "errors": serializer.errors}
+            else:
+                deleted[task.id] = index
+                updated.pop(task.id, None)
+
+        # Apply all changes in a single transaction
+        with transaction.atomic():
+            # Stamp created and updated tasks with consecutive revisions for delta sync
+            stamped = [task for _, task in created] + list(updated.values())
+            if stamped:
+                last = TaskSyncState.next_revision(request.user.id, len(stamped))
+                for revision, task in enumerate(stamped, start=last - len(stamped) + 1):
+                    task.revision = revision
+            if created:
+                Task.objects.bulk_create([task for _, task in created])
+            if updated:
+                Task.objects.bulk_update(list(updated.values()), sorted(updated_fields | {'revision', 'version'}))
+            if deleted:
+                # Leave tombstones before deleting so `?since=` can report the deletions
+                last_deleted = DeletedTask.record(request.user.id, deleted)
+                Task.objects.filter(owner=request.user, id__in=list(deleted)).delete()
+            # Move updated tasks to their new status and day in the user's statistics
+            TaskStats.apply(
+                request.user.id,
+                added=[task.get_stats_key() for task in stamped],
+                removed=[task.get_stored_stats_key() for task in updated.values()]
+                + [tasks[task_id].get_stored_stats_key() for task_id in deleted],
+            )
+
+        # Build the per-operation results
+        for index, task in created:
+            results[index] = {"status": status.HTTP_201_CREATED, "data": TaskSerializer(task).data}
+        for index in deleted.values():
+            results[index] = {"status": status.HTTP_204_NO_CONTENT}
+
+        # Notify the user's other clients of every change, in revision order
+        events = [task_event(CREATED, task.revision, data=results[index]["data"]) for index, task in created]
+        events += [task_event(UPDATED, task.revision, data=TaskSerializer(task).data) for task in updated.values()]
+        if deleted:
+            first_deleted = last_deleted - len(deleted) + 1
+            events += [task_event(DELETED, revision, task_id=task_id)
+                       for revision, task_id in enumerate(deleted, start=first_deleted)]
+        for event in events:
+            publish_on_commit(request.user.pk, event)
+
+        # Return the per-operation results with a 200 OK status
+        return Response({"results": results})
+
+
+class TaskExportView(APIView):
+    """
+    View for exporting all tasks of the logged-in user as newline-delimited JSON.
+    Only authenticated users can access this view.
+    """
+    permission_classes = [IsAuthenticated]  # Ensure the user is authenticated
+    authentication_classes = [CachedJWTAuthentication]  # Use JWT authentication for secure token handling
+    throttle_classes = [UserRateThrottle]  # Apply rate limiting to prevent abuse
+    chunk_size = 2000  # Rows fetched from the database cursor at a time
+
+    def get(self, request):
+        """
+        Stream the user's tasks, one JSON object per line, in constant memory.
+        - Read rows through a cursor (`.iterator()`) instead of loading the whole result.
+        - Encode and send them in chunks while they are read.
+        """
+        rows = task_values(Task.objects.filter(owner=request.user).order_by('id')).iterator(
+            chunk_size=self.chunk_size)
+        response = StreamingHttpResponse(iter_ndjson(rows), content_type='application/x-ndjson')
+        response['Content-Disposition'] = 'attachment; filename="tasks.ndjson"'
+        return response
+
+
+class TaskImportView(APIView):
+    """
+    View for importing tasks from newline-delimited JSON, as produced by the export.
+    Only authenticated users can access this view.
+    """
+    permission_classes = [IsAuthenticated]  # Ensure the user is authenticated
+    authentication_classes = [CachedJWTAuthentication]  # Use JWT authentication for secure token handling
+    throttle_classes = [UserRateThrottle]  # Apply rate limiting to prevent abuse
+    chunk_size = 1000  # Tasks inserted per `bulk_create` / transaction
+    max_reported_errors = 100  # Upper bound on the number of line errors returned
+
+    def post(self, request, *args, **kwargs):
+        """
+        Import tasks from the request body.
+        - Read the body line by line without loading it into memory.
+        - Validate each line with the TaskImportSerializer; invalid lines are reported and skipped.
+        - Insert valid tasks in chunks, each with one `bulk_create` in its own transaction.
+        - Return the number of imported tasks and the line errors.
+        """
+        created = 0
+        error_count = 0
+        errors = []
+        chunk = []
+
+        # `request.stream` is read lazily, so the body is parsed as it arrives
+        stream = request.stream or []
+        for number, line in enumerate(stream, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                item = json.loads(line)
+            except ValueError:
+                item_errors = {"non_field_errors": ["Invalid JSON."]}
+            else:
+                serializer = TaskImportSerializer(data=item, context={'request': request})
+                if serializer.is_valid():
+                    chunk.append(serializer.build(serializer.validated_data))
+                    item_errors = None
+                else:
+                    item_errors = serializer.errors
 
-        if not task:
-            # If the task is not found or does not belong to the user, return a 404 Not Found error
-            return Response({"error": "Task not found or unauthorized"}, status=status.HTTP_404_NOT_FOUND)
+            if item_errors is not None:
+                error_count += 1
+                if len(errors) < self.max_reported_errors:
+                    errors.append({"line": number, "errors": item_errors})
+
+            if len(chunk) >= self.chunk_size:
+                created += self.insert(request.user, chunk)
+                chunk = []
+
+        if chunk:
+            created += self.insert(request.user, chunk)
+
+        response_status = status.HTTP_201_CREATED if created else status.HTTP_400_BAD_REQUEST
+        return Response({"created": created, "error_count": error_count, "errors": errors},
+                        status=response_status)
+
+    def insert(self, user, tasks):
+        """
+        Insert a chunk of tasks in one transaction and return how many were inserted.
+        """
+        with transaction.atomic():
+            # Stamp the tasks with consecutive revisions for delta sync
+            last = TaskSyncState.next_revision(user.id, len(tasks))
+            for revision, task in enumerate(tasks, start=last - len(tasks) + 1):
+                task.revision = revision
+            Task.objects.bulk_create(tasks)
+            TaskStats.apply(user.id, added=[task.get_stats_key() for task in tasks])
+            # Have the user's other clients refetch their list rather than receive one event per task
+            publish_on_commit(user.pk, resync_event())
+        return len(tasks)
+
+
+class TaskSearchPagination(LimitOffsetPagination):
+    """
+    Limit/offset paging for ranked search results (`?limit=` / `?offset=`).
+    """
+    default_limit = 20
+    max_limit = 100
+
+
+class TaskSearchView(APIView):
+    """
+    View for full-text search over the logged-in user's tasks.
+    Only authenticated users can access this view.
+    """
+    permission_classes = [IsAuthenticated]  # Ensure the user is authenticated
+    authentication_classes = [CachedJWTAuthentication]  # Use JWT authentication for secure token handling
+    throttle_classes = [UserRateThrottle]  # Apply rate limiting to prevent abuse
+    pagination_class = TaskSearchPagination
+
+    def get(self, request):
+        """
+        Search the user's tasks by title and description.
+        - `q` holds the search words; every word must match (as a prefix).
+        - Results are ranked by relevance, titles weighing more than descriptions.
+        - Return one page of results with a link to the next page.
+        """
+        text = request.query_params.get('q', '').strip()
+        if not text:
+            return Response({"error": "The `q` parameter is required"}, status=status.HTTP_400_BAD_REQUEST)
+
+        paginator = self.pagination_class()
+        limit = paginator.get_limit(request)
+        offset = paginator.get_offset(request)
+
+        # Fetch one extra result to find out whether there is a next page
+        results = search_tasks(request.user.pk, text, limit + 1, offset)
+        next_link = None
+        if len(results) > limit:
+            next_link = replace_query_param(request.build_absolute_uri(), paginator.limit_query_param, limit)
+            next_link = replace_query_param(next_link, paginator.offset_query_param, offset + limit)
+        return Response({"next": next_link, "results": results[:limit]})
+
+
+class MetricsView(View):
+    """
+    View exposing the request metrics of this process in the Prometheus text format.
+    Only clients from `METRICS['ALLOWED_IPS']` can access this view.
+    """
+
+    def get(self, request):
+        """
+        Render the per-route request metrics, the task list cache and write coalescer counters.
+        """
+        allowed_ips = getattr(settings, 'METRICS', {}).get('ALLOWED_IPS', ['127.0.0.1', '::1'])
+        if allowed_ips is not None and request.META.get('REMOTE_ADDR') not in allowed_ips:
+            return HttpResponseForbidden()
 
-        # Delete the task
-        task.delete()
-        # Return a success message with a 204 No Content status
-        return Response({"message": "Task deleted successfully"}, status=status.HTTP_204_NO_CONTENT)
\ No newline at end of file
+        lines = request_metrics.render()
+        cache_stats = task_list_cache.stats()
+        write_stats = write_coalescer.stats()
+        lines += [
+            '# HELP planner_task_list_cache_hits_total Task list cache hits.',
+            '# TYPE planner_task_list_cache_hits_total counter',
+            f'planner_task_list_cache_hits_total {cache_stats["hits"]}',
+            '# HELP planner_task_list_cache_misses_total Task list cache misses.',
+            '# TYPE planner_task_list_cache_misses_total counter',
+            f'planner_task_list_cache_misses_total {cache_stats["misses"]}',
+            '# HELP planner_write_batches_total Transactions committed by the write coalescer.',
+            '# TYPE planner_write_batches_total counter',
+            f'planner_write_batches_total {write_stats["batches"]}',
+            '# HELP planner_coalesced_writes_total Writes run by the write coalescer.',
+            '# TYPE planner_coalesced_writes_total counter',
+            f'planner_coalesced_writes_total {write_stats["writes"]}',
+        ]
+        return HttpResponse('\n'.join(lines) + '\n', content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from viewer.models import TaskStats
+
+
+class Command(BaseCommand):
+    """
+    Recompute the per-user task statistics from the task table.
+    Use it after changing tasks outside the API (admin bulk actions, raw SQL, restores).
+    """
+    help = "Rebuild the per-user task statistics from scratch."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, action='append', dest='user_ids',
+                            help="Only rebuild the statistics of this user id (repeatable).")
+
+    def handle(self, *args, **options):
+        owners = TaskStats.rebuild(owner_ids=options['user_ids'])
+        self.stdout.write(f"Rebuilt task statistics of {owners} user(s).")
@@ -0,0 +1,67 @@
+# Generated by Django 5.1.15 on 2026-10-18 19:52
+
+from django.db import migrations
+
+# Full-text index over task titles and descriptions (SQLite FTS5, external content).
+# `owner_id` is indexed too, so searches can be restricted to one owner inside the index.
+# Triggers keep the index in sync with every insert, update and delete, including
+# bulk operations that bypass model signals.
+CREATE_FTS = [
+    """
+    CREATE VIRTUAL TABLE viewer_task_fts USING fts5(
+        title, description, owner_id,
+        content='viewer_task', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER viewer_task_fts_insert AFTER INSERT ON viewer_task BEGIN
+        INSERT INTO viewer_task_fts(rowid, title, description, owner_id)
+        VALUES (new.id, new.title, new.description, new.owner_id);
+    END
+    """,
+    """
+    CREATE TRIGGER viewer_task_fts_delete AFTER DELETE ON viewer_task BEGIN
+        INSERT INTO viewer_task_fts(viewer_task_fts, rowid, title, description, owner_id)
+        VALUES ('delete', old.id, old.title, old.description, old.owner_id);
+    END
+    """,
+    """
+    CREATE TRIGGER viewer_task_fts_update AFTER UPDATE OF title, description, owner_id ON viewer_task BEGIN
+        INSERT INTO viewer_task_fts(viewer_task_fts, rowid, title, description, owner_id)
+        VALUES ('delete', old.id, old.title, old.description, old.owner_id);
+        INSERT INTO viewer_task_fts(rowid, title, description, owner_id)
+        VALUES (new.id, new.title, new.description, new.owner_id);
+    END
+    """,
+    # Index the tasks that already exist
+    "INSERT INTO viewer_task_fts(viewer_task_fts) VALUES ('rebuild')",
+]
+
+DROP_FTS = [
+    "DROP TRIGGER IF EXISTS viewer_task_fts_update",
+    "DROP TRIGGER IF EXISTS viewer_task_fts_delete",
+    "DROP TRIGGER IF EXISTS viewer_task_fts_insert",
+    "DROP TABLE IF EXISTS viewer_task_fts",
+]
+
+
+def run_on_sqlite(statements):
+    # FTS5 is SQLite specific; other databases fall back to a LIKE search
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('viewer', '0005_task_sync'),
+    ]
+
+    operations = [
+        migrations.RunPython(run_on_sqlite(CREATE_FTS), run_on_sqlite(DROP_FTS)),
+    ]
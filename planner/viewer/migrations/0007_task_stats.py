@@ -0,0 +1,40 @@
+# Generated by Django 5.1.15 on 2026-10-18 19:58
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+from viewer.models import compute_task_stats
+
+
+def build_stats(apps, schema_editor):
+    # Compute the statistics of the tasks that already exist
+    Task = apps.get_model('viewer', 'Task')
+    TaskStats = apps.get_model('viewer', 'TaskStats')
+    TaskStats.objects.bulk_create(
+        [TaskStats(owner_id=owner_id, **fields) for owner_id, fields in compute_task_stats(Task).items()],
+        batch_size=1000,
+    )
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('viewer', '0006_task_fts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskStats',
+            fields=[
+                ('owner', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('total', models.IntegerField(default=0)),
+                ('in_queue', models.IntegerField(default=0)),
+                ('in_progress', models.IntegerField(default=0)),
+                ('completed', models.IntegerField(default=0)),
+                ('postponed', models.IntegerField(default=0)),
+                ('created_per_day', models.JSONField(default=dict)),
+            ],
+        ),
+        migrations.RunPython(build_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 5.1.15 on 2026-10-18 21:39
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+# Replaces 0007_task_stats, whose backfill uses the live `compute_task_stats` and no longer
+# matches the TaskStats fields of that migration. Databases that applied 0007 are left as
+# they are; the others run this migration instead, which computes the first statistics
+# with the historical models. 0007_task_stats can be deleted once every database is past it.
+
+# Status -> TaskStats field holding the number of tasks with that status
+STATUS_FIELDS = {
+    'In queue': 'in_queue',
+    'In progress': 'in_progress',
+    'Completed': 'completed',
+    'Postponed': 'postponed',
+}
+
+
+def build_stats(apps, schema_editor):
+    # Compute the statistics of the tasks that already exist, with the historical models
+    Task = apps.get_model('viewer', 'Task')
+    TaskStats = apps.get_model('viewer', 'TaskStats')
+    stats = {}
+    tasks = Task.objects.all()
+    for owner_id, status, count in tasks.values_list('owner_id', 'status').annotate(count=Count('id')).order_by():
+        row = stats.setdefault(owner_id, {'total': 0, **{field: 0 for field in STATUS_FIELDS.values()},
+                                          'created_per_day': {}})
+        row['total'] += count
+        if status in STATUS_FIELDS:
+            row[STATUS_FIELDS[status]] += count
+    for owner_id, date, count in tasks.values_list('owner_id', 'creation_date').annotate(count=Count('id')).order_by():
+        stats[owner_id]['created_per_day'][date.isoformat()] = count
+    TaskStats.objects.bulk_create(
+        [TaskStats(owner_id=owner_id, **fields) for owner_id, fields in stats.items()],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    replaces = [('viewer', '0007_task_stats')]
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('viewer', '0006_task_fts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskStats',
+            fields=[
+                ('owner', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('total', models.IntegerField(default=0)),
+                ('in_queue', models.IntegerField(default=0)),
+                ('in_progress', models.IntegerField(default=0)),
+                ('completed', models.IntegerField(default=0)),
+                ('postponed', models.IntegerField(default=0)),
+                ('created_per_day', models.JSONField(default=dict)),
+            ],
+        ),
+        migrations.RunPython(build_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 5.1.15 on 2026-10-18 20:03
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+# Tasks and archived tasks as one relation, read through the unmanaged TaskWithArchived model
+CREATE_VIEW = """
+    CREATE VIEW viewer_task_all AS
+    SELECT id, title, owner_id, description, status, creation_date, revision, FALSE AS archived
+    FROM viewer_task
+    UNION ALL
+    SELECT id, title, owner_id, description, status, creation_date, revision, TRUE AS archived
+    FROM viewer_archivedtask
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('viewer', '0007_task_stats'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskWithArchived',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('title', models.CharField(max_length=200)),
+                ('description', models.TextField()),
+                ('status', models.CharField(blank=True, choices=[(None, 'select status'), ('In queue', 'In queue'), ('In progress', 'In progress'), ('Completed', 'Completed'), ('Postponed', 'Postponed')], max_length=30)),
+                ('creation_date', models.DateField()),
+                ('revision', models.BigIntegerField()),
+                ('archived', models.BooleanField()),
+            ],
+            options={
+                'db_table': 'viewer_task_all',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedTask',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('title', models.CharField(max_length=200)),
+                ('description', models.TextField()),
+                ('status', models.CharField(blank=True, choices=[(None, 'select status'), ('In queue', 'In queue'), ('In progress', 'In progress'), ('Completed', 'Completed'), ('Postponed', 'Postponed')], max_length=30)),
+                ('creation_date', models.DateField()),
+                ('revision', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['status', 'creation_date'], name='task_status_created_idx'),
+        ),
+        migrations.AddField(
+            model_name='archivedtask',
+            name='owner',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.DO_NOTHING, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='archivedtask',
+            index=models.Index(fields=['owner', 'creation_date', 'id'], name='archivedtask_owner_created_idx'),
+        ),
+        migrations.RunSQL(CREATE_VIEW, 'DROP VIEW viewer_task_all'),
+    ]
@@ -0,0 +1,66 @@
+# Generated by Django 5.1.15 on 2026-10-18 20:17
+
+from django.db import migrations, models
+
+# The columns are added with ALTER TABLE ADD COLUMN: on SQLite, AddField would rebuild
+# viewer_task, which breaks the viewer_task_all view and drops the full-text triggers
+ADD_COLUMNS = [
+    "ALTER TABLE viewer_task ADD COLUMN version integer NOT NULL DEFAULT 1",
+    "ALTER TABLE viewer_archivedtask ADD COLUMN version integer NOT NULL DEFAULT 1",
+]
+
+DROP_COLUMNS = [
+    "ALTER TABLE viewer_task DROP COLUMN version",
+    "ALTER TABLE viewer_archivedtask DROP COLUMN version",
+]
+
+CREATE_VIEW = """
+    CREATE VIEW viewer_task_all AS
+    SELECT id, title, owner_id, description, status, creation_date, revision, version, FALSE AS archived
+    FROM viewer_task
+    UNION ALL
+    SELECT id, title, owner_id, description, status, creation_date, revision, version, TRUE AS archived
+    FROM viewer_archivedtask
+"""
+
+CREATE_OLD_VIEW = """
+    CREATE VIEW viewer_task_all AS
+    SELECT id, title, owner_id, description, status, creation_date, revision, FALSE AS archived
+    FROM viewer_task
+    UNION ALL
+    SELECT id, title, owner_id, description, status, creation_date, revision, TRUE AS archived
+    FROM viewer_archivedtask
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('viewer', '0008_task_archive'),
+    ]
+
+    operations = [
+        migrations.RunSQL('DROP VIEW viewer_task_all', CREATE_OLD_VIEW),
+        migrations.SeparateDatabaseAndState(
+            database_operations=[migrations.RunSQL(ADD_COLUMNS, DROP_COLUMNS)],
+            state_operations=[
+                migrations.AddField(
+                    model_name='archivedtask',
+                    name='version',
+                    field=models.IntegerField(default=1),
+                ),
+                migrations.AddField(
+                    model_name='task',
+                    name='version',
+                    field=models.IntegerField(default=1),
+                ),
+                migrations.AddField(
+                    model_name='taskwitharchived',
+                    name='version',
+                    field=models.IntegerField(),
+                    preserve_default=False,
+                ),
+            ],
+        ),
+        migrations.RunSQL(CREATE_VIEW, 'DROP VIEW viewer_task_all'),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.1.15 on 2026-10-18 21:10
+
+from django.db import migrations, models
+
+# The column is added with ALTER TABLE ADD COLUMN: on SQLite, AddField would rebuild
+# viewer_task, which breaks the viewer_task_all view and drops the full-text triggers
+ADD_COLUMN = "ALTER TABLE viewer_task ADD COLUMN completed_at datetime NULL"
+
+DROP_COLUMN = "ALTER TABLE viewer_task DROP COLUMN completed_at"
+
+# The completion time of existing tasks is unknown: count them as completed on the day they were created
+BACKFILL = "UPDATE viewer_task SET completed_at = creation_date || ' 00:00:00' WHERE status = 'Completed'"
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('viewer', '0010_idempotency_key'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[migrations.RunSQL(ADD_COLUMN, DROP_COLUMN)],
+            state_operations=[
+                migrations.AddField(
+                    model_name='task',
+                    name='completed_at',
+                    field=models.DateTimeField(blank=True, null=True),
+                ),
+            ],
+        ),
+        migrations.RunSQL(BACKFILL, migrations.RunSQL.noop),
+        migrations.RemoveIndex(
+            model_name='task',
+            name='task_status_created_idx',
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['status', 'completed_at'], name='task_status_completed_idx'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.1.15 on 2026-10-18 21:30
+
+import datetime
+
+from django.conf import settings
+from django.db import migrations
+
+
+def drop_old_days(apps, schema_editor):
+    # Keep the per-day counts of the window counted from now on
+    TaskStats = apps.get_model('viewer', 'TaskStats')
+    days = getattr(settings, 'TASK_STATS', {}).get('DAYS', 365)
+    first_day = (datetime.date.today() - datetime.timedelta(days=days - 1)).isoformat()
+    for stats in TaskStats.objects.iterator():
+        per_day = {day: count for day, count in stats.tasks_by_creation_day.items() if day >= first_day}
+        if per_day != stats.tasks_by_creation_day:
+            stats.tasks_by_creation_day = per_day
+            stats.save(update_fields=['tasks_by_creation_day'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('viewer', '0011_task_completed_at'),
+    ]
+
+    operations = [
+        migrations.RenameField(
+            model_name='taskstats',
+            old_name='created_per_day',
+            new_name='tasks_by_creation_day',
+        ),
+        migrations.RunPython(drop_old_days, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.1.15 on 2026-10-18 21:07
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('viewer', '0012_taskstats_tasks_by_creation_day'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='deletedtask',
+            name='deleted_at',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now),
+        ),
+        migrations.AddField(
+            model_name='tasksyncstate',
+            name='pruned_revision',
+            field=models.BigIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,74 @@
+# Generated by Django 5.1.15 on 2026-10-18 21:09
+
+from django.conf import settings
+from django.db import migrations, models
+
+# The column is added with ALTER TABLE ADD COLUMN: on SQLite, AddField would rebuild
+# viewer_task, which breaks the viewer_task_all view and drops the full-text triggers.
+# SQLite can only add virtual (not stored) generated columns this way, which is what
+# the model declares.
+STATUS_RANK = """
+    CASE WHEN status = 'In queue' THEN 0
+         WHEN status = 'In progress' THEN 1
+         WHEN status = 'Completed' THEN 2
+         WHEN status = 'Postponed' THEN 3
+         ELSE 4 END
+"""
+
+ADD_COLUMN = f"ALTER TABLE viewer_task ADD COLUMN status_rank integer GENERATED ALWAYS AS ({STATUS_RANK}) VIRTUAL"
+
+DROP_COLUMN = "ALTER TABLE viewer_task DROP COLUMN status_rank"
+
+# Archived tasks are never ordered off an index, so their rank is computed in the view
+CREATE_VIEW = f"""
+    CREATE VIEW viewer_task_all AS
+    SELECT id, title, owner_id, description, status, creation_date, revision, version, status_rank,
+           FALSE AS archived
+    FROM viewer_task
+    UNION ALL
+    SELECT id, title, owner_id, description, status, creation_date, revision, version, {STATUS_RANK},
+           TRUE AS archived
+    FROM viewer_archivedtask
+"""
+
+CREATE_OLD_VIEW = """
+    CREATE VIEW viewer_task_all AS
+    SELECT id, title, owner_id, description, status, creation_date, revision, version, FALSE AS archived
+    FROM viewer_task
+    UNION ALL
+    SELECT id, title, owner_id, description, status, creation_date, revision, version, TRUE AS archived
+    FROM viewer_archivedtask
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('viewer', '0013_tombstone_expiry'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunSQL('DROP VIEW viewer_task_all', CREATE_OLD_VIEW),
+        migrations.SeparateDatabaseAndState(
+            database_operations=[migrations.RunSQL(ADD_COLUMN, DROP_COLUMN)],
+            state_operations=[
+                migrations.AddField(
+                    model_name='task',
+                    name='status_rank',
+                    field=models.GeneratedField(db_persist=False, expression=models.Case(models.When(status='In queue', then=models.Value(0)), models.When(status='In progress', then=models.Value(1)), models.When(status='Completed', then=models.Value(2)), models.When(status='Postponed', then=models.Value(3)), default=models.Value(4)), output_field=models.IntegerField()),
+                ),
+                migrations.AddField(
+                    model_name='taskwitharchived',
+                    name='status_rank',
+                    field=models.IntegerField(),
+                    preserve_default=False,
+                ),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['owner', 'status_rank', 'id'], name='task_owner_status_rank_idx'),
+        ),
+        migrations.RunSQL(CREATE_VIEW, 'DROP VIEW viewer_task_all'),
+    ]
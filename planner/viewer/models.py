@@ -1,17 +1,31 @@
-from django.db import models
+import datetime
+from collections import Counter
+
+from django.conf import settings
+from django.db import connections, models, router, transaction
 from django.contrib.auth.models import User
+from django.utils import timezone
 
 from django.core.validators import RegexValidator
 from django.core.validators import MinValueValidator
 
 from django.db.models import (
     DO_NOTHING, CharField, DateField, ForeignKey, IntegerField, DecimalField, Model, TextField, ImageField,
-    BooleanField, EmailField
+    BooleanField, EmailField, Index, BigIntegerField, OneToOneField, CASCADE, F, JSONField, Count,
+    DateTimeField, UniqueConstraint, GeneratedField, Case, When, Value
 )
 
 
 # Create your models here.
 class Task(Model):
+    """
+    A task of a user.
+
+    Full-text triggers (migration 0006) and the `viewer_task_all` view (0008) depend on the
+    table, and SQLite remakes the table for AlterField and most AddField operations, which
+    breaks both. Change its columns with SeparateDatabaseAndState and a raw `ALTER TABLE`,
+    dropping and recreating the view around it, as migrations 0009, 0011 and 0014 do.
+    """
 
     # These constants contain statuses
     INQU = 'In queue'
@@ -28,11 +42,537 @@ class Task(Model):
         PSPD: 'Postponed',
     }
 
+    # Workflow order of the statuses: sorting by status follows it rather than the alphabet
+    STATUS_ORDER = (INQU, PRGR, CMPL, PSPD)
+
     title = CharField(max_length=200)
     owner = ForeignKey(User, on_delete=DO_NOTHING, default=None)
     description = TextField(default=None)
     status = CharField(max_length=30, choices=STATUS_CHOICES, blank=True)
     creation_date = DateField(default=None, null=False)
+    # Owner-wide change counter value of the last modification, used for delta sync
+    revision = BigIntegerField(default=0)
+    # Per-task edit counter, sent as the ETag clients pass back in `If-Match`
+    version = IntegerField(default=1)
+    # When the task was last set to Completed (None while it is not), used to archive old completed tasks
+    completed_at = DateTimeField(null=True, blank=True)
+    # Position of the status in STATUS_ORDER (tasks without a status last), computed by the
+    # database, so the task list can order and page by status in workflow order off an index
+    status_rank = GeneratedField(
+        expression=Case(
+            When(status=INQU, then=Value(0)),
+            When(status=PRGR, then=Value(1)),
+            When(status=CMPL, then=Value(2)),
+            When(status=PSPD, then=Value(3)),
+            default=Value(4),
+        ),
+        output_field=IntegerField(),
+        db_persist=False,
+    )
+
+    class Meta:
+        # Composite indexes backing the keyset pagination of the task list
+        indexes = [
+            Index(fields=['owner', 'status', 'id'], name='task_owner_status_idx'),
+            Index(fields=['owner', 'status_rank', 'id'], name='task_owner_status_rank_idx'),
+            Index(fields=['owner', 'creation_date', 'id'], name='task_owner_created_idx'),
+            Index(fields=['owner', 'revision'], name='task_owner_revision_idx'),
+            # Finds the old completed tasks to archive
+            Index(fields=['status', 'completed_at'], name='task_status_completed_idx'),
+        ]
 
     def __str__(self):
         return f"Task: {self.title} (user: {self.owner.name})"
+
+    @classmethod
+    def get_status_rank(cls, status):
+        """
+        Return the `status_rank` the database computes for a status.
+        """
+        return cls.STATUS_ORDER.index(status) if status in cls.STATUS_ORDER else len(cls.STATUS_ORDER)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember what the statistics count the stored task under
+        if 'status' in field_names and 'creation_date' in field_names:
+            instance._stored_stats_key = instance.get_stats_key()
+        return instance
+
+    def get_stats_key(self):
+        """
+        Return the `(status, creation_date)` pair the per-user statistics count this task under.
+        """
+        return self.status, self.creation_date
+
+    def get_stored_stats_key(self):
+        """
+        Return the statistics key of the task as stored in the database.
+        """
+        key = getattr(self, '_stored_stats_key', None)
+        if key is None:
+            key = Task.objects.filter(pk=self.pk).values_list('status', 'creation_date').first()
+        return key
+
+    def stamp_completion(self, now=None):
+        """
+        Set `completed_at` for the task's status: the time it became Completed, None otherwise.
+        """
+        if self.status != self.CMPL:
+            self.completed_at = None
+        elif self.completed_at is None:
+            self.completed_at = now or timezone.now()
+
+    def save(self, *args, **kwargs):
+        # Stamp the task with the owner's next revision in the same transaction as the write
+        with transaction.atomic():
+            stored = None if self._state.adding else self.get_stored_stats_key()
+            self.revision = TaskSyncState.next_revision(self.owner_id)
+            if not self._state.adding:
+                self.version += 1
+            self.stamp_completion()
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'revision', 'version'}
+                if 'status' in update_fields:
+                    kwargs['update_fields'].add('completed_at')
+            super().save(*args, **kwargs)
+
+            # Update the owner's statistics if the task moved to another status or day
+            key = self.get_stats_key()
+            if stored is not None and update_fields is not None:
+                key = (
+                    key[0] if 'status' in update_fields else stored[0],
+                    key[1] if 'creation_date' in update_fields else stored[1],
+                )
+            if key != stored:
+                TaskStats.apply(self.owner_id, added=[key], removed=[stored] if stored else [])
+            self._stored_stats_key = key
+
+    @classmethod
+    def update_if_version(cls, task_id, owner_id, changes, fields, versions=None):
+        """
+        Write `changes` to the owner's task with one `UPDATE ... RETURNING` of `fields`, if it is at
+        one of `versions` (any version when None). Returns `(row, updated)`: the task's `fields` as
+        updated, as stored when the version did not match, or None if there is no such task.
+        """
+        using = router.db_for_write(cls)
+        with transaction.atomic(using=using):
+            revision = TaskSyncState.next_revision(owner_id)
+            condition, condition_params = cls.get_version_condition(task_id, owner_id, versions)
+            assignments, params = cls.get_update_assignments(changes, revision, connections[using])
+            columns = [cls._meta.get_field(name) for name in fields]
+            quote_name = connections[using].ops.quote_name
+
+            with connections[using].cursor() as cursor:
+                stats_moved = None
+                if 'status' in changes:
+                    # Before the task is updated, while its old status can still be read
+                    stats_moved = TaskStats.move_status(cursor, owner_id, changes['status'], condition,
+                                                        condition_params)
+                # RETURNING needs SQLite 3.35 or later
+                cursor.execute(
+                    'UPDATE %s SET %s WHERE %s RETURNING %s' % (
+                        quote_name(cls._meta.db_table), ', '.join(assignments), condition,
+                        ', '.join(quote_name(field.column) for field in columns),
+                    ),
+                    params + condition_params,
+                )
+                returned = cursor.fetchone()
+
+            if returned is None:
+                row = cls.objects.filter(id=task_id, owner_id=owner_id).values(*fields).first()
+                # Nothing was written, but the owner's revision was taken above. Keeping it would
+                # change the ETags of the owner's listings and drop their cached copies for nothing
+                transaction.set_rollback(True, using=using)
+                return row, False
+
+            if stats_moved is False or 'creation_date' in changes:
+                # No statistics yet, or the task moved to another day: recount the owner's
+                TaskStats.rebuild(owner_ids=[owner_id])
+            return {field.name: field.to_python(value) for field, value in zip(columns, returned)}, True
+
+    @classmethod
+    def get_version_condition(cls, task_id, owner_id, versions):
+        """
+        Return the SQL condition and params selecting the owner's task at one of `versions`.
+        """
+        condition = 'id = %s AND owner_id = %s'
+        params = [task_id, owner_id]
+        if versions is not None:
+            # An empty set (no valid ETag in `If-Match`) matches no version
+            condition += ' AND version IN (%s)' % ', '.join(['%s'] * len(versions)) if versions else ' AND 0'
+            params += sorted(versions)
+        return condition, params
+
+    @classmethod
+    def get_update_assignments(cls, changes, revision, connection):
+        """
+        Return the SQL assignments and params writing `changes`, the completion time when the
+        status changes, the new `revision` and the next version.
+        """
+        quote_name = connection.ops.quote_name
+        assignments, params = [], []
+        for name, value in changes.items():
+            field = cls._meta.get_field(name)
+            assignments.append(f'{quote_name(field.column)} = %s')
+            params.append(field.get_db_prep_save(value, connection))
+        if 'status' in changes:
+            if changes['status'] == cls.CMPL:
+                # Keep the completion time of a task that was already completed
+                assignments.append('completed_at = COALESCE(completed_at, %s)')
+                params.append(cls._meta.get_field('completed_at').get_db_prep_save(timezone.now(), connection))
+            else:
+                assignments.append('completed_at = NULL')
+        assignments += ['revision = %s', 'version = version + 1']
+        params.append(revision)
+        return assignments, params
+
+    @classmethod
+    def delete_if_owned(cls, task_id, owner_id):
+        """
+        Delete the owner's task with a single `DELETE ... RETURNING` (no read beforehand),
+        leaving a tombstone and removing it from the owner's statistics. Returns the revision
+        of the tombstone, or None if the owner has no such task.
+        """
+        using = router.db_for_write(cls)
+        with transaction.atomic(using=using):
+            with connections[using].cursor() as cursor:
+                cursor.execute(
+                    'DELETE FROM %s WHERE id = %%s AND owner_id = %%s RETURNING status, creation_date'
+                    % connections[using].ops.quote_name(cls._meta.db_table),
+                    [task_id, owner_id],
+                )
+                returned = cursor.fetchone()
+            if returned is None:
+                return None
+            status, creation_date = returned
+            TaskStats.apply(owner_id, removed=[(status, cls._meta.get_field('creation_date').to_python(creation_date))])
+            return DeletedTask.record(owner_id, [task_id])
+
+    def delete(self, *args, **kwargs):
+        # Leave a tombstone so clients syncing with `?since=` learn about the deletion
+        with transaction.atomic():
+            self.revision = DeletedTask.record(self.owner_id, [self.pk])
+            stored = self.get_stored_stats_key()
+            if stored is not None:
+                TaskStats.apply(self.owner_id, removed=[stored])
+            return super().delete(*args, **kwargs)
+
+
+class TaskSyncState(Model):
+    """
+    Per-user change counter. Every task write takes the next value, so comparing it with the
+    revision a client last saw tells whether (and which) tasks changed.
+    """
+    owner = OneToOneField(User, on_delete=CASCADE, primary_key=True)
+    revision = BigIntegerField(default=0)
+    # Highest revision of the owner's purged tombstones: deltas from before it are incomplete
+    pruned_revision = BigIntegerField(default=0)
+
+    @classmethod
+    def next_revision(cls, owner_id, count=1):
+        """
+        Reserve `count` consecutive revisions for the owner and return the last one.
+        """
+        with transaction.atomic():
+            if not cls.objects.filter(owner_id=owner_id).update(revision=F('revision') + count):
+                cls.objects.get_or_create(owner_id=owner_id)
+                cls.objects.filter(owner_id=owner_id).update(revision=F('revision') + count)
+            return cls.objects.filter(owner_id=owner_id).values_list('revision', flat=True).get()
+
+    @classmethod
+    def current_revision(cls, owner_id):
+        """
+        Return the owner's latest revision with a single primary key lookup.
+        """
+        return cls.objects.filter(owner_id=owner_id).values_list('revision', flat=True).first() or 0
+
+    @classmethod
+    def can_sync_from(cls, owner_id, revision):
+        """
+        Return False if tombstones newer than `revision` were purged, so the changes since
+        `revision` can no longer be listed and the client has to refetch everything.
+        """
+        pruned = cls.objects.filter(owner_id=owner_id).values_list('pruned_revision', flat=True).first() or 0
+        return revision >= pruned
+
+
+class DeletedTask(Model):
+    """
+    Tombstone of a deleted task, kept so delta sync can report deletions. Tombstones are
+    purged after a retention period (see `purge`).
+    """
+    task_id = BigIntegerField()
+    owner = ForeignKey(User, on_delete=CASCADE)
+    revision = BigIntegerField()
+    deleted_at = DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        indexes = [
+            Index(fields=['owner', 'revision'], name='deletedtask_owner_rev_idx'),
+        ]
+
+    @classmethod
+    def record(cls, owner_id, task_ids):
+        """
+        Create tombstones for the given task ids, each with its own new revision, and
+        return the last revision (the first id gets the first revision).
+        """
+        task_ids = list(task_ids)
+        if not task_ids:
+            return None
+        last = TaskSyncState.next_revision(owner_id, len(task_ids))
+        first = last - len(task_ids) + 1
+        cls.objects.bulk_create([
+            cls(task_id=task_id, owner_id=owner_id, revision=first + offset)
+            for offset, task_id in enumerate(task_ids)
+        ])
+        return last
+
+    @classmethod
+    def purge(cls, cutoff, batch_size):
+        """
+        Delete up to `batch_size` tombstones recorded before `cutoff`, in one transaction,
+        and return how many were deleted.
+
+        Each owner's `TaskSyncState.pruned_revision` moves up to the last purged revision,
+        so delta requests from before it are told to resync instead of missing deletions.
+        """
+        with transaction.atomic():
+            rows = list(cls.objects.filter(deleted_at__lt=cutoff).order_by('id')
+                        .values_list('id', 'owner_id', 'revision')[:batch_size])
+            if not rows:
+                return 0
+            pruned = {}
+            for _, owner_id, revision in rows:
+                pruned[owner_id] = max(revision, pruned.get(owner_id, 0))
+            for owner_id, revision in pruned.items():
+                TaskSyncState.objects.filter(owner_id=owner_id, pruned_revision__lt=revision).update(
+                    pruned_revision=revision)
+            cls.objects.filter(id__in=[row[0] for row in rows]).delete()
+        return len(rows)
+
+
+def compute_task_stats(*task_models, owner_ids=None):
+    """
+    Compute the statistics of every owner (or of `owner_ids`) from the given task tables.
+    Returns `{owner_id: {field: value}}` with the TaskStats fields.
+    """
+    stats = {}
+    first_day = TaskStats.get_first_day()
+    for task_model in task_models:
+        tasks = task_model.objects.all()
+        if owner_ids is not None:
+            tasks = tasks.filter(owner_id__in=owner_ids)
+
+        for owner_id, status, count in tasks.values_list('owner_id', 'status').annotate(count=Count('id')).order_by():
+            row = stats.setdefault(owner_id, TaskStats.empty_fields())
+            row['total'] += count
+            if status in TaskStats.STATUS_FIELDS:
+                row[TaskStats.STATUS_FIELDS[status]] += count
+        recent = tasks.filter(creation_date__gte=first_day)
+        for owner_id, date, count in recent.values_list('owner_id', 'creation_date').annotate(count=Count('id')).order_by():
+            days = stats[owner_id]['tasks_by_creation_day']
+            days[date.isoformat()] = days.get(date.isoformat(), 0) + count
+    return stats
+
+
+class TaskStats(Model):
+    """
+    Per-user task statistics, kept up to date on every task write so the dashboard reads
+    them with a single primary key lookup instead of aggregating the task table.
+    Archived tasks stay counted.
+    The `rebuild_task_stats` management command recomputes them from scratch.
+    """
+    # Status -> field holding the number of tasks with that status
+    STATUS_FIELDS = {
+        Task.INQU: 'in_queue',
+        Task.PRGR: 'in_progress',
+        Task.CMPL: 'completed',
+        Task.PSPD: 'postponed',
+    }
+
+    owner = OneToOneField(User, on_delete=CASCADE, primary_key=True)
+    total = IntegerField(default=0)
+    in_queue = IntegerField(default=0)
+    in_progress = IntegerField(default=0)
+    completed = IntegerField(default=0)
+    postponed = IntegerField(default=0)
+    # ISO creation date -> number of the owner's tasks (deleted ones excluded) created that day,
+    # for the last `TASK_STATS['DAYS']` days only
+    tasks_by_creation_day = JSONField(default=dict)
+
+    @classmethod
+    def empty_fields(cls):
+        return {'total': 0, **{field: 0 for field in cls.STATUS_FIELDS.values()}, 'tasks_by_creation_day': {}}
+
+    @classmethod
+    def get_first_day(cls):
+        """
+        Return the first creation date counted in `tasks_by_creation_day`.
+        """
+        days = getattr(settings, 'TASK_STATS', {}).get('DAYS', 365)
+        return timezone.localdate() - datetime.timedelta(days=days - 1)
+
+    @classmethod
+    def apply(cls, owner_id, added=(), removed=()):
+        """
+        Count tasks added to and removed from the owner's statistics, each given by its
+        `(status, creation_date)` key. A changed task is removed under its old key and
+        added under its new one. Days before the counted window are dropped, so the per-day
+        counts stay bounded.
+        """
+        first_day = cls.get_first_day().isoformat()
+        statuses, days = Counter(), Counter()
+        for sign, keys in ((1, added), (-1, removed)):
+            for status, date in keys:
+                statuses[status] += sign
+                if str(date) >= first_day:
+                    days[str(date)] += sign
+        total = sum(statuses.values())
+        statuses = {status: count for status, count in statuses.items() if count}
+        days = {day: count for day, count in days.items() if count}
+        if not (total or statuses or days):
+            return
+
+        with transaction.atomic():
+            # Lock the row: the per-day counts are updated by read-modify-write
+            stats, _ = cls.objects.select_for_update().get_or_create(owner_id=owner_id)
+            stats.total += total
+            for status, count in statuses.items():
+                if status in cls.STATUS_FIELDS:
+                    field = cls.STATUS_FIELDS[status]
+                    setattr(stats, field, getattr(stats, field) + count)
+            per_day = {day: count for day, count in stats.tasks_by_creation_day.items() if day >= first_day}
+            for day, count in days.items():
+                count += per_day.get(day, 0)
+                if count > 0:
+                    per_day[day] = count
+                else:
+                    per_day.pop(day, None)
+            stats.tasks_by_creation_day = per_day
+            stats.save()
+
+    @classmethod
+    def move_status(cls, cursor, owner_id, status, condition, params):
+        """
+        Move the task selected by `condition` (SQL on the task table, with its `params`) from the
+        counter of its stored status to that of `status`. Returns False if the owner has no statistics yet.
+        """
+        cursor.execute(*cls.get_status_move(cursor.db, owner_id, status, condition, params))
+        if cursor.rowcount:
+            return True
+        return cls.objects.filter(owner_id=owner_id).exists()
+
+    @classmethod
+    def get_status_move(cls, connection, owner_id, status, condition, params):
+        """
+        Return the `UPDATE` (and its params) behind `move_status()`.
+        """
+        # Joining the task's row gives its stored status to every counter: each one loses the
+        # task if it counts that status and gains it if it counts `status`. When `condition`
+        # matches no task, the join is empty and nothing is updated
+        quote_name = connection.ops.quote_name
+        assignments, assignment_params = [], []
+        for task_status, field in cls.STATUS_FIELDS.items():
+            assignments.append(f'{field} = {field} - (task.status = %s) + %s')
+            assignment_params += [task_status, int(task_status == status)]
+        sql = 'UPDATE %s SET %s FROM (SELECT status FROM %s WHERE %s) AS task WHERE owner_id = %%s' % (
+            quote_name(cls._meta.db_table), ', '.join(assignments), quote_name(Task._meta.db_table), condition,
+        )
+        return sql, assignment_params + params + [owner_id]
+
+    @classmethod
+    def rebuild(cls, owner_ids=None):
+        """
+        Recompute the statistics of every owner (or of `owner_ids`) from the task table.
+        Returns the number of owners with statistics.
+        """
+        stats = compute_task_stats(Task, ArchivedTask, owner_ids=owner_ids)
+        with transaction.atomic():
+            existing = cls.objects.all() if owner_ids is None else cls.objects.filter(owner_id__in=owner_ids)
+            existing.delete()
+            cls.objects.bulk_create([cls(owner_id=owner_id, **fields) for owner_id, fields in stats.items()],
+                                    batch_size=1000)
+        return len(stats)
+
+    def as_dict(self):
+        """
+        Return the statistics as served by the dashboard.
+        """
+        return {
+            "total": self.total,
+            "by_status": {status: getattr(self, field) for status, field in self.STATUS_FIELDS.items()},
+            "completion_rate": round(self.completed / self.total, 4) if self.total else 0.0,
+            "tasks_by_creation_day": dict(sorted(
+                (day, count) for day, count in self.tasks_by_creation_day.items()
+                if day >= self.get_first_day().isoformat()
+            )),
+        }
+
+
+class ArchivedTask(Model):
+    """
+    Completed task moved out of the task table by `planner.archive`, keeping its id.
+    Archived tasks are read-only; they are listed with `?include_archived=`.
+    """
+    id = BigIntegerField(primary_key=True)
+    title = CharField(max_length=200)
+    owner = ForeignKey(User, on_delete=DO_NOTHING)
+    description = TextField()
+    status = CharField(max_length=30, choices=Task.STATUS_CHOICES, blank=True)
+    creation_date = DateField()
+    revision = BigIntegerField(default=0)
+    version = IntegerField(default=1)
+
+    class Meta:
+        indexes = [
+            Index(fields=['owner', 'creation_date', 'id'], name='archivedtask_owner_created_idx'),
+        ]
+
+
+class IdempotencyKey(Model):
+    """
+    An `Idempotency-Key` sent with a task creation (see `planner.idempotency`).
+
+    The unique `(owner, key)` constraint lets exactly one request claim a key, whichever
+    process serves it. The row is pending until the response of that request is stored in
+    `status` and `response`; it is reused or purged once `expires_at` has passed.
+    """
+    owner = ForeignKey(User, on_delete=CASCADE)
+    key = CharField(max_length=255)
+    fingerprint = CharField(max_length=64)  # Method, path and body of the claiming request
+    status = IntegerField(null=True)
+    response = JSONField(null=True)
+    expires_at = DateTimeField()
+
+    class Meta:
+        constraints = [
+            UniqueConstraint(fields=['owner', 'key'], name='idempotencykey_owner_key_uniq'),
+        ]
+        indexes = [
+            Index(fields=['expires_at'], name='idempotencykey_expires_idx'),
+        ]
+
+
+class TaskWithArchived(Model):
+    """
+    Read-only model over the `viewer_task_all` database view: the tasks and the archived
+    tasks, with an `archived` flag. Lets the task list filter, order and paginate both
+    tables as one.
+    """
+    id = BigIntegerField(primary_key=True)
+    title = CharField(max_length=200)
+    owner = ForeignKey(User, on_delete=DO_NOTHING, db_constraint=False, related_name='+')
+    description = TextField()
+    status = CharField(max_length=30, choices=Task.STATUS_CHOICES, blank=True)
+    creation_date = DateField()
+    revision = BigIntegerField()
+    version = IntegerField()
+    status_rank = IntegerField()
+    archived = BooleanField()
+
+    class Meta:
+        managed = False
+        db_table = 'viewer_task_all'
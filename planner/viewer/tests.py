@@ -0,0 +1,123 @@
+# Import necessary modules
+import datetime
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.utils import timezone
+
+from planner.archive import archive_completed_tasks, purge_tombstones
+from planner.search import search_task_ids
+from .models import Task, ArchivedTask, DeletedTask, TaskSyncState, TaskWithArchived
+
+
+def create_task(owner, title='Task', description='Description', status=Task.INQU, **fields):
+    return Task.objects.create(title=title, owner=owner, description=description, status=status,
+                               creation_date=fields.pop('creation_date', datetime.date(2024, 1, 1)), **fields)
+
+
+class TaskSearchIndexTests(TestCase):
+    """
+    The full-text index of the tasks is kept up to date by triggers on the task table.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user('owner', password='password')
+
+    def test_created_task_is_indexed(self):
+        task = create_task(self.user, title='Buy milk')
+        self.assertEqual(search_task_ids(self.user.pk, 'milk', 10, 0), [task.pk])
+
+    def test_updated_task_is_reindexed(self):
+        task = create_task(self.user, title='Buy milk')
+        task.title = 'Sell cheese'
+        task.save()
+        self.assertEqual(search_task_ids(self.user.pk, 'milk', 10, 0), [])
+        self.assertEqual(search_task_ids(self.user.pk, 'cheese', 10, 0), [task.pk])
+
+    def test_deleted_task_is_unindexed(self):
+        task = create_task(self.user, title='Buy milk')
+        Task.delete_if_owned(task.pk, self.user.pk)
+        self.assertEqual(search_task_ids(self.user.pk, 'milk', 10, 0), [])
+
+    def test_search_is_restricted_to_the_owner(self):
+        other = User.objects.create_user('other', password='password')
+        create_task(other, title='Buy milk')
+        self.assertEqual(search_task_ids(self.user.pk, 'milk', 10, 0), [])
+
+
+class TaskArchiveTests(TestCase):
+    """
+    Old completed tasks move to the archive table and stay listed through the
+    `viewer_task_all` view.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user('owner', password='password')
+        self.old = create_task(self.user, title='Old', status=Task.CMPL)
+        self.recent = create_task(self.user, title='Recent', status=Task.CMPL)
+        self.open = create_task(self.user, title='Open', status=Task.PRGR)
+        Task.objects.filter(pk=self.old.pk).update(completed_at=timezone.now() - datetime.timedelta(days=100))
+
+    def test_archives_by_completion_time(self):
+        self.assertEqual(archive_completed_tasks(age_days=90, pause=0), 1)
+        self.assertEqual(list(ArchivedTask.objects.values_list('id', flat=True)), [self.old.pk])
+        self.assertFalse(Task.objects.filter(pk=self.old.pk).exists())
+
+    def test_view_lists_tasks_and_archived_tasks(self):
+        archive_completed_tasks(age_days=90, pause=0)
+        rows = TaskWithArchived.objects.filter(owner=self.user).order_by('id').values_list('id', 'archived')
+        self.assertEqual(list(rows), [(self.old.pk, True), (self.recent.pk, False), (self.open.pk, False)])
+
+    def test_view_ranks_statuses_of_both_tables(self):
+        archive_completed_tasks(age_days=90, pause=0)
+        ranks = dict(TaskWithArchived.objects.values_list('id', 'status_rank'))
+        self.assertEqual(ranks[self.old.pk], Task.get_status_rank(Task.CMPL))
+        self.assertEqual(ranks[self.open.pk], Task.get_status_rank(Task.PRGR))
+
+    def test_archived_tasks_leave_tombstones(self):
+        revision = TaskSyncState.current_revision(self.user.pk)
+        archive_completed_tasks(age_days=90, pause=0)
+        tombstones = DeletedTask.objects.filter(owner=self.user, revision__gt=revision)
+        self.assertEqual(list(tombstones.values_list('task_id', flat=True)), [self.old.pk])
+
+
+class TombstoneTests(TestCase):
+    """
+    Tombstones are purged after the retention period, after which older deltas need a resync.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user('owner', password='password')
+
+    def test_purge_moves_the_pruned_revision(self):
+        task = create_task(self.user)
+        before = TaskSyncState.current_revision(self.user.pk)
+        Task.delete_if_owned(task.pk, self.user.pk)
+        DeletedTask.objects.update(deleted_at=timezone.now() - datetime.timedelta(days=40))
+
+        self.assertEqual(purge_tombstones(age_days=30, pause=0), 1)
+        self.assertFalse(DeletedTask.objects.exists())
+        self.assertFalse(TaskSyncState.can_sync_from(self.user.pk, before))
+        self.assertTrue(TaskSyncState.can_sync_from(self.user.pk, TaskSyncState.current_revision(self.user.pk)))
+
+    def test_recent_tombstones_are_kept(self):
+        task = create_task(self.user)
+        Task.delete_if_owned(task.pk, self.user.pk)
+        self.assertEqual(purge_tombstones(age_days=30, pause=0), 0)
+        self.assertTrue(TaskSyncState.can_sync_from(self.user.pk, 0))
+
+
+class TaskStatusRankTests(TestCase):
+    """
+    The database ranks statuses in workflow order, the same way as `Task.get_status_rank`.
+    """
+
+    def test_rank_follows_the_workflow(self):
+        user = User.objects.create_user('owner', password='password')
+        for status in (Task.PSPD, Task.CMPL, '', Task.INQU, Task.PRGR):
+            create_task(user, status=status)
+        ranked = Task.objects.order_by('status_rank').values_list('status', 'status_rank')
+        self.assertEqual(list(ranked), [
+            (Task.INQU, 0), (Task.PRGR, 1), (Task.CMPL, 2), (Task.PSPD, 3), ('', 4),
+        ])
+        self.assertTrue(all(rank == Task.get_status_rank(status) for status, rank in ranked))
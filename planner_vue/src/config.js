@@ -1 +1,4 @@
-export const API_BASE_URL = 'http://localhost:8000/api';
\ No newline at end of file
+export const API_BASE_URL = 'http://localhost:8000/api';
+
+// Push of task changes (Server-Sent Events) needs the API to be served over ASGI
+export const PUSH_EVENTS_ENABLED = false;